@@ -3,9 +3,17 @@ API Routes
 FastAPI endpoint tanımları.
 Single Responsibility: Her endpoint tek bir iş yapar.
 """
+import asyncio
+import hashlib
+import importlib
 import logging
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import Optional
+import time
+from collections import OrderedDict
+from functools import lru_cache
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Optional, Tuple, Union, TYPE_CHECKING
 
 from src.api.schemas import (
     QueryRequest, QueryResponse, SourceDocument, TokenUsage,
@@ -15,13 +23,55 @@ from src.api.schemas import (
     ErrorResponse,
     SourceTypeEnum
 )
-# ESKİ: RAGPipeline importunu kaldırdık
-# YENİ: LangGraph ajanını import ediyoruz
-from src.services.rag.graph import query_agent
-from src.infrastructure.vector_store import VectorStoreService
+from src.infrastructure.config import get_settings
+
+if TYPE_CHECKING:
+    from src.domain.embeddings import EmbeddingService
+    from src.services.rag.graph import aquery_agent, astream_agent
+    from src.infrastructure.vector_store import VectorStoreService
 
 logger = logging.getLogger(__name__)
 
+# Sık çağrılan endpoint'lerin log formatları (lazy %-formatting ile kullanılır)
+_LOG_QUERY = "📨 Query request: %.50s..."
+_LOG_QUERY_ERROR = "❌ Query hatası: %s"
+_LOG_INGEST = "📥 Ingest request: %s, limit=%d"
+_LOG_MOVIE = "🎬 Movie request: %s"
+
+
+# =============================================================================
+# LAZY IMPORTS (PEP 562)
+# =============================================================================
+# LangGraph ajanı, ChromaDB ve Gemini embedding; LLM/embedding/vektör DB
+# yığınlarını çeker.
+# Sadece /health veya /movies çağrılan süreçlerde bu maliyeti ödememek için
+# ilk erişimde yüklenirler.
+
+_LAZY_IMPORTS = {
+    "aquery_agent": "src.services.rag.graph",
+    "astream_agent": "src.services.rag.graph",
+    "VectorStoreService": "src.infrastructure.vector_store",
+    "EmbeddingService": "src.domain.embeddings",
+}
+
+
+def __getattr__(name: str):
+    """Ağır bağımlılıkları ilk erişimde import et ve modüle yaz."""
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value
+    return value
+
+
+def _resolve(name: str):
+    """Modül içi kullanım: globals'ta yoksa lazy import'u tetikle."""
+    try:
+        return globals()[name]
+    except KeyError:
+        return __getattr__(name)
+
 # =============================================================================
 # ROUTER INSTANCE
 # =============================================================================
@@ -35,11 +85,41 @@ router = APIRouter(prefix="/api/v1", tags=["CineMind API"])
 
 # NOT: get_rag_pipeline artık kullanılmadığı için kaldırıldı.
 
-def get_vector_store() -> VectorStoreService:
+@lru_cache(maxsize=1)
+def get_vector_store() -> "VectorStoreService":
     """Vector Store singleton."""
-    if not hasattr(get_vector_store, "_instance"):
-        get_vector_store._instance = VectorStoreService()
-    return get_vector_store._instance
+    return _resolve("VectorStoreService")()
+
+
+# Load balancer'lar /health'i birkaç saniyede bir çağırır; embedding
+# servisinin durumu (ok veya hata) bu süre boyunca önbellekten döner,
+# süre dolunca API'ye tekrar ping atılır.
+EMBEDDING_HEALTH_TTL = 30.0
+_embedding_health = {"status": None, "checked_at": 0.0}
+
+
+@lru_cache(maxsize=1)
+def _get_embedding_probe() -> "EmbeddingService":
+    """Health check için tek EmbeddingService instance'ı (sadece kurulum önbelleklenir)."""
+    return _resolve("EmbeddingService")()
+
+
+def _check_embedding() -> str:
+    """Embedding servis durumunu TTL ile önbellekleyerek döndür."""
+    now = time.monotonic()
+    cached = _embedding_health["status"]
+    if cached is not None and now - _embedding_health["checked_at"] < EMBEDDING_HEALTH_TTL:
+        return cached
+    
+    try:
+        _get_embedding_probe().ping()
+        status = "ok"
+    except Exception as e:
+        status = f"error: {str(e)}"
+    
+    _embedding_health["status"] = status
+    _embedding_health["checked_at"] = now
+    return status
 
 
 # =============================================================================
@@ -50,13 +130,20 @@ def get_vector_store() -> VectorStoreService:
     "/query",
     response_model=QueryResponse,
     responses={
+        200: {"content": {"text/event-stream": {}}},
         400: {"model": ErrorResponse, "description": "Geçersiz istek"},
         500: {"model": ErrorResponse, "description": "Sunucu hatası"}
     },
     summary="Agentic RAG Sorgusu",
-    description="LangGraph agent ile sinema veritabanında arama yapar ve cevap üretir."
+    description=(
+        "LangGraph agent ile sinema veritabanında arama yapar ve cevap üretir. "
+        "?stream=true ile cevap Server-Sent Events olarak token token akar."
+    )
 )
-async def query(request: QueryRequest) -> QueryResponse:
+async def query(
+    request: QueryRequest,
+    stream: bool = False
+) -> Union[QueryResponse, StreamingResponse]:
     """
     Agentic RAG Query Endpoint.
     
@@ -65,12 +152,20 @@ async def query(request: QueryRequest) -> QueryResponse:
     2. LangGraph agent çağrılır (Tools: TMDb, VectorDB)
     3. Agent düşünür, araçları kullanır ve cevap üretir
     """
-    logger.info(f"📨 Query request: {request.question[:50]}...")
+    logger.info(_LOG_QUERY, request.question)
+    
+    if stream:
+        return StreamingResponse(
+            _sse_answer(request.question),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"}
+        )
     
     try:
         # Agentic RAG - LangGraph Çağrısı
-        # query_agent fonksiyonu graph'ı derler, çalıştırır ve son cevabı döner
-        answer = query_agent(request.question)
+        # aquery_agent önbellekteki derlenmiş graph'ı ainvoke ile çalıştırır ve son cevabı döner.
+        # Senkron invoke event loop'u LLM cevabı gelene kadar bloklardı.
+        answer = await _resolve("aquery_agent")(request.question)
         
         # Response Mapping
         # Not: Şimdilik 'sources' boş dönüyor çünkü Agent'tan kaynakları ayrıştırmak
@@ -84,15 +179,43 @@ async def query(request: QueryRequest) -> QueryResponse:
         )
         
     except Exception as e:
-        logger.error(f"❌ Query hatası: {e}")
+        logger.error(_LOG_QUERY_ERROR, e)
         raise HTTPException(
             status_code=500,
             detail=f"Sorgu işlenirken hata oluştu: {str(e)}"
         )
 
 
+def _sse_event(payload: dict, event: Optional[str] = None) -> bytes:
+    """Tek bir SSE mesajı oluştur."""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+async def _sse_answer(question: str) -> AsyncIterator[bytes]:
+    """
+    Agent cevabını SSE olarak akıt.
+    
+    Her parça `data: {"token": ...}` olarak gönderilir; akış kaynak
+    listesini taşıyan `event: done` ile biter (alanlar QueryResponse.sources
+    ile aynı). Stream başladıktan sonra HTTP status değiştirilemeyeceği
+    için hatalar `event: error` olarak iletilir.
+    """
+    try:
+        async for token in _resolve("astream_agent")(question):
+            yield _sse_event({"token": token})
+    except Exception as e:
+        logger.error("❌ Query stream hatası: %s", e)
+        yield _sse_event({"detail": f"Sorgu işlenirken hata oluştu: {str(e)}"}, event="error")
+        return
+    
+    # Not: /query ile aynı şekilde agent'tan kaynaklar henüz ayrıştırılmıyor
+    sources: list = []
+    yield _sse_event({"query": question, "sources": sources}, event="done")
+
+
 # =============================================================================
-# INGEST ENDPOINT (DEĞİŞMEDİ)
+# INGEST ENDPOINT
 # =============================================================================
 
 @router.post(
@@ -112,7 +235,7 @@ async def ingest(
     """
     Ingestion Endpoint.
     """
-    logger.info(f"📥 Ingest request: {request.source.value}, limit={request.limit}")
+    logger.info(_LOG_INGEST, request.source.value, request.limit)
     
     # Background task olarak çalıştır
     background_tasks.add_task(
@@ -131,35 +254,71 @@ async def ingest(
 async def _run_ingestion(source: str, limit: int):
     """Background ingestion task."""
     # Lazy import to avoid circular dependencies
-    from src.services.ingestion_coordinator import IngestionCoordinator
+    from src.services.workers import run_ingestion
     
-    logger.info(f"🔄 Background ingestion başladı: {source}")
+    logger.info("🔄 Background ingestion başladı: %s", source)
     
     try:
-        coordinator = IngestionCoordinator()
-        
-        if source == "tmdb":
-            await coordinator.run_tmdb_batch(limit=limit)
-        elif source == "imdb":
-            await coordinator.run_imdb_pipeline(limit=limit)
-        elif source == "script":
-            await coordinator.run_script_pipeline()
-        elif source == "all":
-            await coordinator.run_tmdb_batch(limit=limit)
-            await coordinator.run_imdb_pipeline(limit=limit)
-            await coordinator.run_script_pipeline()
-        
-        coordinator.close()
-        logger.info(f"✅ Background ingestion tamamlandı: {source}")
+        await run_ingestion(source, limit)
+        _invalidate_movie_cache()
+        _invalidate_response_caches()
+        logger.info("✅ Background ingestion tamamlandı: %s", source)
         
     except Exception as e:
-        logger.error(f"❌ Background ingestion hatası: {e}")
+        logger.error("❌ Background ingestion hatası: %s", e)
 
 
 # =============================================================================
-# MOVIE ENDPOINT (DEĞİŞMEDİ)
+# MOVIE ENDPOINT
 # =============================================================================
 
+# Film detayları sadece ingestion ile değişir; cevaplar TTL boyunca
+# önbellekten döner ve başarılı ingestion sonrası tamamen temizlenir.
+# Her kayıt (zaman, cevap, ETag) tutar; en fazla MOVIE_CACHE_MAX kayıt (LRU).
+MOVIE_CACHE_TTL = 3600.0
+MOVIE_CACHE_MAX = 1024
+_movie_cache: "OrderedDict[str, Tuple[float, MovieResponse, str]]" = OrderedDict()
+
+
+def _movie_etag(movie: MovieResponse) -> str:
+    """Cevap içeriğinden strong ETag üret."""
+    digest = hashlib.blake2b(movie.model_dump_json().encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match başlığı ETag ile eşleşiyor mu? (liste ve * desteklenir)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _cache_movie(movie_id: str, movie: MovieResponse, etag: str) -> None:
+    """Kaydı yaz; süresi dolanları ve kapasiteyi aşan en eski kayıtları çıkar."""
+    now = time.monotonic()
+    _movie_cache[movie_id] = (now, movie, etag)
+    _movie_cache.move_to_end(movie_id)
+    for key in [k for k, (stored_at, _, _) in _movie_cache.items() if now - stored_at >= MOVIE_CACHE_TTL]:
+        del _movie_cache[key]
+    while len(_movie_cache) > MOVIE_CACHE_MAX:
+        _movie_cache.popitem(last=False)
+
+
+def _invalidate_movie_cache() -> None:
+    """Ingestion sonrası film önbelleğini temizle."""
+    _movie_cache.clear()
+    logger.info("♻️ Film önbelleği temizlendi")
+
+
+def _invalidate_response_caches() -> None:
+    """Ingestion sonrası RAG cevap önbelleklerini temizle (yeni dokümanlar eski cevapları eskitir)."""
+    from src.services.rag.response_cache import clear_response_caches
+    
+    clear_response_caches()
+    logger.info("♻️ Cevap önbellekleri temizlendi")
+
+
 @router.get(
     "/movies/{movie_id}",
     response_model=MovieResponse,
@@ -171,16 +330,41 @@ async def _run_ingestion(source: str, limit: int):
 )
 async def get_movie(
     movie_id: str,
-    vector_store: VectorStoreService = Depends(get_vector_store)
+    request: Request,
+    response: Response,
+    vector_store: "VectorStoreService" = Depends(get_vector_store)
 ) -> MovieResponse:
     """
     Movie Detail Endpoint.
+    
+    ETag döner; istemci If-None-Match ile aynı ETag'i gönderirse
+    gövdesiz 304 Not Modified cevabı verilir.
     """
-    logger.info(f"🎬 Movie request: {movie_id}")
+    logger.info(_LOG_MOVIE, movie_id)
+    
+    cached = _movie_cache.get(movie_id)
+    if cached is not None and time.monotonic() - cached[0] < MOVIE_CACHE_TTL:
+        _movie_cache.move_to_end(movie_id)
+        _, movie, etag = cached
+    else:
+        # Chroma okuması senkron; event loop'u bloklamasın
+        movie = await asyncio.to_thread(_load_movie, movie_id, vector_store)
+        etag = _movie_etag(movie)
+        _cache_movie(movie_id, movie, etag)
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
     
+    response.headers["ETag"] = etag
+    return movie
+
+
+def _load_movie(movie_id: str, vector_store: "VectorStoreService") -> MovieResponse:
+    """Film metadata'sını vector store'dan oku."""
+    # Tek sorgu: metadata ve kaynak sayısı aynı sonuçtan çıkarılır
     results = vector_store.collection.get(
         where={"movie_id": movie_id},
-        limit=1
+        include=["metadatas"]
     )
     
     if not results or not results.get("metadatas"):
@@ -190,11 +374,7 @@ async def get_movie(
         )
     
     metadata = results["metadatas"][0]
-    
-    all_docs = vector_store.collection.get(
-        where={"movie_id": movie_id}
-    )
-    source_count = len(all_docs.get("ids", []))
+    source_count = len(results.get("ids", []))
     
     return MovieResponse(
         movie_id=movie_id,
@@ -209,9 +389,34 @@ async def get_movie(
 
 
 # =============================================================================
-# HEALTH ENDPOINT (DEĞİŞMEDİ)
+# HEALTH ENDPOINT
 # =============================================================================
 
+def _probe_vector_store(vector_store: "VectorStoreService") -> Tuple[str, str]:
+    """Vector store doküman sayısını kontrol et."""
+    try:
+        count = vector_store.count()
+        return "vector_store", f"ok ({count} documents)"
+    except Exception as e:
+        return "vector_store", f"error: {str(e)}"
+
+
+def _probe_embedding() -> Tuple[str, str]:
+    """Embedding servis durumu (TTL önbellekli)."""
+    return "embedding", _check_embedding()
+
+
+def _probe_llm() -> Tuple[str, str]:
+    """LLM API key yapılandırmasını kontrol et."""
+    try:
+        settings = get_settings()
+        if settings.GOOGLE_API_KEY:
+            return "llm", "ok (configured)"
+        return "llm", "error: API key missing"
+    except Exception as e:
+        return "llm", f"error: {str(e)}"
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -219,35 +424,18 @@ async def get_movie(
     description="API ve alt servislerin durumunu kontrol eder."
 )
 async def health_check(
-    vector_store: VectorStoreService = Depends(get_vector_store)
+    vector_store: "VectorStoreService" = Depends(get_vector_store)
 ) -> HealthResponse:
     """
     Health Check Endpoint.
     """
-    services = {}
-    
-    try:
-        count = vector_store.count()
-        services["vector_store"] = f"ok ({count} documents)"
-    except Exception as e:
-        services["vector_store"] = f"error: {str(e)}"
-    
-    try:
-        from src.domain.embeddings import EmbeddingService
-        emb = EmbeddingService()
-        services["embedding"] = "ok"
-    except Exception as e:
-        services["embedding"] = f"error: {str(e)}"
-    
-    try:
-        from src.infrastructure.config import get_settings
-        settings = get_settings()
-        if settings.GOOGLE_API_KEY:
-            services["llm"] = "ok (configured)"
-        else:
-            services["llm"] = "error: API key missing"
-    except Exception as e:
-        services["llm"] = f"error: {str(e)}"
+    # Bloklayan probe'lar (Chroma, embedding) paralel thread'lerde; toplam süre
+    # en yavaşı kadar olur. LLM probe'u sadece ayar okur, thread'e gerek yok.
+    results = await asyncio.gather(
+        asyncio.to_thread(_probe_vector_store, vector_store),
+        asyncio.to_thread(_probe_embedding)
+    )
+    services = dict([*results, _probe_llm()])
     
     all_ok = all("ok" in str(v) for v in services.values())
     status = "healthy" if all_ok else "degraded"
@@ -2,7 +2,7 @@
 API Schemas (Pydantic Models)
 Contract-First Design: API'nin input/output sözleşmeleri.
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from enum import Enum
 from datetime import datetime, timezone
@@ -31,6 +31,16 @@ class IngestSourceEnum(str, Enum):
 # NESTED MODELS (Response içinde kullanılan)
 # =============================================================================
 
+_EXAMPLE_SOURCE_DOCUMENT = {
+    "example": {
+        "content": "Joker, Gotham'ın ruhunu test etmek istiyor...",
+        "source": "script",
+        "movie_title": "The Dark Knight",
+        "distance": 0.234
+    }
+}
+
+
 class SourceDocument(BaseModel):
     """RAG cevabındaki tek bir kaynak doküman."""
     content: str = Field(..., description="Doküman içeriği")
@@ -38,15 +48,7 @@ class SourceDocument(BaseModel):
     movie_title: str = Field(..., description="Film adı")
     distance: float = Field(..., ge=0, le=2, description="Vektör uzaklığı (0=identical)")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "content": "Joker, Gotham'ın ruhunu test etmek istiyor...",
-                "source": "script",
-                "movie_title": "The Dark Knight",
-                "distance": 0.234
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_SOURCE_DOCUMENT)
 
 
 class TokenUsage(BaseModel):
@@ -60,6 +62,15 @@ class TokenUsage(BaseModel):
 # QUERY (RAG Sorgusu)
 # =============================================================================
 
+_EXAMPLE_QUERY_REQUEST = {
+    "example": {
+        "question": "The Dark Knight filminde Joker'in planı neydi?",
+        "source_filter": None,
+        "limit": 10
+    }
+}
+
+
 class QueryRequest(BaseModel):
     """RAG sorgusu için input."""
     question: str = Field(
@@ -79,14 +90,22 @@ class QueryRequest(BaseModel):
         description="Maksimum kaynak sayısı"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "The Dark Knight filminde Joker'in planı neydi?",
-                "source_filter": None,
-                "limit": 10
-            }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_QUERY_REQUEST)
+
+
+_EXAMPLE_QUERY_RESPONSE = {
+    "example": {
+        "answer": "Senaryoya göre, Joker'in planı...",
+        "sources": [],
+        "query": "The Dark Knight filminde Joker'in planı neydi?",
+        "source_count": 5,
+        "token_usage": {
+            "input_tokens": 1200,
+            "output_tokens": 350,
+            "total_tokens": 1550
         }
+    }
+}
 
 
 class QueryResponse(BaseModel):
@@ -103,26 +122,21 @@ class QueryResponse(BaseModel):
         description="Token kullanım detayları"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "answer": "Senaryoya göre, Joker'in planı...",
-                "sources": [],
-                "query": "The Dark Knight filminde Joker'in planı neydi?",
-                "source_count": 5,
-                "token_usage": {
-                    "input_tokens": 1200,
-                    "output_tokens": 350,
-                    "total_tokens": 1550
-                }
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_QUERY_RESPONSE)
 
 
 # =============================================================================
 # INGEST (Veri Yükleme)
 # =============================================================================
 
+_EXAMPLE_INGEST_REQUEST = {
+    "example": {
+        "source": "tmdb",
+        "limit": 5
+    }
+}
+
+
 class IngestRequest(BaseModel):
     """Ingestion tetikleme için input."""
     source: IngestSourceEnum = Field(
@@ -136,13 +150,17 @@ class IngestRequest(BaseModel):
         description="Kaç film/doküman işlenecek"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "source": "tmdb",
-                "limit": 5
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_INGEST_REQUEST)
+
+
+_EXAMPLE_INGEST_RESPONSE = {
+    "example": {
+        "status": "success",
+        "source": "tmdb",
+        "message": "5 film başarıyla işlendi",
+        "timestamp": "2025-01-15T10:30:00Z"
+    }
+}
 
 
 class IngestResponse(BaseModel):
@@ -155,21 +173,27 @@ class IngestResponse(BaseModel):
         description="İşlem zamanı"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "success",
-                "source": "tmdb",
-                "message": "5 film başarıyla işlendi",
-                "timestamp": "2025-01-15T10:30:00Z"
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_INGEST_RESPONSE)
 
 
 # =============================================================================
 # MOVIE (Film Detayları)
 # =============================================================================
 
+_EXAMPLE_MOVIE_RESPONSE = {
+    "example": {
+        "movie_id": "the-dark-knight-2008",
+        "title": "The Dark Knight",
+        "year": 2008,
+        "director": "Christopher Nolan",
+        "genres": ["Action", "Crime", "Drama"],
+        "rating": 9.0,
+        "synopsis": "When the menace known as the Joker...",
+        "source_count": 25
+    }
+}
+
+
 class MovieResponse(BaseModel):
     """Film detayları için output."""
     movie_id: str = Field(..., description="Film ID (slug)")
@@ -184,25 +208,26 @@ class MovieResponse(BaseModel):
         description="Bu filme ait kaynak sayısı"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "movie_id": "the-dark-knight-2008",
-                "title": "The Dark Knight",
-                "year": 2008,
-                "director": "Christopher Nolan",
-                "genres": ["Action", "Crime", "Drama"],
-                "rating": 9.0,
-                "synopsis": "When the menace known as the Joker...",
-                "source_count": 25
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_MOVIE_RESPONSE)
 
 
 # =============================================================================
 # HEALTH (Sistem Sağlığı)
 # =============================================================================
 
+_EXAMPLE_HEALTH_RESPONSE = {
+    "example": {
+        "status": "healthy",
+        "version": "1.0.0",
+        "services": {
+            "vector_store": "ok",
+            "embedding": "ok",
+            "llm": "ok"
+        }
+    }
+}
+
+
 class HealthResponse(BaseModel):
     """Sistem sağlık kontrolü için output."""
     status: str = Field(..., description="Genel durum")
@@ -212,35 +237,26 @@ class HealthResponse(BaseModel):
         description="Alt servis durumları"
     )
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "version": "1.0.0",
-                "services": {
-                    "vector_store": "ok",
-                    "embedding": "ok",
-                    "llm": "ok"
-                }
-            }
-        }
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_HEALTH_RESPONSE)
 
 
 # =============================================================================
 # ERROR (Hata Formatı)
 # =============================================================================
 
+_EXAMPLE_ERROR_RESPONSE = {
+    "example": {
+        "error": "ValidationError",
+        "message": "Geçersiz istek formatı",
+        "detail": "question alanı zorunludur"
+    }
+}
+
+
 class ErrorResponse(BaseModel):
     """Standart hata formatı."""
     error: str = Field(..., description="Hata tipi")
     message: str = Field(..., description="Hata mesajı")
     detail: Optional[str] = Field(None, description="Ek detay")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": "ValidationError",
-                "message": "Geçersiz istek formatı",
-                "detail": "question alanı zorunludur"
-            }
-        }
\ No newline at end of file
+    model_config = ConfigDict(json_schema_extra=_EXAMPLE_ERROR_RESPONSE)
\ No newline at end of file
@@ -1,14 +1,65 @@
 import os
-import time
+import re
+import asyncio
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from functools import lru_cache
+import numpy as np
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from dotenv import load_dotenv
 
+from src.infrastructure.embedding_cache import EmbeddingCache, roundtrip
+from src.infrastructure.rate_limiter import TokenBucket
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+_QUERY_NOISE_RE = re.compile(r"[^\w\s]")
+
+
+def _to_vector(embedding) -> np.ndarray:
+    """
+    API'den dönen listeyi tek boyutlu float32 array'e çevir.
+    768 boyut için ~3KB (Python float listesinde ~22KB).
+    """
+    return np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Query cache anahtarı: büyük/küçük harf, noktalama ve boşluk farkları
+    aynı anahtara düşer ("Joker'in planı?" == "joker in planı").
+    """
+    return " ".join(_QUERY_NOISE_RE.sub(" ", text.casefold()).split())
+
+
+# Tekrar denemeye değer geçici API hataları (kota / servis yok)
+_TRANSIENT_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+)
+
+# İstek boyutu hataları (payload / istek başı token limiti aşıldı): batch'i
+# bölmek işe yarar. Kota (RPM) hatalarında bölmek sadece daha çok istek
+# demektir, onlar _TRANSIENT_ERRORS ile beklenerek tekrar denenir.
+_REQUEST_SIZE_ERRORS = (google_exceptions.InvalidArgument,)
+
+
+def _log_retry(retry_state) -> None:
+    """tenacity before_sleep: tekrar denemeden önce uyarı logla."""
+    batch_num = retry_state.args[2] if len(retry_state.args) > 2 else "?"
+    logger.warning(
+        f"⚠️ Batch {batch_num} hata verdi ({retry_state.outcome.exception()}), "
+        f"{retry_state.next_action.sleep:.0f}s sonra tekrar "
+        f"(deneme {retry_state.attempt_number})"
+    )
+
+
 class EmbeddingService:
     """
     Google Gemini Embedding Service.
@@ -16,12 +67,27 @@ class EmbeddingService:
     """
     
     DEFAULT_MODEL = "models/text-embedding-004"
+    DEFAULT_DIMENSION = 768  # text-embedding-004 tam boyutu
     MAX_BATCH_SIZE = 100  # Gemini API limiti
+    QUERY_CACHE_SIZE = 1000  # Süreç içi query embedding LRU boyutu
+    REQUESTS_PER_MINUTE = 60  # Gemini free tier
+    MAX_RETRIES = 3  # Hatalı batch için tekrar deneme sayısı
+    MAX_WORKERS = 8  # Eşzamanlı batch isteği için thread sayısı
     
-    def __init__(self, model_name: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        output_dimensionality: Optional[int] = None
+    ):
         """
         Args:
             model_name: Kullanılacak embedding modeli (default: text-embedding-004)
+            cache_path: Doküman embedding'leri için SQLite cache dosyası
+                (None ise kalıcı cache kapalı)
+            output_dimensionality: Kısaltılmış vektör boyutu (örn. 384);
+                None ise modelin tam boyutu. Mevcut bir koleksiyon aynı
+                boyutla yazılmış olmalı.
         
         Raises:
             ValueError: GOOGLE_API_KEY bulunamazsa
@@ -33,8 +99,29 @@ class EmbeddingService:
                 ".env dosyasında GOOGLE_API_KEY=your_key_here ekleyin"
             )
         
-        genai.configure(api_key=api_key)
+        # gRPC tek HTTP/2 bağlantısını tüm çağrılarda paylaşır (TLS bir kez)
+        genai.configure(api_key=api_key, transport="grpc")
         self.model_name = model_name or self.DEFAULT_MODEL
+        self.output_dimensionality = output_dimensionality
+        # Yalnızca verildiğinde API'ye gönderilir (tam boyutta istek değişmez)
+        self._dimension_kwargs = (
+            {"output_dimensionality": output_dimensionality}
+            if output_dimensionality else {}
+        )
+        # Farklı boyutlar cache'te birbirine karışmasın
+        self._cache_model = (
+            self.model_name if output_dimensionality is None
+            else f"{self.model_name}@{output_dimensionality}"
+        )
+        self._cache = EmbeddingCache(cache_path) if cache_path else None
+        self._bucket = TokenBucket(rpm=self.REQUESTS_PER_MINUTE)
+        # normalize_query anahtarlı LRU; yalnızca başarılı embedding'ler girer
+        self._query_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        # Batch'ler varsayılan to_thread havuzunu doldurmasın diye ayrı havuz
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS, thread_name_prefix="embed"
+        )
         logger.info(f"✨ Embedding Service başlatıldı (Model: {self.model_name})")
     
     def embed_query(self, text: str) -> Optional[List[float]]:
@@ -51,100 +138,204 @@ class EmbeddingService:
             logger.warning("⚠️ Boş text embed edilmeye çalışıldı")
             return None
         
+        key = normalize_query(text)
+        with self._query_lock:
+            embedding = self._query_cache.get(key)
+            if embedding is not None:
+                self._query_cache.move_to_end(key)
+                return list(embedding)
+        
         try:
-            result = genai.embed_content(
-                model=self.model_name,
-                content=text,
-                task_type="retrieval_query"
-            )
-            
-            embedding = result.get('embedding')
-            if embedding:
-                logger.debug(f"✅ Query embedding: {len(embedding)} boyut")
-                return embedding
-            else:
-                logger.error("❌ API'den embedding dönmedi")
-                return None
-                
+            embedding = self._fetch_query_embedding(text)
+        except LookupError:
+            logger.error("❌ API'den embedding dönmedi")
+            return None
         except Exception as e:
             logger.error(f"❌ Embedding hatası (Query): {str(e)}")
             return None
+        
+        with self._query_lock:
+            self._query_cache[key] = embedding
+            if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        logger.debug(f"✅ Query embedding: {len(embedding)} boyut")
+        return list(embedding)
+    
+    def ping(self) -> None:
+        """
+        API erişimini doğrula (health check): query cache'ine uğramadan küçük
+        bir embed isteği atar. Anahtar geçersiz/iptal edilmişse hata yükselir.
+        """
+        self._fetch_query_embedding("ping")
+    
+    def _fetch_query_embedding(self, text: str) -> tuple:
+        """API'den query embedding'i al (cache miss durumunda)."""
+        self._bucket.acquire()
+        result = genai.embed_content(
+            model=self.model_name,
+            content=text,
+            task_type="retrieval_query",
+            **self._dimension_kwargs
+        )
+        
+        embedding = result.get('embedding')
+        if not embedding:
+            raise LookupError("empty embedding")
+        return tuple(embedding)
     
     def embed_documents(
         self, 
         texts: List[str], 
-        batch_size: int = 20
-    ) -> List[Optional[List[float]]]:
+        batch_size: Optional[int] = None
+    ) -> List[Optional[np.ndarray]]:
         """
         Doküman listesini batch'ler halinde vektöre çevirir.
         
         Args:
             texts: Embed edilecek text listesi
-            batch_size: Her batch'teki text sayısı (max: 100)
+            batch_size: Her batch'teki text sayısı (None: MAX_BATCH_SIZE,
+                yani 100'e kadar metin tek çağrıda)
         
         Returns:
-            Her text için embedding vektörü (başarısızsa None)
+            Her text için float32 embedding vektörü (başarısızsa None)
         """
         if not texts:
             return []
         
+        unique = list(dict.fromkeys(texts))
+        if len(unique) < len(texts):
+            # Tekrarlanan metinler API'ye bir kez gider, sonuç her index'e dağıtılır
+            by_text = dict(zip(unique, self.embed_documents(unique, batch_size)))
+            return [by_text[t] for t in texts]
+        
+        keys, hits, miss_idx = self._lookup_cache(texts)
+        miss_embeddings = (
+            self._embed_uncached([texts[i] for i in miss_idx], batch_size)
+            if miss_idx else []
+        )
+        return self._merge_cached(texts, keys, hits, miss_idx, miss_embeddings)
+    
+    async def embed_documents_async(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        workers: int = 6
+    ) -> List[Optional[np.ndarray]]:
+        """
+        embed_documents'ın eşzamanlı versiyonu.
+        
+        Batch'ler thread'lerde paralel gönderilir (en fazla `workers` adet);
+        RPM bütçesini ortak token bucket korur. Bir batch'in hatası
+        diğerlerini durdurmaz.
+        
+        Args:
+            texts: Embed edilecek text listesi
+            batch_size: Her batch'teki text sayısı (None: MAX_BATCH_SIZE)
+            workers: Aynı anda uçuştaki maksimum batch sayısı
+        
+        Returns:
+            Her text için embedding vektörü (başarısızsa None), giriş sırasıyla
+        """
+        if not texts:
+            return []
+        
+        unique = list(dict.fromkeys(texts))
+        if len(unique) < len(texts):
+            embeddings = await self.embed_documents_async(unique, batch_size, workers)
+            by_text = dict(zip(unique, embeddings))
+            return [by_text[t] for t in texts]
+        
+        keys, hits, miss_idx = self._lookup_cache(texts)
+        miss_embeddings: List[Optional[np.ndarray]] = []
+        
+        if miss_idx:
+            miss_texts = [texts[i] for i in miss_idx]
+            batch_size = self._resolve_batch_size(batch_size)
+            starts = range(0, len(miss_texts), batch_size)
+            total_batches = len(starts)
+            semaphore = asyncio.Semaphore(workers)
+            loop = asyncio.get_running_loop()
+            
+            async def run(start: int) -> List[Optional[np.ndarray]]:
+                batch = miss_texts[start : start + batch_size]
+                batch_num = (start // batch_size) + 1
+                async with semaphore:
+                    return await loop.run_in_executor(
+                        self._executor, self._embed_batch, batch, batch_num, total_batches
+                    )
+            
+            results = await asyncio.gather(*(run(s) for s in starts))
+            # Sonuçlar batch sırasıyla döner; düzleştirmek sırayı korur
+            for batch_embeddings in results:
+                miss_embeddings.extend(batch_embeddings)
+        
+        return self._merge_cached(texts, keys, hits, miss_idx, miss_embeddings)
+    
+    def _lookup_cache(self, texts: List[str]):
+        """Cache anahtarlarını, bulunanları ve eksik index'leri döndür."""
+        if self._cache is None:
+            return None, {}, list(range(len(texts)))
+        
+        # Cache'te olanları ayır, sadece eksikleri API'ye gönder
+        keys = [EmbeddingCache.make_key(self._cache_model, t) for t in texts]
+        hits = self._cache.get_many(keys)
+        miss_idx = [i for i, k in enumerate(keys) if k not in hits]
+        
+        if hits:
+            logger.info(f"🗃️ Embedding cache: {len(texts) - len(miss_idx)}/{len(texts)} hit")
+        
+        return keys, hits, miss_idx
+    
+    def _merge_cached(
+        self,
+        texts: List[str],
+        keys: Optional[List[bytes]],
+        hits: Dict[bytes, np.ndarray],
+        miss_idx: List[int],
+        miss_embeddings: List[Optional[np.ndarray]]
+    ) -> List[Optional[np.ndarray]]:
+        """
+        Yeni embedding'leri cache'e yaz ve sonuçları giriş sırasına diz.
+        
+        Yeni embedding'ler cache'ten okunacakları int8 hassasiyetiyle döner;
+        aynı metin hit de olsa miss de olsa aynı vektörü alır (re-ingest
+        upsert'ü Chroma'daki vektörü değiştirmez).
+        """
+        if self._cache is None:
+            return miss_embeddings
+        
+        fresh: Dict[bytes, np.ndarray] = {}
+        for i, emb in zip(miss_idx, miss_embeddings):
+            if emb is not None:
+                fresh[keys[i]] = roundtrip(emb)
+        self._cache.put_many(fresh)
+        
+        return [hits[k] if k in hits else fresh.get(k) for k in keys]
+    
+    def _resolve_batch_size(self, batch_size: Optional[int]) -> int:
+        """
+        Verilmezse API limitini kullan: çağrı başı sabit maliyet (TLS, JSON,
+        kuyruk) 20'lik yerine 100'lük batch'lerle 5 kat daha az ödenir.
+        """
+        return min(batch_size or self.MAX_BATCH_SIZE, self.MAX_BATCH_SIZE)
+    
+    def _embed_uncached(
+        self,
+        texts: List[str],
+        batch_size: Optional[int]
+    ) -> List[Optional[np.ndarray]]:
+        """Metinleri cache'e bakmadan batch'ler halinde sırayla API'ye gönder."""
         # Batch size kontrolü
-        batch_size = min(batch_size, self.MAX_BATCH_SIZE)
+        batch_size = self._resolve_batch_size(batch_size)
         
-        all_embeddings: List[Optional[List[float]]] = []
+        all_embeddings: List[Optional[np.ndarray]] = []
         total_batches = (len(texts) + batch_size - 1) // batch_size
         
         for i in range(0, len(texts), batch_size):
             batch = texts[i : i + batch_size]
             batch_num = (i // batch_size) + 1
-            
-            try:
-                result = genai.embed_content(
-                    model=self.model_name,
-                    content=batch,
-                    task_type="retrieval_document"
-                )
-                
-                # API response parsing
-                embeddings = result.get('embedding', [])
-                
-                # Tek text için API List[float] döner, çok text için List[List[float]]
-                if len(batch) == 1:
-                    # Tek elemanlı batch
-                    if isinstance(embeddings, list) and isinstance(embeddings[0], float):
-                        all_embeddings.append(embeddings)
-                    else:
-                        # API yapısı değişmişse
-                        all_embeddings.append(embeddings if embeddings else None)
-                else:
-                    # Çok elemanlı batch
-                    if isinstance(embeddings, list) and len(embeddings) == len(batch):
-                        for emb in embeddings:
-                            all_embeddings.append(emb)  # ← TEK TEK EKLE
-                        
-                    else:
-                        logger.error(
-                            f"❌ Batch {batch_num}: Beklenen {len(batch)} embedding, "
-                            f"alınan {len(embeddings) if embeddings else 0}"
-                        )
-                        all_embeddings.extend([None] * len(batch))
-                
-                logger.info(
-                    f"✅ Batch {batch_num}/{total_batches} işlendi "
-                    f"({len(batch)} doküman)"
-                )
-                
-                # Rate limiting (Gemini free tier: 60 req/min)
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(
-                    f"❌ Batch {batch_num} embedding hatası: {str(e)}\n"
-                    f"Batch içeriği: {[t[:50] + '...' for t in batch]}"
-                )
-                # Hata durumunda None ekle
-                all_embeddings.extend([None] * len(batch))
-                time.sleep(2)  # Hata sonrası daha uzun bekle
+            all_embeddings.extend(self._embed_batch(batch, batch_num, total_batches))
         
         # Son kontrol
         if len(all_embeddings) != len(texts):
@@ -155,14 +346,100 @@ class EmbeddingService:
         
         return all_embeddings
     
+    def _embed_batch(
+        self,
+        batch: List[str],
+        batch_num: int,
+        total_batches: int
+    ) -> List[Optional[np.ndarray]]:
+        """Tek batch'i embed et; her zaman len(batch) elemanlı liste döner."""
+        try:
+            result = self._request_batch(batch, batch_num)
+            
+            # API response parsing
+            embeddings = result.get('embedding', [])
+            
+            # Tek text için API List[float] döner, çok text için List[List[float]]
+            if len(batch) == 1:
+                # Tek elemanlı batch
+                if isinstance(embeddings, list) and isinstance(embeddings[0], float):
+                    batch_embeddings = [_to_vector(embeddings)]
+                else:
+                    # API yapısı değişmişse
+                    batch_embeddings = [_to_vector(embeddings) if embeddings else None]
+            else:
+                # Çok elemanlı batch
+                if isinstance(embeddings, list) and len(embeddings) == len(batch):
+                    batch_embeddings = [_to_vector(emb) for emb in embeddings]
+                else:
+                    logger.error(
+                        f"❌ Batch {batch_num}: Beklenen {len(batch)} embedding, "
+                        f"alınan {len(embeddings) if embeddings else 0}"
+                    )
+                    batch_embeddings = [None] * len(batch)
+            
+            logger.info(
+                f"✅ Batch {batch_num}/{total_batches} işlendi "
+                f"({len(batch)} doküman)"
+            )
+            return batch_embeddings
+            
+        except Exception as e:
+            # İstek boyutu hatası: batch'i yarıya bölüp her yarıyı ayrı dene
+            if isinstance(e, _REQUEST_SIZE_ERRORS) and len(batch) > 1:
+                mid = len(batch) // 2
+                logger.warning(
+                    f"⚠️ Batch {batch_num} istek boyutu hatası, yarıya bölünüyor "
+                    f"({len(batch)} → {mid} + {len(batch) - mid})"
+                )
+                return (
+                    self._embed_batch(batch[:mid], batch_num, total_batches)
+                    + self._embed_batch(batch[mid:], batch_num, total_batches)
+                )
+            
+            logger.error(
+                f"❌ Batch {batch_num} embedding hatası: {str(e)}\n"
+                f"Batch içeriği: {[t[:50] + '...' for t in batch]}"
+            )
+            # Tüm denemeler başarısız: None ekle
+            return [None] * len(batch)
+    
+    @retry(
+        stop=stop_after_attempt(MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=1, max=30),
+        retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+        before_sleep=_log_retry,
+        reraise=True,
+    )
+    def _request_batch(self, batch: List[str], batch_num: int) -> dict:
+        """
+        Tek batch'i API'ye gönder.
+        
+        Her deneme öncesi RPM bütçesinden token alınır. Geçici hatalar
+        (429/503) üstel bekleme ile MAX_RETRIES kez tekrar denenir;
+        diğer hatalar doğrudan yükselir.
+        """
+        self._bucket.acquire()
+        return genai.embed_content(
+            model=self.model_name,
+            content=batch,
+            task_type="retrieval_document",
+            **self._dimension_kwargs
+        )
+    
+    def close(self) -> None:
+        """Thread havuzunu ve kalıcı cache bağlantısını kapat."""
+        self._executor.shutdown(wait=False)
+        if self._cache is not None:
+            self._cache.close()
+    
     def get_embedding_dimension(self) -> int:
         """
         Embedding boyutunu döndürür.
         
         Returns:
-            768 (text-embedding-004 için)
+            output_dimensionality verildiyse o, yoksa 768 (text-embedding-004)
         """
-        # text-embedding-004 için 768 boyut
-        return 768
+        return self.output_dimensionality or self.DEFAULT_DIMENSION
 
 
@@ -3,7 +3,7 @@ Domain Layer: Core Business Models
 Unified models for 3 data sources: TMDb API, IMDb Scraping, PDF Scripts
 """
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, List, Literal, Dict, Any
+from typing import Optional, List, Literal, Dict, Any, NamedTuple
 from datetime import datetime, timezone
 from enum import Enum
 
@@ -15,6 +15,10 @@ def get_utc_now() -> datetime:
     """Return current UTC time (timezone-aware)."""
     return datetime.now(timezone.utc)
 
+def _rating_part(rating: Optional[float]) -> str:
+    """İçerik metni için ' (Rating: x/10)' eki (puan yoksa boş)."""
+    return f" (Rating: {rating}/10)" if rating else ""
+
 # ============================================================================
 # ENUMS
 # ============================================================================
@@ -25,6 +29,11 @@ class DataSource(str, Enum):
     IMDB = "imdb"
     SCRIPT = "script"
 
+# Factory'lerde enum attribute lookup'ı yapmamak için düz string değerler
+_SRC_TMDB = DataSource.TMDB.value
+_SRC_IMDB = DataSource.IMDB.value
+_SRC_SCRIPT = DataSource.SCRIPT.value
+
 # ============================================================================
 # SENTIMENT
 # ============================================================================
@@ -120,6 +129,13 @@ class ScriptScene(BaseModel):
 # UNIFIED DOCUMENT (VECTOR STORE)
 # ============================================================================
 
+class ChromaRecord(NamedTuple):
+    """to_chroma_format çıktısı; tuple gibi açılır, alan adıyla da okunur."""
+    doc_id: str
+    content: str
+    metadata: Dict[str, Any]
+    embedding: Optional[Any]
+
 class CinemaDocument(BaseModel):
     """
     Unified document model for ChromaDB.
@@ -132,18 +148,23 @@ class CinemaDocument(BaseModel):
     source: DataSource
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
-    # Vektör alanı
-    embedding: Optional[List[float]] = Field(None, description="Vector representation")
+    # Vektör alanı (EmbeddingService float32 numpy array üretir)
+    embedding: Optional[Any] = Field(None, description="Vector representation (np.float32 array)")
     
     sentiment: Optional[SentimentResult] = None
     created_at: datetime = Field(default_factory=get_utc_now)
     
-    def to_chroma_format(self) -> tuple[str, str, dict, Optional[List[float]]]:
+    def to_chroma_format(self) -> ChromaRecord:
         """Returns: (doc_id, content, metadata, embedding)"""
+        # Factory'ler source'u düz string verir; enum yalnızca elle kurulan
+        # modellerde kalır (DataSource bir str alt sınıfı, tip ile ayırt edilir)
+        source = self.source
+        if type(source) is not str:
+            source = source.value
         meta = {
             "movie_id": self.movie.movie_id,
             "movie_title": self.movie.title,
-            "source": str(self.source),
+            "source": source,
             "created_at": self.created_at.isoformat(),
         }
         
@@ -157,77 +178,96 @@ class CinemaDocument(BaseModel):
             if value is not None:
                 meta[key] = value
         
-        return self.doc_id, self.content, meta, self.embedding
+        return ChromaRecord(self.doc_id, self.content, meta, self.embedding)
 
     # --- FACTORY METHODS (TERCÜMANLAR) ---
+    # Girdiler (Movie, Review, Scene) zaten doğrulanmış modeller; model_construct
+    # ingestion sırasında her doküman için validasyonu tekrar çalıştırmaz.
+    # use_enum_values burada uygulanmadığı için source string olarak verilir.
+    # Çoğul versiyonlar bir filmin tüm kayıtlarını tek seferde çevirir;
+    # film başlığı batch başına bir kez hesaplanır.
 
     @classmethod
     def from_tmdb_review(cls, movie: Movie, review: TMDbReview) -> "CinemaDocument":
         """TMDb yorumunu CinemaDocument formatına çevirir."""
-        content = f"Title: {movie.title} ({movie.year})\n"
-        content += f"User Review by {review.author}"
-        if review.rating:
-            content += f" (Rating: {review.rating}/10)"
-        content += f"\nReview: {review.text}"
+        return cls.from_tmdb_reviews(movie, [review])[0]
+
+    @classmethod
+    def from_tmdb_reviews(cls, movie: Movie, reviews: List[TMDbReview]) -> List["CinemaDocument"]:
+        """Bir filmin TMDb yorumlarını toplu çevirir."""
+        header = f"Title: {movie.title} ({movie.year})\n"
         
-        return cls(
-            doc_id=f"tmdb-{review.review_id}",
-            movie=movie,
-            content=content,
-            source=DataSource.TMDB,
-            metadata={
-                "review_id": review.review_id,
-                "author": review.author,
-                "rating": review.rating,
-                "date": review.date.isoformat() if review.date else None
-            },
-            sentiment=review.sentiment
-        )
+        return [
+            cls.model_construct(
+                doc_id=f"tmdb-{r.review_id}",
+                movie=movie,
+                content=f"{header}User Review by {r.author}{_rating_part(r.rating)}\nReview: {r.text}",
+                source=_SRC_TMDB,
+                metadata={
+                    "review_id": r.review_id,
+                    "author": r.author,
+                    "rating": r.rating,
+                    "date": r.date.isoformat() if r.date else None
+                },
+                sentiment=r.sentiment
+            )
+            for r in reviews
+        ]
 
     @classmethod
     def from_imdb_review(cls, movie: Movie, review: IMDbReview) -> "CinemaDocument":
         """IMDb yorumunu CinemaDocument formatına çevirir."""
-        content = f"Title: {movie.title} ({movie.year})\n"
-        content += f"IMDb Review by {review.author}"
-        if review.rating:
-            content += f" (Rating: {review.rating}/10)"
-        content += f"\nReview: {review.text}"
+        return cls.from_imdb_reviews(movie, [review])[0]
+
+    @classmethod
+    def from_imdb_reviews(cls, movie: Movie, reviews: List[IMDbReview]) -> List["CinemaDocument"]:
+        """Bir filmin IMDb yorumlarını toplu çevirir."""
+        header = f"Title: {movie.title} ({movie.year})\n"
         
-        return cls(
-            doc_id=f"imdb-{review.review_id}",
-            movie=movie,
-            content=content,
-            source=DataSource.IMDB,
-            metadata={
-                "review_id": review.review_id,
-                "author": review.author,
-                "rating": review.rating,
-                "helpful_count": review.helpful_count,
-                "date": review.date.isoformat() if review.date else None
-            },
-            sentiment=review.sentiment
-        )
+        return [
+            cls.model_construct(
+                doc_id=f"imdb-{r.review_id}",
+                movie=movie,
+                content=f"{header}IMDb Review by {r.author}{_rating_part(r.rating)}\nReview: {r.text}",
+                source=_SRC_IMDB,
+                metadata={
+                    "review_id": r.review_id,
+                    "author": r.author,
+                    "rating": r.rating,
+                    "helpful_count": r.helpful_count,
+                    "date": r.date.isoformat() if r.date else None
+                },
+                sentiment=r.sentiment
+            )
+            for r in reviews
+        ]
 
     @classmethod
     def from_script_scene(cls, movie: Movie, scene: ScriptScene) -> "CinemaDocument":
         """Senaryo sahnesini CinemaDocument formatına çevirir."""
-        content = f"Movie: {movie.title} ({movie.year})\n"
-        content += f"Scene {scene.scene_number}: {scene.heading}\n"
-        content += f"Dialogue:\n{scene.dialogue}"
+        return cls.from_script_scenes(movie, [scene])[0]
+
+    @classmethod
+    def from_script_scenes(cls, movie: Movie, scenes: List[ScriptScene]) -> List["CinemaDocument"]:
+        """Bir filmin senaryo sahnelerini toplu çevirir."""
+        header = f"Movie: {movie.title} ({movie.year})\n"
         
-        return cls(
-            doc_id=f"script-{scene.scene_id}",
-            movie=movie,
-            content=content,
-            source=DataSource.SCRIPT,
-            metadata={
-                "scene_id": scene.scene_id,
-                "scene_number": scene.scene_number,
-                "heading": scene.heading,
-                "page_number": scene.page_number
-            },
-            sentiment=None  # Senaryoda duygu analizi yapmıyoruz (şimdilik)
-        )
+        return [
+            cls.model_construct(
+                doc_id=f"script-{s.scene_id}",
+                movie=movie,
+                content=f"{header}Scene {s.scene_number}: {s.heading}\nDialogue:\n{s.dialogue}",
+                source=_SRC_SCRIPT,
+                metadata={
+                    "scene_id": s.scene_id,
+                    "scene_number": s.scene_number,
+                    "heading": s.heading,
+                    "page_number": s.page_number
+                },
+                sentiment=None  # Senaryoda duygu analizi yapmıyoruz (şimdilik)
+            )
+            for s in scenes
+        ]
 
     class Config:
         use_enum_values = True
\ No newline at end of file
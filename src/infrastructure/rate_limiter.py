@@ -0,0 +1,104 @@
+"""
+Rate Limiter
+- TokenBucket: Senkron API istemcileri için token-bucket hız sınırlayıcı.
+- AdaptiveRateLimiter: Async istemciler için, sunucu cevabına göre hızını ayarlayan limiter.
+"""
+import threading
+import time
+
+from aiolimiter import AsyncLimiter
+
+
+class TokenBucket:
+    """
+    Dakikalık istek bütçesi (RPM) ile token-bucket.
+
+    Bütçe doluyken acquire() beklemeden döner; sadece token bittiğinde
+    bir sonraki token'ın dolmasına kadar uyur. Thread-safe.
+    """
+
+    def __init__(self, rpm: int = 60):
+        if rpm <= 0:
+            raise ValueError("rpm pozitif olmalı")
+        self.capacity = float(rpm)
+        self.rate = rpm / 60.0  # saniyede dolan token
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        """Bir token al; bütçe boşsa gerektiği kadar bekle."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter:
+    """
+    AsyncLimiter üzerinde AIMD (additive increase / multiplicative decrease) kontrolü.
+
+    Sunucu 429/5xx döndüğünde hız yarıya iner (min_rate altına düşmez);
+    art arda `increase_after` başarılı istekten sonra 1 artar (max_rate'e kadar).
+    Hız değişince alttaki AsyncLimiter yeniden kurulur; o an bekleyenler
+    eski limiter'dan çıkar.
+
+    Kullanım:
+        async with limiter:
+            ...
+        limiter.record_success() / limiter.record_throttle()
+    """
+
+    def __init__(
+        self,
+        max_rate: int = 10,
+        min_rate: int = 2,
+        time_period: float = 1.0,
+        increase_after: int = 20
+    ):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("0 < min_rate <= max_rate olmalı")
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.time_period = time_period
+        self.increase_after = increase_after
+        self._successes = 0
+        self._set_rate(max_rate)
+
+    @property
+    def rate(self) -> int:
+        """Şu anki izin verilen istek sayısı (time_period başına)."""
+        return self._rate
+
+    def _set_rate(self, rate: int) -> None:
+        self._rate = rate
+        self._limiter = AsyncLimiter(max_rate=rate, time_period=self.time_period)
+
+    async def __aenter__(self) -> None:
+        await self._limiter.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    def record_success(self) -> None:
+        """Başarılı istek; yeterince birikirse hızı bir kademe artır."""
+        self._successes += 1
+        if self._successes >= self.increase_after and self._rate < self.max_rate:
+            self._successes = 0
+            self._set_rate(self._rate + 1)
+
+    def record_throttle(self) -> None:
+        """Sunucu yavaşla dedi (429/5xx); hızı yarıya indir."""
+        self._successes = 0
+        rate = max(self.min_rate, self._rate // 2)
+        if rate < self._rate:
+            self._set_rate(rate)
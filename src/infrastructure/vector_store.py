@@ -1,43 +1,112 @@
+import asyncio
+import hashlib
 import logging
+import os
 import chromadb
-from typing import List, Dict, Any, Optional
-import uuid
+import numpy as np
+import orjson
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Her satırı birim uzunluğa getir (sıfır vektörler sıfır kalır)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / (norms + 1e-12)
+
+
 class VectorStoreService:
     """
     ChromaDB Vector Store Wrapper.
-    768-boyutlu vektörleri yerel diskte saklar.
+    768-boyutlu vektörleri yerel diskte saklar; host verilirse (veya
+    CHROMA_DB_TYPE=http ise) ayrı bir Chroma sunucusuna bağlanır ve
+    yazmalar sunucu process'inde yapılır.
+    
+    Vektörler yazarken ve sorgularken L2-normalize edilir; bu sayede
+    inner product (ip) uzayı cosine ile aynı sıralamayı verir ve
+    distance (1 - benzerlik) anlamı korunur. Koleksiyona bu servis dışından
+    yazılan embedding'ler de birim uzunlukta olmalıdır.
+    
+    get_or_create_collection mevcut koleksiyonun uzayını değiştirmez: eski
+    cosine koleksiyonlar normalize vektörlerle aynı distance'ı verir, başka
+    uzaydaki (ör. varsayılan l2) koleksiyonlar için uyarı loglanır ve
+    reset_collection() + yeniden ingestion gerekir.
     """
     
+    HNSW_SPACE = "ip"
+    # Birim vektörlerde distance = 1 - cos benzerlik veren uzaylar
+    COMPATIBLE_SPACES = ("ip", "cosine")
+    
     EMBEDDING_DIM = 768
+    SEARCH_BATCH_WAIT = 0.01   # asearch: eşzamanlı sorguları toplama penceresi (s)
+    SEARCH_BATCH_MAX = 32      # asearch: pencere dolmadan flush eşiği
     
-    def __init__(self, collection_name: str = "cinemind_store", persist_path: str = "data/vector_store"):
+    def __init__(
+        self,
+        collection_name: str = "cinemind_store",
+        persist_path: str = "data/vector_store",
+        host: Optional[str] = None,
+        port: Optional[int] = None
+    ):
         self.persist_path = persist_path
         self.collection_name = collection_name
+        # Sunucu adresi docker-compose'un verdiği değişkenlerden de gelebilir
+        if host is None and os.getenv("CHROMA_DB_TYPE") == "http":
+            host = os.getenv("CHROMA_DB_HOST")
+        self.host = host
+        self.port = port or int(os.getenv("CHROMA_DB_PORT", "8000"))
+        # (limit, filter) → (filter, [(vektör, future), ...])
+        self._pending_searches: Dict[Tuple[int, Optional[str]], Tuple[Optional[Dict], list]] = {}
+        self._flush_tasks: set = set()
         
         try:
-            self.client = chromadb.PersistentClient(path=persist_path)
+            if self.host:
+                self.client = chromadb.HttpClient(host=self.host, port=self.port)
+                location = f"http://{self.host}:{self.port}"
+            else:
+                self.client = chromadb.PersistentClient(path=persist_path)
+                location = persist_path
             self.collection = self.client.get_or_create_collection(
                 name=collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": self.HNSW_SPACE}
             )
-            logger.info(f"💾 Vector Store: {persist_path}/{collection_name}")
+            self._check_space()
+            logger.info(f"💾 Vector Store: {location}/{collection_name}")
             
         except Exception as e:
             logger.error(f"❌ ChromaDB init error: {e}")
             raise
 
+    def _check_space(self) -> None:
+        """Mevcut koleksiyonun distance uzayı 1 - benzerlik varsayımına uyuyor mu?"""
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        if space not in self.COMPATIBLE_SPACES:
+            logger.warning(
+                f"⚠️ Koleksiyon '{self.collection_name}' '{space}' uzayında; distance "
+                f"eşikleri '{self.HNSW_SPACE}' varsayıyor. reset_collection() ile "
+                f"yeniden oluşturup tekrar ingest edin."
+            )
+
+    @staticmethod
+    def content_id(text: str) -> str:
+        """İçerikten türetilen sabit ID: aynı metin her ingestion'da aynı ID'yi alır."""
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
     def add_documents(
         self, 
         texts: List[str], 
-        embeddings: List[List[float]], 
+        embeddings: Union[np.ndarray, Sequence[Sequence[float]]], 
         metadatas: List[Dict[str, Any]],
         ids: Optional[List[str]] = None
     ):
-        """Dokümanları vector store'a ekler."""
-        if not texts or not embeddings:
+        """
+        Dokümanları vector store'a ekler (upsert).
+        
+        ID verilmezse içerik hash'i kullanılır; aynı içeriği tekrar eklemek
+        kopya oluşturmaz, mevcut kaydı günceller.
+        """
+        if not texts or len(embeddings) == 0:
             logger.warning("⚠️ Boş veri, ekleme atlandı")
             return
 
@@ -45,44 +114,48 @@ class VectorStoreService:
         if len(texts) != len(embeddings) or len(texts) != len(metadatas):
             raise ValueError("texts, embeddings ve metadatas uzunlukları eşit olmalı")
 
-        # ========== KRİTİK DÜZELTME ==========
-        # ChromaDB Rust binding için embedding'leri garanti pure Python list yap
-        clean_embeddings = []
-        for emb in embeddings:
-            if emb is None:
-                continue
-            if hasattr(emb, 'tolist'):  # NumPy array
-                clean_embeddings.append(emb.tolist())
-            elif isinstance(emb, list):
-                # İç içe liste kontrolü - ilk eleman da liste mi?
-                if len(emb) > 0 and isinstance(emb[0], list):
-                    # 3 katmanlı yapı: [[0.1, 0.2, ...]] -> [0.1, 0.2, ...]
-                    clean_embeddings.append([float(x) for x in emb[0]])
-                else:
-                    # Normal yapı: [0.1, 0.2, ...]
-                    clean_embeddings.append([float(x) for x in emb])
-            else:
-                clean_embeddings.append(list(emb))
-        # =====================================
+        # ChromaDB'ye tek (N, dim) float32 matris gönder; eleman eleman
+        # Python float dönüşümü yapılmaz. 3 katmanlı [[0.1, ...]] yapılar
+        # tek boyuta indirgenir.
+        if isinstance(embeddings, np.ndarray) and embeddings.ndim == 2:
+            clean_embeddings = embeddings.astype(np.float32, copy=False)
+        else:
+            clean_embeddings = np.stack([
+                np.asarray(emb, dtype=np.float32).reshape(-1)
+                for emb in embeddings
+                if emb is not None
+            ])
+        clean_embeddings = _normalize_rows(clean_embeddings)
 
         # Dimension check
-        if clean_embeddings and len(clean_embeddings[0]) != self.EMBEDDING_DIM:
+        if clean_embeddings.shape[1] != self.EMBEDDING_DIM:
             logger.warning(
-                f"⚠️ Embedding boyutu uyumsuz: {len(clean_embeddings[0])} "
+                f"⚠️ Embedding boyutu uyumsuz: {clean_embeddings.shape[1]} "
                 f"(beklenen: {self.EMBEDDING_DIM})"
             )
 
         try:
             if not ids:
-                ids = [str(uuid.uuid4()) for _ in texts]
+                ids = [self.content_id(t) for t in texts]
+            
+            # Aynı batch'te tekrar eden ID upsert'te hata verir; ilkini tut
+            first_index: Dict[str, int] = {}
+            for i, doc_id in enumerate(ids):
+                first_index.setdefault(doc_id, i)
+            if len(first_index) < len(ids):
+                keep = list(first_index.values())
+                texts = [texts[i] for i in keep]
+                metadatas = [metadatas[i] for i in keep]
+                ids = [ids[i] for i in keep]
+                clean_embeddings = clean_embeddings[keep]
                 
-            self.collection.add(
+            self.collection.upsert(
                 documents=texts,
                 embeddings=clean_embeddings,
                 metadatas=metadatas,
                 ids=ids
             )
-            logger.info(f"✅ {len(texts)} doküman eklendi")
+            logger.info(f"✅ {len(texts)} doküman eklendi/güncellendi")
             
         except Exception as e:
             logger.error(f"❌ Add error: {e}")
@@ -100,30 +173,115 @@ class VectorStoreService:
         Returns:
             [{"id": str, "document": str, "metadata": dict, "distance": float}, ...]
         """
+        return self.search_many([query_vector], limit=limit, filter=filter)[0]
+    
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        limit: int = 5,
+        filter: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """
+        Birden fazla sorgu vektörünü tek collection.query çağrısında ara.
+        
+        Returns:
+            Her sorgu vektörü için search() formatında sonuç listesi
+        """
         try:
+            queries = _normalize_rows(np.asarray(query_vectors, dtype=np.float32))
             results = self.collection.query(
-                query_embeddings=[query_vector],
+                query_embeddings=queries,
                 n_results=limit,
                 where=filter
             )
             
             # Format response
-            formatted = []
-            if results['ids'] and results['ids'][0]:
-                for i in range(len(results['documents'][0])):
-                    formatted.append({
-                        "id": results['ids'][0][i],
-                        "document": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "distance": results['distances'][0][i]
-                    })
+            all_formatted = []
+            for q in range(len(query_vectors)):
+                formatted = []
+                if results['ids'] and results['ids'][q]:
+                    for i in range(len(results['documents'][q])):
+                        formatted.append({
+                            "id": results['ids'][q][i],
+                            "document": results['documents'][q][i],
+                            "metadata": results['metadatas'][q][i],
+                            "distance": results['distances'][q][i]
+                        })
+                all_formatted.append(formatted)
             
-            logger.info(f"🔍 {len(formatted)} sonuç bulundu")
-            return formatted
+            logger.info(f"🔍 {len(query_vectors)} sorgu, {sum(map(len, all_formatted))} sonuç")
+            return all_formatted
             
         except Exception as e:
             logger.error(f"❌ Search error: {e}")
-            return []
+            return [[] for _ in query_vectors]
+    
+    async def asearch(
+        self, 
+        query_vector: List[float], 
+        limit: int = 5, 
+        filter: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        search()'ün micro-batch'li async versiyonu.
+        
+        Aynı (limit, filter) ile SEARCH_BATCH_WAIT içinde gelen eşzamanlı
+        sorgular tek collection.query çağrısında birleştirilir; Chroma'nın
+        çağrı başı sabit maliyeti sorgular arasında paylaşılır.
+        """
+        loop = asyncio.get_running_loop()
+        key = (limit, orjson.dumps(filter, option=orjson.OPT_SORT_KEYS) if filter else None)
+        future = loop.create_future()
+        
+        _, pending = self._pending_searches.setdefault(key, (filter, []))
+        pending.append((query_vector, future))
+        
+        if len(pending) == 1:
+            loop.call_later(self.SEARCH_BATCH_WAIT, self._schedule_flush, key)
+        elif len(pending) >= self.SEARCH_BATCH_MAX:
+            self._schedule_flush(key)
+        
+        return await future
+    
+    def _schedule_flush(self, key: Tuple[int, Optional[str]]) -> None:
+        task = asyncio.ensure_future(self._flush_searches(key))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush_searches(self, key: Tuple[int, Optional[str]]) -> None:
+        """
+        Bekleyen sorguları tek çağrıda çalıştır ve future'ları çöz.
+        
+        Çağrı hata verirse batch'teki tüm bekleyen future'lar aynı hatayla
+        çözülür, task iptal edilirse onlar da iptal edilir; hiçbir asearch
+        çağıranı askıda kalmaz.
+        """
+        entry = self._pending_searches.pop(key, None)
+        if not entry:
+            return
+        filter, pending = entry
+        
+        vectors = [vec for vec, _ in pending]
+        try:
+            results = await asyncio.to_thread(self.search_many, vectors, key[0], filter)
+            if len(results) != len(pending):
+                raise RuntimeError(
+                    f"search_many {len(pending)} sorguya {len(results)} sonuç döndü"
+                )
+        except asyncio.CancelledError:
+            for _, future in pending:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"❌ Batch search error: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
     
     def get_by_id(self, doc_id: str) -> Optional[Dict]:
         """ID ile doküman getir."""
@@ -140,6 +298,16 @@ class VectorStoreService:
             logger.error(f"❌ Get by ID error: {e}")
             return None
     
+    def existing_ids(self, ids: Sequence[str]) -> set:
+        """Verilen ID'lerden koleksiyonda zaten olanları döndür (içerik çekilmez)."""
+        if not ids:
+            return set()
+        try:
+            return set(self.collection.get(ids=list(ids), include=[])['ids'])
+        except Exception as e:
+            logger.error(f"❌ Existing IDs error: {e}")
+            return set()
+    
     def delete_by_ids(self, ids: List[str]):
         """Dokümanları sil."""
         try:
@@ -158,8 +326,15 @@ class VectorStoreService:
             self.client.delete_collection(self.collection_name)
             self.collection = self.client.create_collection(
                 self.collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": self.HNSW_SPACE}
             )
             logger.warning(f"♻️ Koleksiyon sıfırlandı: {self.collection_name}")
         except Exception as e:
-            logger.error(f"❌ Reset error: {e}")
\ No newline at end of file
+            logger.error(f"❌ Reset error: {e}")
+
+    def close(self) -> None:
+        """
+        Chroma client'ını kapat (SQLite/dosya handle'ları GC beklemeden bırakılır).
+        Aynı dizini kullanan diğer client'lar açık kaldıkça sistem çalışmaya devam eder.
+        """
+        self.client.close()
\ No newline at end of file
@@ -40,14 +40,15 @@ def main():
         print("⚠️  Veritabanı boş! Önce ingest scriptlerini çalıştırın.")
         return
 
-    # Tüm dokümanları çek (ilk 50'si yeterli, hepsini çekersek ekran dolar)
-    # ChromaDB'de .get() metodu veriyi ham haliyle getirir
-    results = store.collection.get(limit=50)
+    # Tüm veriyi tek seferde çek (embedding'ler hariç); hem ekran listesi
+    # hem istatistikler bu sonuçtan çıkar, sqlite'a ikinci kez gidilmez
+    all_data = store.collection.get(include=['metadatas', 'documents'])
+    all_metas = all_data.get('metadatas') or []
 
-    # Listeleri güvenli bir şekilde zipleyip dönelim
-    ids = results.get('ids', [])
-    documents = results.get('documents', [])
-    metadatas = results.get('metadatas', [])
+    # Ekrana ilk 50'si yeterli, hepsini basarsak ekran dolar
+    ids = (all_data.get('ids') or [])[:50]
+    documents = (all_data.get('documents') or [])[:50]
+    metadatas = all_metas[:50]
 
     # Her dokümanı göster
     for i, (doc_id, text, metadata) in enumerate(zip(ids, documents, metadatas), 1):
@@ -71,23 +72,21 @@ def main():
 
     # --- İSTATİSTİKLER ---
     
-    # Tüm veriyi (sadece metadata) çekerek istatistik çıkaralım
-    all_data = store.collection.get(include=['metadatas'])
-    all_metas = all_data.get('metadatas', [])
-    
-    # Temizlik (None olanları ayıkla)
-    valid_metas = [m for m in all_metas if m]
-
-    sources = [m.get('source', 'unknown') for m in valid_metas]
-    sentiments = [m.get('sentiment_label', 'unknown') for m in valid_metas]
-    movies = [m.get('movie_title', 'unknown') for m in valid_metas]
+    # Tek geçişte say; ara listeler oluşturulmaz (None metadata atlanır)
+    source_counts, sentiment_counts, movie_counts = Counter(), Counter(), Counter()
+    for m in all_metas:
+        if not m:
+            continue
+        source_counts[m.get('source', 'unknown')] += 1
+        sentiment_counts[m.get('sentiment_label', 'unknown')] += 1
+        movie_counts[m.get('movie_title', 'unknown')] += 1
 
     print("\n📈 KAYNAK DAĞILIMI:")
-    for source, count in Counter(sources).items():
+    for source, count in source_counts.items():
         print(f"   🔹 {source}: {count} doküman")
 
     print("\n💭 SENTIMENT DAĞILIMI:")
-    for sentiment, count in Counter(sentiments).items():
+    for sentiment, count in sentiment_counts.items():
         # Renkli çıktı (Opsiyonel)
         icon = "😐"
         if sentiment == "Pozitif": icon = "🟢"
@@ -95,7 +94,7 @@ def main():
         print(f"   {icon} {sentiment}: {count} doküman")
         
     print("\n🎞️  EN ÇOK YORUMU OLAN FİLMLER (Top 5):")
-    for movie, count in Counter(movies).most_common(5):
+    for movie, count in movie_counts.most_common(5):
         print(f"   🎬 {movie}: {count} yorum")
 
     print("\n" + "=" * 60)
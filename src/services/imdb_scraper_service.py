@@ -1,34 +1,95 @@
 # src/services/imdb_scraper_service.py
 
 import httpx
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+from aiolimiter import AsyncLimiter
+from selectolax.lexbor import LexborHTMLParser
 from typing import List, Dict, Optional, Union
 import logging
-import asyncio
 import random
 
 logger = logging.getLogger(__name__)
 
+# IMDb 2024 HTML yapısı seçicileri
+REVIEW_CONTAINER_SELECTOR = "article.user-review-item"
+TITLE_SELECTOR = "h3.ipc-title__text"
+CONTENT_SELECTOR = ".ipc-html-content-inner-div"
+RATING_SELECTOR = ".ipc-rating-star--rating"
+
+# Masaüstü tarayıcı User-Agent havuzu (istek başına rastgele seçilir).
+# Statik liste: fake_useragent'ın açılıştaki veri yüklemesi/ağ bağımlılığı yok.
+_UA_POOL = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 Edg/123.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.3.1 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:124.0) Gecko/20100101 Firefox/124.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 OPR/110.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:123.0) Gecko/20100101 Firefox/123.0",
+]
+
 class ImdbScraperService:
+    MAX_CONNECTIONS = 8  # Paylaşılan client'ın bağlantı havuzu
+    REQUEST_INTERVAL = 3.0  # İki IMDb isteği arasındaki ortalama süre (s)
+
     def __init__(self):
         """
         IMDb scraper servisi.
         Bot korumasını aşmak için UserAgent rotasyonu kullanır.
         """
-        self.ua = UserAgent(fallback='chrome')
         self.base_url = "https://www.imdb.com"
+        # Eşzamanlı tüm fetch_reviews çağrıları aynı bütçeyi paylaşır:
+        # REQUEST_INTERVAL'da 1 istek (IP ban önleme)
+        self._limiter = AsyncLimiter(max_rate=1, time_period=self.REQUEST_INTERVAL)
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Tüm isteklerin paylaştığı AsyncClient (ilk kullanımda açılır).
+        Keep-alive sayesinde eşzamanlı/ardışık istekler TCP+TLS
+        bağlantısını yeniden kullanır.
+        """
+        if self._client is None:
+            # Sabit header'lar client'ta; istek başına yalnızca User-Agent değişir
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                follow_redirects=True,
+                headers={
+                    "Accept-Language": "en-US,en;q=0.9",
+                    "Referer": "https://www.google.com/"
+                },
+                limits=httpx.Limits(
+                    max_connections=self.MAX_CONNECTIONS,
+                    max_keepalive_connections=self.MAX_CONNECTIONS
+                )
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Paylaşılan HTTP client'ı kapat (sonraki istekte yeniden açılır)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _get_headers(self) -> dict:
         """
         Her istekte farklı tarayıcı kimliği (User-Agent) üretir.
         IMDb'nin bot tespitini atlatmak için gerekli.
+        (Accept-Language/Referer client seviyesinde sabit.)
         """
-        return {
-            "User-Agent": self.ua.random,
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.google.com/"
-        }
+        return {"User-Agent": random.choice(_UA_POOL)}
     
     async def fetch_reviews(
         self, 
@@ -48,61 +109,53 @@ class ImdbScraperService:
         """
         url = f"{self.base_url}/title/{imdb_id}/reviews"
         
-        # Rate limiting: IP ban önleme
-        wait_time = random.uniform(2, 4)
-        logger.info(f"⏳ Rate limit beklemesi: {wait_time:.2f}s - {imdb_id}")
-        await asyncio.sleep(wait_time)
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    url, 
-                    headers=self._get_headers(), 
-                    follow_redirects=True,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                
-                return self._parse_html(response.text, max_reviews)
-                
-            except httpx.HTTPStatusError as e:
-                logger.error(f"❌ HTTP {e.response.status_code}: {imdb_id}")
-                return []
-            except httpx.RequestError as e:
-                logger.error(f"❌ Network hatası: {str(e)}")
-                return []
-            except Exception as e:
-                logger.error(f"❌ Beklenmeyen hata: {str(e)}")
-                return []
+        try:
+            # Rate limiting: bütçe boşsa sıradaki slota kadar bekler
+            async with self._limiter:
+                response = await self._get_client().get(url, headers=self._get_headers())
+            response.raise_for_status()
+            
+            return self._parse_html(response.text, max_reviews)
+            
+        except httpx.HTTPStatusError as e:
+            logger.error(f"❌ HTTP {e.response.status_code}: {imdb_id}")
+            return []
+        except httpx.RequestError as e:
+            logger.error(f"❌ Network hatası: {str(e)}")
+            return []
+        except Exception as e:
+            logger.error(f"❌ Beklenmeyen hata: {str(e)}")
+            return []
     
     def _parse_html(self, html_content: str, limit: int) -> List[Dict]:
         """
         HTML içeriğinden yorum verilerini parse eder.
         IMDb'nin 2024 HTML yapısına göre güncellenmiştir.
         """
-        soup = BeautifulSoup(html_content, "lxml")
+        # lexbor (C) parser: Python DOM nesnesi üretmeden CSS seçici çalıştırır
+        tree = LexborHTMLParser(html_content)
         reviews = []
         
         # IMDb 2024 yapısı: <article class="user-review-item">
-        containers = soup.select("article.user-review-item")
+        containers = tree.css(REVIEW_CONTAINER_SELECTOR)
         logger.info(f"🔍 {len(containers)} yorum container bulundu")
         
         for container in containers[:limit]:
             try:
                 # 1. TITLE - Yorum başlığı
-                title_tag = container.select_one("h3.ipc-title__text")
-                title = title_tag.get_text(strip=True) if title_tag else "No Title"
+                title_tag = container.css_first(TITLE_SELECTOR)
+                title = title_tag.text(strip=True) if title_tag else "No Title"
                 
                 # 2. CONTENT - Yorum metni
-                content_tag = container.select_one(".ipc-html-content-inner-div")
-                content = content_tag.get_text(separator=" ", strip=True) if content_tag else ""
+                content_tag = container.css_first(CONTENT_SELECTOR)
+                content = content_tag.text(separator=" ", strip=True) if content_tag else ""
                 
                 # 3. RATING - Kullanıcı puanı (opsiyonel)
                 rating = None
-                rating_tag = container.select_one(".ipc-rating-star--rating")
+                rating_tag = container.css_first(RATING_SELECTOR)
                 if rating_tag:
                     try:
-                        raw = rating_tag.get_text(strip=True)  # "10" veya "9"
+                        raw = rating_tag.text(strip=True)  # "10" veya "9"
                         rating = float(raw)
                     except (ValueError, IndexError):
                         pass
@@ -2,14 +2,21 @@
 Ingestion Coordinator
 Tüm ingestion işlemlerini orkestra eden merkezi servis.
 """
+import os
+import copy
+import hashlib
 import logging
 import asyncio
-from typing import List
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+
+import numpy as np
 
 from src.infrastructure.config import get_settings
 from src.services.tmdb_service import TMDbService
 from src.services.imdb_scraper_service import ImdbScraperService
-from src.services.pdf_parser_service import PdfParserService
+from src.services.pdf_parser_service import PdfParserService, ScriptChunk
 from src.services.sentiment_client import SentimentClient
 from src.infrastructure.vector_store import VectorStoreService
 from src.domain.embeddings import EmbeddingService
@@ -26,30 +33,60 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+def _split_script_file(
+    parser: PdfParserService,
+    file_path: str,
+    movie_id: str,
+    page_workers: int
+) -> List[ScriptChunk]:
+    """
+    Dosya seviyesi worker: PDF'i parçalara böl.
+    
+    Sayfa ayarı parser'ın kopyasına uygulanır; paylaşılan instance değişmez.
+    Process havuzundaki worker'larda page_workers=1 verilir ki pypdf yolu
+    iç içe ikinci bir process havuzu açmasın.
+    """
+    parser = copy.copy(parser)
+    parser.page_workers = page_workers
+    return parser.load_and_split(file_path, movie_id=movie_id)
+
+
 class IngestionCoordinator:
     """
     Tüm Ingestion İşlemlerinin Merkezi.
     Hem TMDb, IMDb hem de Script akışlarını buradan yönetir.
     """
     
+    IMDB_CONCURRENCY = 3  # Aynı anda scrape edilen IMDb filmi
+    TMDB_CONCURRENCY = 3  # Aynı anda işlenen TMDb filmi (limiter ayrıca 10 istek/s)
+    FLUSH_BATCH_SIZE = 5000  # Vector Store'a tek seferde yazılan doküman
+    
     def __init__(self):
         self.settings = get_settings()
         
         # 1. Veri Kaynakları (Tedarikçiler)
         self.tmdb_service = TMDbService()
         self.imdb_service = ImdbScraperService()
-        self.pdf_parser = PdfParserService(chunk_size=1000, chunk_overlap=200)
+        # Aynı senaryo PDF'i tekrar ingest edilirse parçalar diskten gelir
+        self.pdf_parser = PdfParserService(
+            chunk_size=1000, chunk_overlap=200, cache_dir="data/script_cache"
+        )
         
         # 2. Analiz ve Kayıt Araçları
         self.sentiment_client = SentimentClient(
             base_url=self.settings.SENTIMENT_SERVICE_URL,
             fail_open=True
         )
-        self.embedding_service = EmbeddingService()
+        # Aynı içerik yeniden ingest edilirse embedding SQLite cache'ten gelir
+        self.embedding_service = EmbeddingService(cache_path="data/embed_cache.sqlite")
         self.vector_store = VectorStoreService(
             collection_name="cinemind_store",
             persist_path="data/vector_store"
         )
+        
+        # Henüz embed edilmemiş dokümanlar; pipeline sonunda (veya
+        # FLUSH_BATCH_SIZE dolunca) toplu embed edilip yazılır
+        self._doc_queue: List[CinemaDocument] = []
     
     # =========================================================================
     # 1. TMDb AKIŞI (Popüler Filmleri Çek)
@@ -64,19 +101,29 @@ class IngestionCoordinator:
             movies = data.get("results", [])[:limit]
         except Exception as e:
             logger.error(f"❌ TMDb liste hatası: {e}")
+            await self.tmdb_service.aclose()
             return
         
-        for m_data in movies:
-            await self._process_tmdb_movie(m_data["id"])
-            await asyncio.sleep(0.5)  # Rate limiting
+        # Filmler eşzamanlı işlenir; istek hızını TMDbService'in limiter'ı korur
+        semaphore = asyncio.Semaphore(self.TMDB_CONCURRENCY)
+        
+        async def process(tmdb_id: int):
+            async with semaphore:
+                await self._process_tmdb_movie(tmdb_id)
+        
+        try:
+            await asyncio.gather(*(process(m_data["id"]) for m_data in movies))
+        finally:
+            await self.tmdb_service.aclose()
+            await self.sentiment_client.aclose()
+            await self._flush_pending()
         
         logger.info("🎉 TMDb Batch Tamamlandı.")
     
     async def _process_tmdb_movie(self, tmdb_id: int):
         """Tek bir TMDb filmini işle."""
-        # Veri çek
-        movie = await self.tmdb_service.get_movie(tmdb_id)
-        reviews = await self.tmdb_service.get_reviews(tmdb_id, max_pages=1)
+        # Veri çek (detay ve yorumlar eşzamanlı)
+        movie, reviews = await self.tmdb_service.get_movie_bundle(tmdb_id, review_pages=1)
         
         if not movie or not reviews:
             return
@@ -103,39 +150,51 @@ class IngestionCoordinator:
         
         logger.info(f"🚀 IMDb Pipeline Başlıyor: {limit} Film")
         
-        for t in targets[:limit]:
-            logger.info(f"🔍 IMDb Scraping: {t['title']}")
-            
-            # Movie objesini manuel oluştur (source parametresi YOK)
-            movie = Movie(
-                movie_id=f"imdb-{t['id']}", 
-                title=t["title"], 
-                year=t["year"]
+        # Filmler eşzamanlı scrape edilir; IMDb'ye istek hızını scraper'ın
+        # paylaşılan AsyncLimiter'ı belirler, semaphore sadece aynı anda
+        # işlenen film sayısını sınırlar
+        semaphore = asyncio.Semaphore(self.IMDB_CONCURRENCY)
+        try:
+            await asyncio.gather(
+                *(self._process_imdb_movie(t, semaphore) for t in targets[:limit])
             )
-            
-            # Scraper Service ile yorumları çek
-            raw_reviews = await self.imdb_service.fetch_reviews(t["id"], max_reviews=5)
-            
-            if raw_reviews:
-                # Dict -> IMDbReview modeline dönüştür
-                reviews_models = []
-                for i, r in enumerate(raw_reviews):
-                    reviews_models.append(IMDbReview(
-                        review_id=f"imdb-{t['id']}-{i}",
-                        movie_id=t["id"],
-                        author=r.get("title", "Anonymous"),
-                        text=r["content"],
-                        rating=r.get("rating"),
-                        source=DataSource.IMDB  # ← Enum kullan
-                    ))
-                
-                # Ortak kaydetme fonksiyonuna gönder
-                await self._analyze_and_store(movie, reviews_models, source_type="imdb")
-            
-            await asyncio.sleep(3)  # Anti-bot beklemesi
+        finally:
+            await self.imdb_service.aclose()
+            await self.sentiment_client.aclose()
+            await self._flush_pending()
         
         logger.info("🎉 IMDb Pipeline Tamamlandı.")
     
+    async def _process_imdb_movie(self, t: dict, semaphore: asyncio.Semaphore):
+        """Tek bir IMDb filmini scrape et ve işle."""
+        # Movie objesini manuel oluştur (source parametresi YOK)
+        movie = Movie(
+            movie_id=f"imdb-{t['id']}", 
+            title=t["title"], 
+            year=t["year"]
+        )
+        
+        # Scraper Service ile yorumları çek
+        async with semaphore:
+            logger.info(f"🔍 IMDb Scraping: {t['title']}")
+            raw_reviews = await self.imdb_service.fetch_reviews(t["id"], max_reviews=5)
+        
+        if raw_reviews:
+            # Dict -> IMDbReview modeline dönüştür
+            reviews_models = []
+            for i, r in enumerate(raw_reviews):
+                reviews_models.append(IMDbReview(
+                    review_id=f"imdb-{t['id']}-{i}",
+                    movie_id=t["id"],
+                    author=r.get("title", "Anonymous"),
+                    text=r["content"],
+                    rating=r.get("rating"),
+                    source=DataSource.IMDB  # ← Enum kullan
+                ))
+            
+            # Ortak kaydetme fonksiyonuna gönder
+            await self._analyze_and_store(movie, reviews_models, source_type="imdb")
+    
     # =========================================================================
     # 3. SCRIPT AKIŞI (PDF Senaryo Dosyaları)
     # =========================================================================
@@ -154,13 +213,21 @@ class IngestionCoordinator:
         
         logger.info(f"🚀 Script Pipeline Başlıyor: {len(pdf_files)} dosya")
         
-        for pdf_path in pdf_files:
-            await self._process_script_file(pdf_path)
+        # PDF metin çıkarma CPU-bound; GIL'e takılmasın diye process havuzunda
+        # paralel çalışır. Chroma yazımı yine pipeline sonunda tek seferde.
+        workers = min(len(pdf_files), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                await asyncio.gather(
+                    *(self._process_script_file(p, pool) for p in pdf_files)
+                )
+        finally:
+            await self._flush_pending()
         
         logger.info("🎉 Script Pipeline Tamamlandı.")
     
-    async def _process_script_file(self, pdf_path: Path):
-        """Tek bir PDF senaryosunu işle."""
+    async def _process_script_file(self, pdf_path: Path, pool: Optional[Executor] = None):
+        """Tek bir PDF senaryosunu işle (pool None ise varsayılan thread havuzu)."""
         logger.info(f"📄 İşleniyor: {pdf_path.name}")
         
         # Film bilgilerini dosya adından çıkar
@@ -171,10 +238,19 @@ class IngestionCoordinator:
             year=movie_info["year"]
         )
         
-        # PDF'i chunk'lara böl
-        chunks = self.pdf_parser.load_and_split(
-            str(pdf_path), 
-            movie_id=movie_info["movie_id"]
+        # PDF'i chunk'lara böl (CPU işi, event loop'u bloklamasın).
+        # Dosyalar process havuzunda zaten paralel: sayfa havuzu kapalı.
+        page_workers = 1 if pool is not None else self.pdf_parser.page_workers
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(
+            pool,
+            partial(
+                _split_script_file,
+                self.pdf_parser,
+                str(pdf_path),
+                movie_info["movie_id"],
+                page_workers
+            )
         )
         
         if not chunks:
@@ -226,59 +302,118 @@ class IngestionCoordinator:
     async def _analyze_and_store(self, movie: Movie, reviews, source_type: str):
         """Hem TMDb hem IMDb yorumlarını analiz edip kaydeder."""
         
+        # Aynı metinli yorumlar (sayfalar arası tekrarlar) tek kez işlenir
+        reviews = self._unique_reviews(reviews)
+        
+        # Hangi kaynaktan geldiyse ona göre Document'ları toplu üret
+        if source_type == "tmdb":
+            documents = CinemaDocument.from_tmdb_reviews(movie, reviews)
+        else:
+            documents = CinemaDocument.from_imdb_reviews(movie, reviews)
+        
+        # Yarıda kalmış bir çalıştırmadan sonra zaten kayıtlı olanları atla
+        existing = await self._ingested_ids(documents)
+        if existing:
+            kept = [(r, d) for r, d in zip(reviews, documents) if d.doc_id not in existing]
+            if not kept:
+                return
+            reviews, documents = (list(x) for x in zip(*kept))
+        
         # 1. Sentiment Analizi (Batch)
-        texts = [r.text for r in reviews]
-        sentiments = self.sentiment_client.analyze_batch(texts)
+        sentiments = await self.sentiment_client.analyze_batch_async([r.text for r in reviews])
         
-        documents = []
-        for review, sent in zip(reviews, sentiments):
+        for review, doc, sent in zip(reviews, documents, sentiments):
             # Sentiment sonucunu ekle
-            review.sentiment = SentimentResult(
+            review.sentiment = doc.sentiment = SentimentResult(
                 label=sent.get("sentiment", "Nötr"),
                 score=sent.get("confidence", 0.0)
             )
-            
-            # Hangi kaynaktan geldiyse ona göre Document üret
-            if source_type == "tmdb":
-                doc = CinemaDocument.from_tmdb_review(movie, review)
-            else:
-                doc = CinemaDocument.from_imdb_review(movie, review)
-            
-            documents.append(doc)
         
-        # 2. Embedding ve Kayıt
-        await self._embed_and_store(documents, source_type)
+        # 2. Embedding ve Kayıt (pipeline sonunda toplu)
+        await self._queue_documents(documents, source_type)
+    
+    @staticmethod
+    def _unique_reviews(reviews):
+        """Metni aynı olan yorumların ilkini tut (boşluk/büyük-küçük harf farkı yok sayılır)."""
+        seen = set()
+        unique = []
+        for review in reviews:
+            key = hashlib.blake2b(
+                " ".join(review.text.casefold().split()).encode(), digest_size=16
+            ).digest()
+            if key not in seen:
+                seen.add(key)
+                unique.append(review)
+        
+        if len(unique) < len(reviews):
+            logger.info(f"   🔁 {len(reviews) - len(unique)} tekrar eden yorum atlandı")
+        return unique
     
     async def _store_scripts(self, movie: Movie, scenes):
         """Senaryo metinlerini kaydet (sentiment yok)."""
-        documents = []
-        for scene in scenes:
-            doc = CinemaDocument.from_script_scene(movie, scene)
-            documents.append(doc)
-        
-        await self._embed_and_store(documents, "script")
+        documents = CinemaDocument.from_script_scenes(movie, scenes)
+        existing = await self._ingested_ids(documents)
+        documents = [d for d in documents if d.doc_id not in existing]
+        await self._queue_documents(documents, "script")
     
-    async def _embed_and_store(self, documents: List[CinemaDocument], source_type: str):
-        """Dokümanları embed et ve Vector Store'a kaydet."""
+    async def _ingested_ids(self, documents: List[CinemaDocument]) -> set:
+        """Vector Store'da zaten bulunan doküman ID'leri (sadece ID sorgulanır)."""
+        existing = await asyncio.to_thread(
+            self.vector_store.existing_ids, [d.doc_id for d in documents]
+        )
+        if existing:
+            logger.info(f"   ⏭️ {len(existing)} belge zaten kayıtlı, atlanıyor")
+        return existing
+    
+    async def _queue_documents(self, documents: List[CinemaDocument], source_type: str):
+        """Dokümanları embedding + yazma kuyruğuna ekle."""
         if not documents:
             return
         
-        texts = [d.content for d in documents]
-        embeddings = self.embedding_service.embed_documents(texts)
+        self._doc_queue.extend(documents)
+        logger.info(f"   📥 Kuyruğa alındı: {len(documents)} belge ({source_type})")
+        if len(self._doc_queue) >= self.FLUSH_BATCH_SIZE:
+            await self._flush_pending()
+    
+    async def _flush_pending(self):
+        """
+        Kuyruktaki dokümanları embed et ve Vector Store'a yaz.
+        
+        Film başına birkaç doküman yerine tüm pipeline'ın metinleri tek
+        embed_documents_async çağrısına gider; API'ye tam (100'lük)
+        batch'ler halinde ulaşır. Yazma FLUSH_BATCH_SIZE'lık parçalarla yapılır.
+        """
+        if not self._doc_queue:
+            return
+        
+        # Kuyruğu devral; embed/yazma sürerken eşzamanlı filmler yeni kuyruğa ekler
+        documents, self._doc_queue = self._doc_queue, []
+        embeddings = await self.embedding_service.embed_documents_async(
+            [d.content for d in documents]
+        )
         
-        valid_ids, valid_texts, valid_metas, valid_embs = [], [], [], []
+        records, embs = [], []
         for doc, emb in zip(documents, embeddings):
-            if emb:
-                _, _, meta, _ = doc.to_chroma_format()
-                valid_ids.append(doc.doc_id)
-                valid_texts.append(doc.content)
-                valid_metas.append(meta)
-                valid_embs.append(emb)
-        
-        if valid_ids:
-            self.vector_store.add_documents(valid_texts, valid_embs, valid_metas, valid_ids)
-            logger.info(f"   ✅ Kaydedildi: {len(valid_ids)} belge ({source_type})")
+            if emb is not None:
+                records.append(doc.to_chroma_format())
+                embs.append(emb)
+        
+        size = self.FLUSH_BATCH_SIZE
+        for start in range(0, len(records), size):
+            chunk = records[start : start + size]
+            # (N, 768) float32 matris olarak tek seferde gönder; Chroma yazımı
+            # senkron olduğu için thread'de çalışır
+            await asyncio.to_thread(
+                self.vector_store.add_documents,
+                [r.content for r in chunk],
+                np.stack(embs[start : start + size]),
+                [r.metadata for r in chunk],
+                [r.doc_id for r in chunk]
+            )
+        
+        logger.info(f"   ✅ Kaydedildi: {len(records)}/{len(documents)} belge")
     
     def close(self):
         """Servisleri temizle."""
-        self.sentiment_client.close()
\ No newline at end of file
+        self.sentiment_client.close()
+        self.embedding_service.close()
\ No newline at end of file
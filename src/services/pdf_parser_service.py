@@ -1,100 +1,382 @@
+import hashlib
 import logging
-from typing import List, Dict, Any
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, TypedDict, TYPE_CHECKING
 from pathlib import Path
-from pypdf import PdfReader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from dataclasses import dataclass, asdict
+import orjson
+import pypdfium2 as pdfium
+
+if TYPE_CHECKING:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from pypdf import PdfReader as _PdfReaderType
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class ScriptChunk:
-    """Senaryonun bir parçası (chunk) ve ilişkili metadata verisi."""
+# pypdf yalnızca PDFium'un reddettiği dosyalarda gerekir: import'u (~60ms) ilk
+# kullanıma ertelenir. İsim modülde kalır ki testler patch'leyebilsin.
+PdfReader: Optional["type[_PdfReaderType]"] = None
+
+
+def _get_pdf_reader() -> "type[_PdfReaderType]":
+    """pypdf.PdfReader sınıfı (ilk çağrıda import edilir)."""
+    global PdfReader
+    if PdfReader is None:
+        from pypdf import PdfReader as reader_cls
+        PdfReader = reader_cls
+    return PdfReader
+
+# Bu sayfa sayısının altında process başlatma maliyeti kazancı yer
+PARALLEL_MIN_PAGES = 4
+
+# Satır başındaki sahne başlığı (INT. / EXT. / INT./EXT. / I/E.) kesin sahne sınırıdır
+SCENE_HEADING_PATTERN = re.compile(r"^[ \t]*(?:INT\.?/EXT\.|INT\.|EXT\.|I/E\.)", re.MULTILINE)
+
+
+def _extract_page_range(file_path: str, page_indices: Sequence[int]) -> List[Tuple[int, str]]:
+    """
+    Worker process'te çalışır: PDF'i kendi açar, verilen sayfaların metnini döndürür.
+    Reader her sayfa için değil, worker başına bir kez açılır.
+    """
+    reader = _get_pdf_reader()(file_path)
+    return [(idx, reader.pages[idx].extract_text() or "") for idx in page_indices]
+
+
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> "RecursiveCharacterTextSplitter":
+    """
+    Aynı ayarlarla oluşturulan tüm PdfParserService'ler tek splitter'ı paylaşır
+    (splitter durumsuzdur; sadece konfigürasyon taşır).
+    """
+    # LangChain import'u (~200ms) modül yüklenirken değil, ilk kullanımda
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    # Sadece chunk_size'ı aşan tek bir sahneyi böler; sahne sınırları
+    # _split_screenplay'de zaten kesilmiş olur (paragraf > satır > kelime)
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", " ", ""],
+        length_function=len,
+    )
+
+
+class ScriptChunk(TypedDict):
+    """
+    Senaryonun bir parçası (chunk) ve ilişkili metadata verisi.
+    Sadece tip tanımı; load_and_split düz dict üretir (asdict deepcopy'si yok).
+    """
     content: str
     metadata: Dict[str, Any]
 
 class PdfParserService:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    # Sayfa çıkarımı havuzu process başına bir kez açılır; sonraki PDF'ler
+    # sıcak worker'ları (pypdf import'u yapılmış) yeniden kullanır.
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        page_workers: Optional[int] = None,
+        min_chunk_size: int = 100,
+        cache_dir: Optional[str] = None
+    ):
         """
         Args:
             chunk_size: Her parçanın hedef karakter uzunluğu.
             chunk_overlap: Parçalar arası örtüşme (bağlam kopmaması için).
+            page_workers: Sayfa çıkarımı için process sayısı (varsayılan: CPU sayısı, 1 = seri).
+            min_chunk_size: Bundan kısa parçalar komşusuyla birleştirilir.
+            cache_dir: Verilirse parçalar PDF içeriğinin hash'iyle burada saklanır;
+                aynı senaryo tekrar yüklenince parse edilmez (None = kapalı).
         """
-        # Senaryo formatına özel ayırıcılar (Önce sahne başlıkları, sonra paragraflar)
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["INT.", "EXT.", "\n\n", "\n", " ", ""],
-            length_function=len,
-        )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_chunk_size = min_chunk_size
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.page_workers = page_workers or os.cpu_count() or 1
+        self.text_splitter = _get_splitter(chunk_size, chunk_overlap)
 
-    def load_and_split(self, file_path: str, movie_id: str) -> List[Dict[str, Any]]:
+    def load_and_split(
+        self,
+        file_path: str,
+        movie_id: str,
+        force_refresh: bool = False
+    ) -> List[ScriptChunk]:
         """
         PDF dosyasını okur, metni sahnere/diyaloglara göre böler.
 
         Args:
             file_path: Script PDF dosyasının yolu.
             movie_id: Chunk'ların hangi filme ait olduğunu belirten ID.
+            force_refresh: Önbellekte kayıt olsa bile PDF'i yeniden parse et.
 
         Returns:
-            List[Dict]: Veritabanına yazılmaya hazır chunk listesi.
+            List[ScriptChunk]: Veritabanına yazılmaya hazır chunk listesi.
+        """
+        return list(self.iter_chunks(file_path, movie_id, force_refresh))
+
+    def iter_chunks(
+        self,
+        file_path: str,
+        movie_id: str,
+        force_refresh: bool = False
+    ) -> Iterator[ScriptChunk]:
+        """
+        load_and_split'in generator versiyonu: chunk dict'leri tüketildikçe üretilir.
+        Hata durumunda hiçbir şey üretmez (load_and_split'teki [] karşılığı).
         """
         pdf_path = Path(file_path)
-        
+        chunks = self._load_chunks(pdf_path, force_refresh)
+        if not chunks:
+            return
+
+        # 4. Metadata ile Paketle: sabit alanlar bir kez kurulur, chunk başına kopyalanır
+        base_metadata = {
+            "source": "script",
+            "movie_id": movie_id,
+            "total_chunks": len(chunks),
+            "file_name": pdf_path.name
+        }
+        for i, (content, heading) in enumerate(chunks):
+            metadata = base_metadata.copy()
+            metadata["chunk_index"] = i     # Sıralama için önemli
+            if heading:  # Chroma metadata'sı None kabul etmez
+                metadata["scene_heading"] = heading
+            yield {"content": content, "metadata": metadata}
+
+    def _load_chunks(self, pdf_path: Path, force_refresh: bool) -> List[Tuple[str, Optional[str]]]:
+        """
+        PDF'i (veya önbelleği) okuyup (içerik, sahne başlığı) listesi döndürür.
+        Dosya yoksa, içerik boşsa veya parse hatasında boş liste.
+        """
         # 1. Dosya Kontrolü (Validation)
         if not pdf_path.exists():
-            logger.error(f"❌ Dosya bulunamadı: {file_path}")
+            logger.error(f"❌ Dosya bulunamadı: {pdf_path}")
             return []
 
         try:
+            # Aynı içerik + aynı ayarlar daha önce bölündüyse parse adımları atlanır
+            cache_file = self._cache_file(pdf_path) if self.cache_dir else None
+            if cache_file is not None and not force_refresh:
+                chunks = self._read_cache(cache_file)
+                if chunks is not None:
+                    logger.info(f"⚡ Parçalar önbellekten: {pdf_path.name}")
+                    return chunks
+
             # 2. PDF'ten Ham Metni Çek
-            raw_text = self._extract_text_from_pdf(file_path)
-            
+            raw_text = self._extract_text_from_pdf(str(pdf_path))
+
             if not raw_text.strip():
-                logger.warning(f"⚠️ PDF içeriği boş: {file_path}")
+                logger.warning(f"⚠️ PDF içeriği boş: {pdf_path}")
                 return []
 
-            # 3. Metni Akıllı Böl (Chunking)
-            chunks = self.text_splitter.create_documents([raw_text])
-            
-            # 4. Metadata ile Paketle
-            processed_chunks = []
-            total_chunks = len(chunks)
-            
-            for i, chunk in enumerate(chunks):
-                chunk_data = ScriptChunk(
-                    content=chunk.page_content,
-                    metadata={
-                        "source": "script",
-                        "movie_id": movie_id,
-                        "chunk_index": i,           # Sıralama için önemli
-                        "total_chunks": total_chunks,
-                        "file_name": pdf_path.name
-                    }
-                )
-                processed_chunks.append(asdict(chunk_data))
-
-            logger.info(f"✅ İşlem Başarılı: {pdf_path.name} -> {total_chunks} parça oluşturuldu.")
-            return processed_chunks
+            # 3. Metni Sahnelere Göre Böl (Chunking)
+            chunks = self._split_screenplay(raw_text)
+            if cache_file is not None:
+                self._write_cache(cache_file, chunks)
+
+            logger.info(f"✅ İşlem Başarılı: {pdf_path.name} -> {len(chunks)} parça oluşturuldu.")
+            return chunks
 
         except Exception as e:
-            logger.error(f"❌ PDF parse hatası ({file_path}): {str(e)}")
+            logger.error(f"❌ PDF parse hatası ({pdf_path}): {str(e)}")
             return []
 
+    def _cache_file(self, pdf_path: Path) -> Path:
+        """PDF byte'ları + bölme ayarlarından türetilen önbellek dosyası."""
+        digest = hashlib.sha1()
+        with open(pdf_path, "rb") as f:
+            # mmap: büyük PDF heap'e kopyalanmadan hash'lenir (sayfalar OS'ten okunur)
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    digest.update(mm)
+        digest.update(f"{self.chunk_size}:{self.chunk_overlap}:{self.min_chunk_size}".encode())
+        return self.cache_dir / f"{digest.hexdigest()}.chunks.json"
+
+    @staticmethod
+    def _read_cache(cache_file: Path) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """Önbellekteki (içerik, sahne başlığı) listesi; yoksa/bozuksa None."""
+        try:
+            return [tuple(item) for item in orjson.loads(cache_file.read_bytes())]
+        except FileNotFoundError:
+            return None
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"⚠️ Bozuk parça önbelleği yok sayıldı ({cache_file.name}): {e}")
+            return None
+
+    @staticmethod
+    def _write_cache(cache_file: Path, chunks: List[Tuple[str, Optional[str]]]) -> None:
+        """Geçici dosyaya yazıp os.replace ile atomik olarak yerine koy."""
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_bytes(orjson.dumps(chunks))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            # Önbellek yazılamasa da parse sonucu kullanılabilir
+            logger.warning(f"⚠️ Parça önbelleği yazılamadı ({cache_file}): {e}")
+
+    def _split_screenplay(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        Senaryo yapısına göre böl.
+
+        1. INT./EXT. satırları kesin sınır: metin sahnelere ayrılır.
+        2. chunk_size'ı aşan sahneler recursive splitter ile alt parçalara bölünür
+           (her parça sahne başlığını metadata olarak taşır).
+        3. Bağlamı zayıf küçük parçalar komşusuyla birleştirilir.
+
+        Returns:
+            (içerik, sahne başlığı) listesi
+        """
+        spans: List[Tuple[int, int, Optional[str]]] = []
+        for start, end in self._scene_spans(text):
+            first_line = text[start:end].split("\n", 1)[0].strip()
+            heading = first_line if SCENE_HEADING_PATTERN.match(first_line) else None
+
+            if end - start <= self.chunk_size:
+                spans.append((start, end, heading))
+            else:
+                spans.extend((s, e, heading) for s, e in self._sub_spans(text, start, end))
+
+        return [(text[start:end], heading) for start, end, heading in self._merge_small_spans(spans)]
+
+    @staticmethod
+    def _scene_spans(text: str) -> List[Tuple[int, int]]:
+        """Sahne başlıklarından kesilmiş, baş/son boşlukları atılmış (start, end) aralıkları."""
+        starts = [m.start() for m in SCENE_HEADING_PATTERN.finditer(text)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)  # İlk başlıktan önceki kısım (kapak, FADE IN vb.)
+
+        spans = []
+        for start, end in zip(starts, starts[1:] + [len(text)]):
+            segment = text[start:end]
+            stripped_end = len(segment.rstrip())
+            if stripped_end == 0:
+                continue
+            lead = len(segment) - len(segment.lstrip())
+            spans.append((start + lead, start + stripped_end))
+        return spans
+
+    def _sub_spans(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Uzun sahneyi splitter ile böl, parçaların metindeki konumlarını döndür."""
+        scene = text[start:end]
+        spans = []
+        search_from = 0
+        # split_text parçaları sahnenin alt dizeleridir (keep_separator + strip)
+        for chunk in self.text_splitter.split_text(scene):
+            pos = scene.find(chunk, search_from)
+            search_from = pos + 1
+            spans.append((start + pos, start + pos + len(chunk)))
+        return spans
+
+    def _merge_small_spans(
+        self,
+        spans: List[Tuple[int, int, Optional[str]]]
+    ) -> List[Tuple[int, int, Optional[str]]]:
+        """
+        Küçük parçaları komşusuyla birleştir.
+
+        Konumlar üzerinden birleştirilir; overlap bölgesi iki kez yazılmaz
+        ve sonuç chunk_size'ı aşmaz. Başlık ilk parçanınkidir.
+        """
+        merged: List[Tuple[int, int, Optional[str]]] = []
+        for start, end, heading in spans:
+            if merged:
+                prev_start, prev_end, prev_heading = merged[-1]
+                is_small = end - start < self.min_chunk_size or prev_end - prev_start < self.min_chunk_size
+                if is_small and end - prev_start <= self.chunk_size:
+                    merged[-1] = (prev_start, max(prev_end, end), prev_heading or heading)
+                    continue
+            merged.append((start, end, heading))
+        return merged
+
     def _extract_text_from_pdf(self, file_path: str) -> str:
         """
-        pypdf kullanarak dosyadaki metni çıkarır.
+        Dosyadaki metni çıkarır.
+        Önce PDFium (native, pypdf'ten kat kat hızlı); PDFium'un reddettiği
+        dosyalarda pypdf'e düşer.
         """
-        text = ""
         try:
-            reader = PdfReader(file_path)
+            return self._extract_with_pdfium(file_path)
+        except pdfium.PdfiumError as e:
+            logger.warning(f"⚠️ PDFium okuyamadı, pypdf deneniyor ({file_path}): {e}")
+            return self._extract_with_pypdf(file_path)
+
+    def _extract_with_pdfium(self, file_path: str) -> str:
+        """PDFium text page API ile metin çıkarımı."""
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            parts = []
+            for page_num, page in enumerate(pdf):
+                textpage = page.get_textpage()
+                # PDFium satır sonlarını \r\n verir; splitter \n bekliyor
+                page_text = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                page.close()
+                if page_text.strip():
+                    parts.append(page_text)
+                else:
+                    logger.debug(f"Sayfa {page_num + 1} boş veya okunamadı: {file_path}")
+            return "\n".join(parts)
+        finally:
+            pdf.close()
+
+    def _extract_with_pypdf(self, file_path: str) -> str:
+        """
+        pypdf kullanarak dosyadaki metni çıkarır (yedek yol).
+        """
+        try:
+            reader = _get_pdf_reader()(file_path)
+            page_count = len(reader.pages)
+            workers = min(self.page_workers, page_count)
+
+            # Sayfa decode'u CPU-bound: uzun PDF'lerde process'lere dağıt
+            if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+                return self._extract_pages_parallel(file_path, page_count, workers)
+
+            # str += her sayfada birikeni yeniden kopyalar (O(n²)); tek join ile birleştir
+            parts = []
             for page_num, page in enumerate(reader.pages):
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
+                    parts.append(page_text)
                 else:
                     logger.debug(f"Sayfa {page_num + 1} boş veya okunamadı: {file_path}")
-            return text
+            return "\n".join(parts)
         except Exception as e:
             logger.error(f"PDF okuma alt seviye hatası: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        """Paylaşılan sayfa çıkarım havuzu (ilk kullanımda açılır)."""
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return cls._pool
+
+    @classmethod
+    def shutdown_pool(cls) -> None:
+        """Paylaşılan havuzu kapat (sonraki kullanımda yeniden açılır)."""
+        if cls._pool is not None:
+            cls._pool.shutdown()
+            cls._pool = None
+
+    def _extract_pages_parallel(self, file_path: str, page_count: int, workers: int) -> str:
+        """Sayfaları ardışık bloklar halinde worker'lara böl, sırayı koruyarak birleştir."""
+        step = -(-page_count // workers)  # ceil
+        ranges = [range(i, min(i + step, page_count)) for i in range(0, page_count, step)]
+
+        # Blok sayısı (page_workers) aynı anda çalışan worker sayısını sınırlar
+        results = self._get_pool().map(partial(_extract_page_range, file_path), ranges)
+        pages = [page for block in results for page in block]
+
+        pages.sort(key=lambda item: item[0])
+        for idx, page_text in pages:
+            if not page_text:
+                logger.debug(f"Sayfa {idx + 1} boş veya okunamadı: {file_path}")
+        return "\n".join(page_text for _, page_text in pages if page_text)
\ No newline at end of file
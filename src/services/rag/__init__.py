@@ -2,9 +2,25 @@
 RAG Module Public API
 Dışarıdan sadece bu interface'ler kullanılacak.
 """
-from .pipeline import RAGPipeline
+from typing import TYPE_CHECKING
+
 from .dtos import RAGResponse, RetrievedDocument, SourceType
 
+if TYPE_CHECKING:
+    from .pipeline import RAGPipeline
+
+
+def __getattr__(name: str):
+    """
+    RAGPipeline embedding/Chroma/LLM yığınını çeker; sadece dtos veya
+    retriever kullanan modüller (tools, testler) bu maliyeti ödemesin.
+    """
+    if name == "RAGPipeline":
+        from .pipeline import RAGPipeline
+        return RAGPipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "RAGPipeline",
     "RAGResponse",
@@ -3,12 +3,66 @@ Context Builder
 Tek sorumluluk: Retrieved dokümanları LLM context'ine formatlamak.
 """
 import logging
-from typing import List
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+import tiktoken
 
 from .dtos import RetrievedDocument, SourceType
 
 logger = logging.getLogger(__name__)
 
+# Gemini tokenizer'ı yerelde yok; cl100k Türkçede 4-karakter kuralından çok daha isabetli
+_ENCODING_NAME = "cl100k_base"
+# BPE tablosu ilk kullanımda indirilir; offline host'ta hata kalıcı önbelleklenmez,
+# bu süre sonra tekrar denenir
+_ENCODING_RETRY_SECONDS = 300.0
+
+_encoding = None
+_encoding_failed_at: Optional[float] = None
+
+
+def _get_encoding():
+    """
+    BPE tablosunu yükle (başarılıysa süreç boyunca saklanır).
+    Yüklenemezse None döner (kaba tahmine düşülür) ve _ENCODING_RETRY_SECONDS
+    sonra tekrar denenir; uyarı sadece ilk hatada loglanır.
+    """
+    global _encoding, _encoding_failed_at
+    if _encoding is not None:
+        return _encoding
+    
+    now = time.monotonic()
+    if _encoding_failed_at is not None and now - _encoding_failed_at < _ENCODING_RETRY_SECONDS:
+        return None
+    
+    try:
+        _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+    except Exception as e:
+        if _encoding_failed_at is None:
+            logger.warning(f"⚠️ Tokenizer yüklenemedi, karakter tahmini kullanılacak: {e}")
+        _encoding_failed_at = now
+        return None
+    
+    if _encoding_failed_at is not None:
+        # Tokenizer yokken önbelleğe giren kaba tahminleri at
+        count_tokens.cache_clear()
+        logger.info("✅ Tokenizer yüklendi")
+    return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    Token sayısı. Aynı doküman farklı sorgularda tekrar tekrar
+    getirildiği için sonuçlar içerik bazında önbelleklenir.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
 
 class ContextBuilder:
     """
@@ -18,15 +72,22 @@ class ContextBuilder:
     böylece context window taşmaz.
     """
     
-    SOURCE_LABELS = {
-        SourceType.SCRIPT: "📜 SENARYO",
-        SourceType.IMDB: "🎬 IMDB YORUM",
-        SourceType.TMDB: "🎥 TMDB YORUM",
+    # Kaynak etiketi şablona gömülü; doküman başına tek lookup + format
+    SOURCE_TEMPLATES = {
+        SourceType.SCRIPT: "[📜 SENARYO] {title}\n---\n{content}",
+        SourceType.IMDB: "[🎬 IMDB YORUM] {title}\n---\n{content}",
+        SourceType.TMDB: "[🎥 TMDB YORUM] {title}\n---\n{content}",
     }
+    DEFAULT_TEMPLATE = "[📄 DOKÜMAN] {title}\n---\n{content}"
     
     def __init__(self, max_tokens: int = 3000):
         self._max_tokens = max_tokens
     
+    @property
+    def max_tokens(self) -> int:
+        """Context için token bütçesi."""
+        return self._max_tokens
+    
     def build(self, documents: List[RetrievedDocument]) -> str:
         """
         Dokümanları context string'e dönüştür.
@@ -68,10 +129,9 @@ class ContextBuilder:
     
     def _format_document(self, doc: RetrievedDocument) -> str:
         """Tek dokümanı formatla."""
-        label = self.SOURCE_LABELS.get(doc.source, "📄 DOKÜMAN")
-        
-        return f"[{label}] {doc.movie_title}\n---\n{doc.content}"
+        template = self.SOURCE_TEMPLATES.get(doc.source, self.DEFAULT_TEMPLATE)
+        return template.format(title=doc.movie_title, content=doc.content)
     
     def _estimate_tokens(self, text: str) -> int:
-        """Kaba token tahmini (4 karakter ≈ 1 token)."""
-        return len(text) // 4
\ No newline at end of file
+        """Token sayısı (tokenizer yoksa 4 karakter ≈ 1 token)."""
+        return count_tokens(text)
\ No newline at end of file
@@ -15,6 +15,10 @@ class SourceType(str, Enum):
     SCRIPT = "script"
 
 
+# String → enum çevirisi; her çağrıda Enum.__call__ yerine tek dict lookup
+SOURCE_TYPE_BY_VALUE: Dict[str, SourceType] = {s.value: s for s in SourceType}
+
+
 @dataclass
 class RetrievedDocument:
     """Vector search'ten dönen doküman."""
@@ -24,6 +28,7 @@ class RetrievedDocument:
     distance: float
     metadata: Dict[str, Any] = field(default_factory=dict)
     weighted_score: float = 0.0
+    content_preview: str = ""  # Retriever'da bir kez kesilir (API/LLM için)
 
 
 @dataclass
@@ -3,13 +3,16 @@ Generator (Refactored for Agentic RAG)
 LangChain Chat Model wrapper kullanıyor.
 """
 import logging
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 logger = logging.getLogger(__name__)
 
 
+class GenerationError(Exception):
+    """LLM cevap üretemedi (ağ, kota, model hatası vb.)."""
+
+
 class Generator:
     """
     LangChain tabanlı Generator.
@@ -27,19 +30,22 @@ KURALLAR:
 """
     
     def __init__(self, api_key: str, model: str = "gemini-2.5-flash"):
+        # google-genai/grpc yığını (~750ms) modül import'unda değil,
+        # Generator ilk oluşturulduğunda yüklenir
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         self._llm = ChatGoogleGenerativeAI(
             model=model,
             google_api_key=api_key,
             temperature=0
         )
         self._model_name = model
+        # LCEL zinciri sabit; her generate() çağrısında yeniden kurulmaz
+        self._chain = self._build_chain()
         logger.info(f"🤖 LangChain Generator başlatıldı: {model}")
     
-    def generate(self, query: str, context: str) -> str:
-        """
-        LCEL ile cevap üret.
-        Akış: Prompt -> LLM -> String Parser
-        """
+    def _build_chain(self):
+        """Akış: Prompt -> LLM -> String Parser"""
         prompt = ChatPromptTemplate.from_messages([
             ("system", self.SYSTEM_PROMPT),
             ("user", """KAYNAKLAR:
@@ -50,13 +56,29 @@ KULLANICI SORUSU:
 
 CEVAP:""")
         ])
+        return prompt | self._llm | StrOutputParser()
+    
+    def generate(self, query: str, context: str) -> str:
+        """
+        LCEL ile cevap üret.
         
-        chain = prompt | self._llm | StrOutputParser()
-        
+        Raises:
+            GenerationError: LLM çağrısı başarısız olursa
+        """
+        try:
+            answer = self._chain.invoke({"context": context, "query": query})
+        except Exception as e:
+            logger.error(f"❌ LangChain hatası: {e}")
+            raise GenerationError(type(e).__name__) from e
+        logger.info(f"✅ Cevap üretildi ({len(answer)} karakter)")
+        return answer
+    
+    async def agenerate(self, query: str, context: str) -> str:
+        """generate()'in async versiyonu (LLM çağrısı event loop'u bloklamaz)."""
         try:
-            answer = chain.invoke({"context": context, "query": query})
-            logger.info(f"✅ Cevap üretildi ({len(answer)} karakter)")
-            return answer
+            answer = await self._chain.ainvoke({"context": context, "query": query})
         except Exception as e:
             logger.error(f"❌ LangChain hatası: {e}")
-            return f"Üzgünüm, şu anda cevap üretemiyorum. Hata: {type(e).__name__}"
\ No newline at end of file
+            raise GenerationError(type(e).__name__) from e
+        logger.info(f"✅ Cevap üretildi ({len(answer)} karakter)")
+        return answer
\ No newline at end of file
@@ -4,10 +4,11 @@ Ajanın beyni burada tanımlanır.
 Döngüsel akış: Agent -> (Tool Call?) -> Tools -> Agent
 """
 import logging
-from typing import TypedDict, Annotated, List
+from functools import lru_cache
+from typing import AsyncIterator, TypedDict, Annotated, List
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from langchain_core.messages import AIMessageChunk, BaseMessage, SystemMessage, HumanMessage
 from langgraph.prebuilt import ToolNode, tools_condition
 
 from src.infrastructure.config import get_settings
@@ -90,6 +91,16 @@ def create_graph():
     return workflow.compile()
 
 
+@lru_cache(maxsize=1)
+def get_graph():
+    """
+    Derlenmiş graph'ı process başına bir kez oluştur.
+    LLM, tool binding ve compile sadece ayarlara bağlı; graph state tutmadığı
+    için eşzamanlı sorgular aynı instance'ı paylaşabilir.
+    """
+    return create_graph()
+
+
 # --- 4. KULLANIM FONKSİYONU ---
 def query_agent(question: str) -> str:
     """
@@ -101,7 +112,7 @@ def query_agent(question: str) -> str:
     Returns:
         Agent'ın cevabı
     """
-    graph = create_graph()
+    graph = get_graph()
     
     # Başlangıç state'i
     initial_state = {
@@ -115,4 +126,58 @@ def query_agent(question: str) -> str:
     # Son mesajı al (AI cevabı)
     final_message = result["messages"][-1]
     
-    return final_message.content
\ No newline at end of file
+    return final_message.content
+
+
+async def aquery_agent(question: str) -> str:
+    """
+    query_agent'ın async versiyonu.
+    
+    Graph'ı ainvoke ile çalıştırır; LLM ve tool çağrıları event loop'u
+    bloklamaz (async TMDb tool'u da native olarak await edilir).
+    
+    Args:
+        question: Kullanıcı sorusu
+        
+    Returns:
+        Agent'ın cevabı
+    """
+    graph = get_graph()
+    
+    initial_state = {
+        "messages": [HumanMessage(content=question)]
+    }
+    
+    logger.info(f"🎯 Agent query (async): {question[:50]}...")
+    result = await graph.ainvoke(initial_state)
+    
+    final_message = result["messages"][-1]
+    
+    return final_message.content
+
+
+async def astream_agent(question: str) -> AsyncIterator[str]:
+    """
+    Agent cevabını token token üretir.
+    
+    Sadece 'agent' node'unun metin parçaları döner; tool çağrıları ve
+    tool çıktıları akışa dahil edilmez.
+    
+    Args:
+        question: Kullanıcı sorusu
+        
+    Yields:
+        Cevap metninin parçaları
+    """
+    graph = get_graph()
+    
+    initial_state = {
+        "messages": [HumanMessage(content=question)]
+    }
+    
+    logger.info(f"🎯 Agent query (stream): {question[:50]}...")
+    async for chunk, metadata in graph.astream(initial_state, stream_mode="messages"):
+        if metadata.get("langgraph_node") != "agent":
+            continue
+        if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
@@ -4,16 +4,17 @@ Orchestrator: Tüm bileşenleri koordine eder.
 Kendisi iş yapmaz, delegasyon yapar (Facade Pattern).
 """
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from src.domain.embeddings import EmbeddingService
 from src.infrastructure.vector_store import VectorStoreService
 from src.infrastructure.config import get_settings
 
-from .dtos import RAGResponse, SourceType
+from .dtos import RAGResponse, RetrievedDocument, SourceType
 from .retriever import Retriever
 from .context_builder import ContextBuilder
-from .generator import Generator
+from .generator import GenerationError, Generator
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +32,15 @@ class RAGPipeline:
         self,
         retriever: Optional[Retriever] = None,
         context_builder: Optional[ContextBuilder] = None,
-        generator: Optional[Generator] = None
+        generator: Optional[Generator] = None,
+        response_cache: Optional[ResponseCache] = None
     ):
         """
         Args:
             retriever: Doküman getirici (None ise default oluşturulur)
             context_builder: Context formatlayıcı (None ise default)
             generator: LLM cevap üretici (None ise default)
+            response_cache: Cevap önbelleği (None ise default)
         """
         settings = get_settings()
         
@@ -59,6 +62,7 @@ class RAGPipeline:
         self._retriever = retriever
         self._context_builder = context_builder
         self._generator = generator
+        self._response_cache = response_cache or ResponseCache()
         
         logger.info("🧠 RAG Pipeline başlatıldı")
     
@@ -81,32 +85,129 @@ class RAGPipeline:
         """
         logger.info(f"🎯 Query: {question[:50]}...")
         
-        # 1. Retrieve - Dokümanları getir
+        # 0. Cache - Aynı/benzer soru daha önce cevaplandıysa tüm akışı atla
+        params = (limit, source_filter)
+        cached = self._response_cache.get_exact(question, params)
+        if cached is not None:
+            return cached
+        
+        query_vector = self._retriever.embed_query(question)
+        if query_vector:
+            cached = self._response_cache.get_similar(question, query_vector, params)
+            if cached is not None:
+                return cached
+        
+        # 1. Retrieve - Dokümanları getir (embedding tekrar hesaplanmaz)
         documents = self._retriever.retrieve(
             query=question,
             limit=limit,
-            source_filter=source_filter
+            source_filter=source_filter,
+            query_vector=query_vector,
+            max_tokens=self._context_builder.max_tokens  # sığmayacaklar hiç dönmez
         )
         
         # Boş sonuç kontrolü
         if not documents:
-            return RAGResponse(
-                answer="Bu konuda veritabanımda bilgi bulamadım.",
-                sources=[],
-                query=question
-            )
+            return self._empty_response(question)
         
         # 2. Build Context - Formatla
         context = self._context_builder.build(documents)
         
         # 3. Generate - Cevap üret
-        answer = self._generator.generate(question, context)
+        try:
+            answer = self._generator.generate(question, context)
+        except GenerationError as e:
+            return self._failed_response(question, documents, e)
+        
+        return self._cache_response(question, query_vector, params, documents, answer)
+    
+    async def aquery(
+        self,
+        question: str,
+        limit: int = 10,
+        source_filter: Optional[SourceType] = None
+    ) -> RAGResponse:
+        """
+        query()'nin async versiyonu.
+        
+        Embedding, vector search ve LLM çağrıları event loop'u bloklamaz;
+        API gibi eşzamanlı ortamlarda network bekleyişleri üst üste biner.
+        """
+        logger.info(f"🎯 Query (async): {question[:50]}...")
+        
+        params = (limit, source_filter)
+        cached = self._response_cache.get_exact(question, params)
+        if cached is not None:
+            return cached
+        
+        query_vector = await self._retriever.aembed_query(question)
+        if query_vector:
+            cached = self._response_cache.get_similar(question, query_vector, params)
+            if cached is not None:
+                return cached
+        
+        documents = await self._retriever.aretrieve(
+            query=question,
+            limit=limit,
+            source_filter=source_filter,
+            query_vector=query_vector,
+            max_tokens=self._context_builder.max_tokens
+        )
+        if not documents:
+            return self._empty_response(question)
+        
+        context = self._context_builder.build(documents)
+        try:
+            answer = await self._generator.agenerate(question, context)
+        except GenerationError as e:
+            return self._failed_response(question, documents, e)
         
+        return self._cache_response(question, query_vector, params, documents, answer)
+    
+    @staticmethod
+    def _empty_response(question: str) -> RAGResponse:
+        return RAGResponse(
+            answer="Bu konuda veritabanımda bilgi bulamadım.",
+            sources=[],
+            query=question
+        )
+    
+    @staticmethod
+    def _failed_response(
+        question: str,
+        documents: List[RetrievedDocument],
+        error: GenerationError
+    ) -> RAGResponse:
+        """LLM hatası cevabı; geçici bir hata olabileceği için önbelleğe yazılmaz."""
         return RAGResponse(
+            answer=f"Üzgünüm, şu anda cevap üretemiyorum. Hata: {error}",
+            sources=documents[:5],
+            query=question
+        )
+    
+    def _cache_response(
+        self,
+        question: str,
+        query_vector: Optional[List[float]],
+        params: Tuple,
+        documents: List[RetrievedDocument],
+        answer: str
+    ) -> RAGResponse:
+        """
+        Cevabı oluştur ve önbelleğe yaz.
+        
+        Sadece dokümana dayanan başarılı cevaplar buraya gelir; boş sonuç ve
+        LLM hatası cevapları önbelleğe alınmaz (yeni ingestion'dan veya
+        hata geçtikten sonra gerçek cevap çıkabilir).
+        """
+        response = RAGResponse(
             answer=answer,
             sources=documents[:5],  # İlk 5 kaynağı döndür
             query=question
         )
+        if documents:
+            self._response_cache.put(question, query_vector, params, response)
+        return response
     
     def query_movie(self, movie_title: str, question: str) -> RAGResponse:
         """
@@ -0,0 +1,128 @@
+"""
+Response Cache
+Tek sorumluluk: Daha önce cevaplanmış soruların RAGResponse'larını saklamak.
+
+İki katman:
+- Birebir aynı soru → dict lookup (embedding bile hesaplanmaz)
+- Anlamca aynı soru ("Joker motivasyon?" / "Joker'in motivasyonu") →
+  query embedding'leri arasında cosine benzerliği
+
+Kayıtlar TTL sonunda düşer; ingestion sonrası clear_response_caches() ile
+tüm önbellekler temizlenir (yeni dokümanlar eski cevapları geçersiz kılar).
+"""
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .dtos import RAGResponse
+
+logger = logging.getLogger(__name__)
+
+# Ingestion sonrası toplu temizlik için canlı önbellekler
+_instances: "weakref.WeakSet[ResponseCache]" = weakref.WeakSet()
+
+
+def clear_response_caches() -> None:
+    """Süreçteki tüm ResponseCache'leri temizle (ingestion sonrası)."""
+    for cache in list(_instances):
+        cache.clear()
+
+
+class ResponseCache:
+    """
+    LRU sınırlı, iki katmanlı RAG cevap önbelleği.
+
+    Kayıtlar sorgu parametreleriyle (limit, kaynak filtresi) birlikte tutulur;
+    farklı filtreyle sorulan aynı soru önbellekten dönmez. ttl saniyeden
+    eski kayıtlar dönmez ve ilk erişimde silinir.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        similarity_threshold: float = 0.97,
+        ttl: float = 3600.0
+    ):
+        self._max_entries = max_entries
+        self._threshold = similarity_threshold
+        self._ttl = ttl
+        # (params, soru) → (kayıt zamanı, birim query vektörü, cevap)
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[float, Optional[np.ndarray], RAGResponse]]" = OrderedDict()
+        _instances.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Tüm kayıtları sil."""
+        self._entries.clear()
+
+    def get_exact(self, question: str, params: Hashable) -> Optional[RAGResponse]:
+        """Birebir aynı soru için kayıtlı cevap."""
+        key = (params, question)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[0]):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        logger.info("⚡ Cevap önbellekten (birebir)")
+        return entry[2]
+
+    def get_similar(
+        self,
+        question: str,
+        query_vector: List[float],
+        params: Hashable
+    ) -> Optional[RAGResponse]:
+        """Anlamca yeterince yakın bir sorunun cevabı (soru metni yenisiyle değişir)."""
+        self._evict_expired()
+        keys = [k for k, (_, vec, _) in self._entries.items() if k[0] == params and vec is not None]
+        if not keys:
+            return None
+
+        matrix = np.stack([self._entries[k][1] for k in keys])
+        scores = matrix @ self._normalize(query_vector)
+        best = int(np.argmax(scores))
+        if scores[best] < self._threshold:
+            return None
+
+        key = keys[best]
+        self._entries.move_to_end(key)
+        logger.info(f"⚡ Cevap önbellekten (benzerlik {scores[best]:.3f})")
+        return replace(self._entries[key][2], query=question)
+
+    def put(
+        self,
+        question: str,
+        query_vector: Optional[List[float]],
+        params: Hashable,
+        response: RAGResponse
+    ) -> None:
+        """Cevabı kaydet; kapasite aşılırsa en eski kullanılanı çıkar."""
+        vector = self._normalize(query_vector) if query_vector else None
+        key = (params, question)
+        self._entries[key] = (time.monotonic(), vector, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at >= self._ttl
+
+    def _evict_expired(self) -> None:
+        """Süresi dolan kayıtları sil."""
+        for key in [k for k, entry in self._entries.items() if self._expired(entry[0])]:
+            del self._entries[key]
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
@@ -2,10 +2,14 @@
 Retriever
 Tek sorumluluk: Vector store'dan ilgili dokümanları getirmek.
 """
+import asyncio
 import logging
 from typing import List, Optional, Protocol
 
-from .dtos import RetrievedDocument, SourceType
+import numpy as np
+
+from .context_builder import count_tokens
+from .dtos import RetrievedDocument, SourceType, SOURCE_TYPE_BY_VALUE
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,13 @@ class VectorStoreProvider(Protocol):
         limit: int,
         filter: Optional[dict]
     ) -> List[dict]: ...
+    
+    async def asearch(
+        self,
+        query_vector: List[float],
+        limit: int,
+        filter: Optional[dict]
+    ) -> List[dict]: ...
 
 
 class Retriever:
@@ -40,6 +51,8 @@ class Retriever:
         SourceType.TMDB: 0.8,     # TMDb yorumları
     }
     
+    PREVIEW_LENGTH = 500  # content_preview karakter sınırı
+    
     def __init__(
         self,
         embedding_provider: EmbeddingProvider,
@@ -48,11 +61,21 @@ class Retriever:
         self._embedding = embedding_provider
         self._vector_store = vector_store
     
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        """Sorgunun embedding'i (çağıran önbellek vb. için yeniden kullanabilir)."""
+        return self._embedding.embed_query(query)
+    
+    async def aembed_query(self, query: str) -> Optional[List[float]]:
+        """embed_query'nin async versiyonu (senkron SDK çağrısı thread'de)."""
+        return await asyncio.to_thread(self._embedding.embed_query, query)
+    
     def retrieve(
         self,
         query: str,
         limit: int = 10,
-        source_filter: Optional[SourceType] = None
+        source_filter: Optional[SourceType] = None,
+        query_vector: Optional[List[float]] = None,
+        max_tokens: Optional[int] = None
     ) -> List[RetrievedDocument]:
         """
         Sorguya en yakın dokümanları getir.
@@ -61,28 +84,70 @@ class Retriever:
             query: Kullanıcı sorusu
             limit: Maksimum sonuç sayısı
             source_filter: Belirli kaynaktan çek (opsiyonel)
+            query_vector: Önceden hesaplanmış query embedding'i (opsiyonel)
+            max_tokens: Context token bütçesi; sığmayan dokümanlar dönmez (opsiyonel)
             
         Returns:
             Ağırlıklı skora göre sıralı dokümanlar
         """
         # 1. Query → Vector
-        query_vector = self._embedding.embed_query(query)
+        if query_vector is None:
+            query_vector = self.embed_query(query)
         if not query_vector:
             logger.error("❌ Query embedding başarısız")
             return []
         
         # 2. Vector Search
-        where_filter = {"source": source_filter.value} if source_filter else None
-        
         results = self._vector_store.search(
             query_vector=query_vector,
             limit=limit,
-            filter=where_filter
+            filter=self._where_filter(source_filter)
         )
         
         # 3. Parse & Weight
+        return self._rank(results, max_tokens)
+    
+    async def aretrieve(
+        self,
+        query: str,
+        limit: int = 10,
+        source_filter: Optional[SourceType] = None,
+        query_vector: Optional[List[float]] = None,
+        max_tokens: Optional[int] = None
+    ) -> List[RetrievedDocument]:
+        """
+        retrieve()'ün async versiyonu.
+        
+        Embedding ve vector search event loop'u bloklamaz; eşzamanlı
+        sorgular vector store'un asearch micro-batch'ine katılır.
+        """
+        if query_vector is None:
+            query_vector = await self.aembed_query(query)
+        if not query_vector:
+            logger.error("❌ Query embedding başarısız")
+            return []
+        
+        results = await self._vector_store.asearch(
+            query_vector=query_vector,
+            limit=limit,
+            filter=self._where_filter(source_filter)
+        )
+        return self._rank(results, max_tokens)
+    
+    @staticmethod
+    def _where_filter(source_filter: Optional[SourceType]) -> Optional[dict]:
+        return {"source": source_filter.value} if source_filter else None
+    
+    def _rank(
+        self,
+        results: List[dict],
+        max_tokens: Optional[int]
+    ) -> List[RetrievedDocument]:
+        """Ham sonuçları parse et, ağırlıklandır, bütçeye göre kes."""
         documents = self._parse_results(results)
         documents = self._apply_weights(documents)
+        if max_tokens is not None:
+            documents = self._fit_budget(documents, max_tokens)
         
         logger.info(f"🔍 {len(documents)} doküman bulundu")
         return documents
@@ -93,32 +158,56 @@ class Retriever:
         
         for r in results:
             meta = r.get("metadata", {})
-            source_str = meta.get("source", "tmdb")
-            
-            try:
-                source = SourceType(source_str)
-            except ValueError:
-                source = SourceType.TMDB
+            source = SOURCE_TYPE_BY_VALUE.get(meta.get("source"), SourceType.TMDB)
             
+            content = r.get("document", "")
             doc = RetrievedDocument(
-                content=r.get("document", ""),
+                content=content,
                 source=source,
                 movie_title=meta.get("movie_title", "Unknown"),
                 distance=r.get("distance", 1.0),
-                metadata=meta
+                metadata=meta,
+                content_preview=content[:self.PREVIEW_LENGTH]
             )
             documents.append(doc)
         
         return documents
     
+    def _fit_budget(
+        self,
+        documents: List[RetrievedDocument],
+        max_tokens: int
+    ) -> List[RetrievedDocument]:
+        """
+        Skor sırasıyla bütçeye sığan dokümanlar; ilk taşanda durur.
+        ContextBuilder ile aynı sayımı kullanır (sonuçlar önbellekte paylaşılır).
+        """
+        used = 0
+        for i, doc in enumerate(documents):
+            used += count_tokens(doc.content)
+            if used > max_tokens:
+                return documents[:i]
+        return documents
+    
     def _apply_weights(
         self,
         documents: List[RetrievedDocument]
     ) -> List[RetrievedDocument]:
         """Kaynak ağırlıklarını uygula ve sırala."""
-        for doc in documents:
-            weight = self.SOURCE_WEIGHTS.get(doc.source, 0.5)
-            doc.weighted_score = doc.distance * (1 / weight)
+        if not documents:
+            return documents
+        
+        # Skor ve sıralama tek numpy geçişinde (doküman başına Python key çağrısı yok)
+        count = len(documents)
+        distances = np.fromiter((d.distance for d in documents), dtype=np.float64, count=count)
+        weights = np.fromiter(
+            (self.SOURCE_WEIGHTS.get(d.source, 0.5) for d in documents),
+            dtype=np.float64,
+            count=count
+        )
+        scores = distances / weights
+        order = np.argsort(scores, kind="stable")  # eşit skorlarda arama sırası korunur
         
-        documents.sort(key=lambda x: x.weighted_score)
-        return documents
\ No newline at end of file
+        for doc, score in zip(documents, scores.tolist()):
+            doc.weighted_score = score
+        return [documents[i] for i in order.tolist()]
\ No newline at end of file
@@ -3,6 +3,7 @@ Agent Tools
 Mevcut servisleri (Retriever, TMDb) LLM'in kullanabileceği 'Tool'lara dönüştürür.
 """
 import logging
+from functools import lru_cache
 from typing import Optional
 from langchain_core.tools import tool
 
@@ -10,27 +11,23 @@ from langchain_core.tools import tool
 from src.infrastructure.vector_store import VectorStoreService
 from src.domain.embeddings import EmbeddingService
 from src.services.rag.retriever import Retriever
-from src.services.rag.dtos import SourceType
-from src.services.tmdb_service import tmdb_service
+from src.services.rag.dtos import SOURCE_TYPE_BY_VALUE
+from src.services.tmdb_service import get_tmdb_service
 
 logger = logging.getLogger(__name__)
 
 # --- BAĞIMLILIKLARI HAZIRLA ---
-_retriever = None
-
-def _get_retriever():
+@lru_cache(maxsize=1)
+def _get_retriever() -> Retriever:
     """Lazy initialization for retriever."""
-    global _retriever
-    if _retriever is None:
-        embedding_service = EmbeddingService()
-        vector_store = VectorStoreService()
-        _retriever = Retriever(embedding_service, vector_store)
-    return _retriever
+    embedding_service = EmbeddingService()
+    vector_store = VectorStoreService()
+    return Retriever(embedding_service, vector_store)
 
 
 # --- TOOL 1: VEKTÖR ARAMA ---
 @tool
-def search_vector_db(query: str, source: Optional[str] = None) -> str:
+async def search_vector_db(query: str, source: Optional[str] = None) -> str:
     """
     Sinema veritabanında (Senaryolar, IMDb yorumları, TMDb incelemeleri) semantik arama yapar.
     
@@ -45,15 +42,11 @@ def search_vector_db(query: str, source: Optional[str] = None) -> str:
     """
     retriever = _get_retriever()
     
-    # Enum dönüşümü
-    source_enum = None
-    if source:
-        try:
-            source_enum = SourceType(source.lower())
-        except ValueError:
-            pass  # Geçersiz source gelirse filtresiz ara
+    # Enum dönüşümü (geçersiz source gelirse filtresiz ara)
+    source_enum = SOURCE_TYPE_BY_VALUE.get(source.lower()) if source else None
 
-    results = retriever.retrieve(query, limit=5, source_filter=source_enum)
+    # Embedding + arama event loop'u bloklamadan (ajan ainvoke/astream ile çalışır)
+    results = await retriever.aretrieve(query, limit=5, source_filter=source_enum)
     
     if not results:
         return "Veritabanında ilgili kayıt bulunamadı."
@@ -63,7 +56,7 @@ def search_vector_db(query: str, source: Optional[str] = None) -> str:
     for doc in results:
         formatted_results.append(
             f"Kaynak: {doc.source.value.upper()} | Film: {doc.movie_title}\n"
-            f"İçerik: {doc.content[:500]}\n---"
+            f"İçerik: {doc.content_preview}\n---"
         )
     
     return "\n".join(formatted_results)
@@ -79,6 +72,8 @@ async def search_tmdb_metadata(query: str) -> str:
     Args:
         query: Film adı (örn: "Inception", "The Dark Knight").
     """
+    tmdb_service = get_tmdb_service()
+    
     # 1. Filmi Ara (ID bul)
     movie_id = await tmdb_service.search_movie(query)
     if not movie_id:
@@ -1,33 +1,107 @@
 # Sentiment Client
 import os
+import asyncio
+import importlib.util
 import logging
-import requests
-from requests import Response
-from typing import List, Dict, Any, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from tenacity import RetryCallState, retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
 
 # Logger yapılandırması
 logger = logging.getLogger(__name__)
 
+# Her zaman tekrar denenen ağ hataları (timeout, bağlantı kopması vb.)
+_RETRY_TYPES = (httpx.TransportError,)
+
 def _should_retry(exc: Exception) -> bool:
     """
     Retry Stratejisi:
     - Connection/Timeout: EVET
     - HTTP 5xx: EVET
-    - HTTP 4xx: HAYIR
+    - HTTP 429 (rate limit): EVET
+    - Diğer HTTP 4xx: HAYIR
     """
-    if isinstance(exc, requests.Timeout):
-        return True
-    if isinstance(exc, requests.ConnectionError):
+    if isinstance(exc, _RETRY_TYPES):
         return True
-    if isinstance(exc, requests.HTTPError):
-        resp: Optional[Response] = getattr(exc, "response", None)
-        if resp is not None and 500 <= resp.status_code < 600:
-            return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or 500 <= status < 600
     return False
 
+MAX_RETRY_AFTER_SECONDS = 30
+
+# Jitter: paralel çağıranların retry'ları aynı anda servise yığılmasın
+_backoff = wait_exponential_jitter(initial=1, max=8, jitter=0.5)
+
+def _retry_after(exc: Optional[BaseException]) -> Optional[float]:
+    """429/503 cevabındaki Retry-After (saniye) değeri; yoksa None."""
+    resp = getattr(exc, "response", None)
+    if resp is None or resp.status_code not in (429, 503):
+        return None
+    try:
+        seconds = float(resp.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None  # Header yok veya HTTP-date formatında
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+def _wait_before_retry(retry_state: RetryCallState) -> float:
+    """Servis bekleme süresi bildirdiyse ona uy, yoksa jitter'lı exponential backoff."""
+    seconds = _retry_after(retry_state.outcome.exception())
+    return _backoff(retry_state) if seconds is None else seconds
+
+# Fail-open sonucu; her eleman için ayrı kopya döner (çağıranlar değiştirebilir/serialize edebilir)
+_NEUTRAL: Dict[str, Any] = {"sentiment": "Nötr", "confidence": 0.0}
+
+def _neutral(count: int) -> List[Dict[str, Any]]:
+    """count adet bağımsız Nötr sonuç."""
+    return [dict(_NEUTRAL) for _ in range(count)]
+
+# HTTP/2 (tek bağlantıda çoklu istek) yalnızca 'h2' paketi kuruluysa açılır
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+def _fit_length(results: List[Dict[str, Any]], expected: int) -> List[Dict[str, Any]]:
+    """Servis eksik/fazla sonuç dönerse listeyi Nötr ile tamamla veya kırp."""
+    if len(results) != expected:
+        logger.error(
+            f"Mismatch! Giden: {expected}, Gelen: {len(results)}. "
+            "Eksikler Nötr ile dolduruluyor."
+        )
+        results = results[:expected] + _neutral(expected - len(results))
+    return results
+
+def _normalize_texts(texts: List[Any]) -> List[str]:
+    """None → "", str olmayanlar → str (zaten str olanlara dokunulmaz)."""
+    return ["" if t is None else t if type(t) is str else str(t) for t in texts]
+
+def _scatter(unique: List[str], results: List[Dict[str, Any]], texts: List[str]) -> List[Dict[str, Any]]:
+    """Tekil metinlerin sonuçlarını orijinal (tekrarlı) sıraya dağıt."""
+    if len(unique) == len(texts):
+        return results
+    by_text = dict(zip(unique, results))
+    return [by_text[t] for t in texts]
+
+def _batch_bounds(texts: List[str], batch_size: int, max_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Metinleri (start, end) aralıklarına böl: her batch en fazla batch_size metin
+    ve (tek metin sınırı aşmıyorsa) en fazla max_bytes UTF-8 byte taşır.
+    """
+    bounds: List[Tuple[int, int]] = []
+    start, size = 0, 0
+    for i, t in enumerate(texts):
+        n = len(t.encode("utf-8"))
+        if i > start and (i - start >= batch_size or size + n > max_bytes):
+            bounds.append((start, i))
+            start, size = i, 0
+        size += n
+    bounds.append((start, len(texts)))
+    return bounds
+
 class SentimentClient:
     MAX_BATCH_SIZE = 100  # Servis limiti
+    MAX_BATCH_BYTES = 256 * 1024  # Tek istekteki toplam metin boyutu sınırı
+    MAX_CONCURRENT_BATCHES = 8  # Servisi boğmamak için eşzamanlı istek sınırı
     
     def __init__(
         self,
@@ -44,54 +118,69 @@ class SentimentClient:
         self.timeout_seconds = timeout_seconds
         self.fail_open = fail_open 
 
-        # Connection Pooling (Performans artışı)
-        self.session = requests.Session()
+        # Connection Pooling: havuz eşzamanlı batch sayısı kadar keep-alive
+        # bağlantı tutar; 'h2' kuruluysa batch'ler tek HTTP/2 bağlantısında çoklanır.
+        # Gövde orjson ile hazır byte olarak gider; tip header'ı bir kez set edilir.
+        self.client = httpx.Client(
+            timeout=self.timeout_seconds,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=self.MAX_CONCURRENT_BATCHES),
+            headers={"Content-Type": "application/json"}
+        )
+        # Async yol için paylaşılan client (ilk kullanımda açılır)
+        self._async_client: Optional[httpx.AsyncClient] = None
 
     def close(self):
-        """Client kapatıldığında session'ı temizle."""
-        self.session.close()
-        logger.debug("Session kapatıldı.")
+        """Client kapatıldığında bağlantı havuzunu temizle."""
+        self.client.close()
+        logger.debug("HTTP client kapatıldı.")
+
+    async def aclose(self):
+        """Async HTTP client'ı kapat (sonraki istekte yeniden açılır)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
 
     def __enter__(self):
         """Context manager desteği."""
         return self
 
     def __exit__(self, *args):
-        """Context manager çıkışında session'ı kapat."""
+        """Context manager çıkışında HTTP client'ı kapat."""
         self.close()
 
     def check_health(self) -> bool:
         """Servis ayakta mı kontrol et (opsiyonel, debugging için)."""
         try:
-            r = self.session.get(self.health_url, timeout=2)
+            r = self.client.get(self.health_url, timeout=2)
             return r.status_code == 200
-        except requests.RequestException:
+        except httpx.HTTPError:
             logger.warning(f"Sentiment servisine ulaşılamıyor ({self.base_url}).")
             return False
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=8),
+        wait=_wait_before_retry,
         retry=retry_if_exception(_should_retry),
         reraise=True,
     )
     def _send_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
         """Tek batch'i servise gönder (retry mantığı burada)."""
-        payload = {"texts": texts}
+        # orjson.dumps stdlib json'dan hızlı ve doğrudan bytes üretir
+        payload = orjson.dumps({"texts": texts})
         
-        r = self.session.post(self.batch_url, json=payload, timeout=self.timeout_seconds)
+        r = self.client.post(self.batch_url, content=payload)
 
-        try:
-            r.raise_for_status()
-        except requests.HTTPError as e:
+        if r.is_error:
             # 4xx hatalar WARNING (client hatası, retry edilmez)
             if 400 <= r.status_code < 500:
                 logger.warning(f"Client hatası: {r.status_code} - Body: {r.text[:200]}")
             else:
                 logger.error(f"Server hatası: {r.status_code} - Body: {r.text[:200]}")
-            raise 
+            r.raise_for_status()
 
-        data = r.json()
+        # orjson ham byte'ları doğrudan parse eder (r.json()'dan hızlı)
+        data = orjson.loads(r.content)
         results = data.get("results", [])
         
         if not isinstance(results, list):
@@ -99,16 +188,22 @@ class SentimentClient:
 
         return results
 
-    def analyze_batch(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+    def analyze_batch(
+        self,
+        texts: List[str],
+        batch_size: int = MAX_BATCH_SIZE,
+        max_bytes: int = MAX_BATCH_BYTES
+    ) -> List[Dict[str, Any]]:
         """
         Büyük listeyi parçalar, yönetir ve hataları tolere eder.
         
         Args:
             texts: Analiz edilecek metinler
-            batch_size: Her seferde kaç metin gönderilecek (max 100)
+            batch_size: Her seferde en fazla kaç metin gönderilecek (max 100)
+            max_bytes: Tek istekte gönderilecek toplam metin boyutu (byte)
             
         Returns:
-            Her metin için sentiment sonucu (başarısızlıkta Nötr döner)
+            Her metin için sentiment sonucu (başarısız metinlerin her biri kendi Nötr dict'ini alır)
         """
         if not texts:
             return []
@@ -117,44 +212,122 @@ class SentimentClient:
         if not 0 < batch_size <= self.MAX_BATCH_SIZE:
             raise ValueError(f"Batch size 1-{self.MAX_BATCH_SIZE} arasında olmalı. Gelen: {batch_size}")
 
-        all_results: List[Dict[str, Any]] = []
-        total = len(texts)
-        logger.info(f"Toplam {total} metin analiz edilecek. Batch size: {batch_size}")
+        texts_norm = _normalize_texts(texts)
+        # Tekrarlanan metinler ("", "OK" vb.) servise bir kez gider
+        unique = list(dict.fromkeys(texts_norm))
+        total = len(unique)
+        logger.info(f"Toplam {total} tekil metin analiz edilecek. Batch size: {batch_size}")
 
-        for i in range(0, total, batch_size):
-            chunk = texts[i : i + batch_size]
-            chunk_norm = [("" if t is None else str(t)) for t in chunk]
+        def run(bounds: Tuple[int, int]) -> List[Dict[str, Any]]:
+            i, end = bounds
+            chunk_norm = unique[i:end]
 
             try:
                 batch_results = self._send_batch(chunk_norm)
 
                 # Gelen/giden uzunluk kontrolü
-                if len(batch_results) != len(chunk_norm):
-                    logger.error(
-                        f"Mismatch! Giden: {len(chunk_norm)}, Gelen: {len(batch_results)}. "
-                        "Eksikler Nötr ile dolduruluyor."
-                    )
-                    while len(batch_results) < len(chunk_norm):
-                        batch_results.append({"sentiment": "Nötr", "confidence": 0.0})
-                    batch_results = batch_results[:len(chunk_norm)]
-
-                all_results.extend(batch_results)
-                logger.info(f"{min(i + batch_size, total)}/{total} işlendi.")
-
-            except (requests.RequestException, ValueError, KeyError) as e:
+                batch_results = _fit_length(batch_results, len(chunk_norm))
+
+                logger.info(f"Batch {i}-{end}/{total} işlendi.")
+                return batch_results
+
+            except (httpx.HTTPError, ValueError, KeyError) as e:
                 # Beklenen hatalar: Network, JSON parse, key eksikliği
-                logger.warning(f"Batch {i}-{min(i+batch_size, total)} başarısız: {e}. Nötr atanıyor.")
+                logger.warning(f"Batch {i}-{end} başarısız: {e}. Nötr atanıyor.")
                 
                 if not self.fail_open:
                     logger.error("Fail-open kapalı, hata yukarı fırlatılıyor.")
                     raise
                     
-                all_results.extend([{"sentiment": "Nötr", "confidence": 0.0} for _ in chunk_norm])
+                return _neutral(len(chunk_norm))
                 
             except Exception as e:
                 # Beklenmeyen kritik hatalar (memory, assertion vb.)
                 logger.critical(f"Kritik hata (Batch {i}): {e}. Pipeline durduruluyor.")
                 raise
 
+        bounds = _batch_bounds(unique, batch_size, max_bytes)
+        if len(bounds) == 1:
+            batches = [run(bounds[0])]
+        else:
+            # Batch'ler paylaşılan client üzerinden eşzamanlı gider; map sırayı korur
+            with ThreadPoolExecutor(max_workers=min(self.MAX_CONCURRENT_BATCHES, len(bounds))) as pool:
+                batches = list(pool.map(run, bounds))
+
+        all_results = _scatter(unique, [result for batch in batches for result in batch], texts_norm)
         logger.info(f"Tüm batch işlemi tamamlandı. Toplam sonuç: {len(all_results)}")
-        return all_results
\ No newline at end of file
+        return all_results
+
+    # ------------------------------------------------------------------
+    # ASYNC YOL (event loop'u bloklamadan)
+    # ------------------------------------------------------------------
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=_wait_before_retry,
+        retry=retry_if_exception(_should_retry),
+        reraise=True,
+    )
+    async def _send_batch_async(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """_send_batch'in httpx.AsyncClient ile çalışan versiyonu."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout_seconds,
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=self.MAX_CONCURRENT_BATCHES),
+                headers={"Content-Type": "application/json"}
+            )
+
+        r = await self._async_client.post(self.batch_url, content=orjson.dumps({"texts": texts}))
+        if r.is_error:
+            if 400 <= r.status_code < 500:
+                logger.warning(f"Client hatası: {r.status_code} - Body: {r.text[:200]}")
+            else:
+                logger.error(f"Server hatası: {r.status_code} - Body: {r.text[:200]}")
+            r.raise_for_status()
+
+        results = orjson.loads(r.content).get("results", [])
+        if not isinstance(results, list):
+            raise ValueError("Servisten beklenmeyen format: 'results' bir liste değil.")
+
+        return results
+
+    async def analyze_batch_async(
+        self,
+        texts: List[str],
+        batch_size: int = MAX_BATCH_SIZE,
+        max_bytes: int = MAX_BATCH_BYTES
+    ) -> List[Dict[str, Any]]:
+        """
+        analyze_batch'in async versiyonu.
+
+        Varsayılan olarak servis limiti kadar metin tek istekte gider;
+        birden fazla batch gerekiyorsa istekler eşzamanlı gönderilir (senkron
+        yol gibi en fazla MAX_CONCURRENT_BATCHES istek aynı anda uçuşta olur).
+        Hata toleransı (fail_open) analyze_batch ile aynıdır.
+        """
+        if not texts:
+            return []
+
+        if not 0 < batch_size <= self.MAX_BATCH_SIZE:
+            raise ValueError(f"Batch size 1-{self.MAX_BATCH_SIZE} arasında olmalı. Gelen: {batch_size}")
+
+        texts_norm = _normalize_texts(texts)
+        unique = list(dict.fromkeys(texts_norm))
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_BATCHES)
+
+        async def run(start: int, end: int) -> List[Dict[str, Any]]:
+            chunk_norm = unique[start:end]
+            try:
+                async with semaphore:
+                    results = await self._send_batch_async(chunk_norm)
+                return _fit_length(results, len(chunk_norm))
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                logger.warning(f"Batch {start}-{start + len(chunk_norm)} başarısız: {e}. Nötr atanıyor.")
+                if not self.fail_open:
+                    logger.error("Fail-open kapalı, hata yukarı fırlatılıyor.")
+                    raise
+                return _neutral(len(chunk_norm))
+
+        batches = await asyncio.gather(*(run(s, e) for s, e in _batch_bounds(unique, batch_size, max_bytes)))
+        return _scatter(unique, [result for batch in batches for result in batch], texts_norm)
\ No newline at end of file
@@ -3,50 +3,110 @@
 Application Layer: TMDb API Service
 Handling TMDb API interactions properly mapped to domain models.
 """
+import logging
 import httpx
-from typing import Optional, List
-from aiolimiter import AsyncLimiter
+import orjson
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, List, Tuple
 import asyncio
+from functools import lru_cache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
 # Config'ten anahtarları, Model'den boş kutuları alıyoruz
 from src.infrastructure.config import get_settings
+from src.infrastructure.rate_limiter import AdaptiveRateLimiter
 from src.domain.models import Movie, TMDbReview, DataSource
 
+logger = logging.getLogger(__name__)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Bağlantı/timeout hataları ve 429/5xx tekrar denenir; 404 gibi 4xx denenmez."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
 class TMDbService:
+    # Slug dönüşümü tek geçişte: boşluk → '-', ':' silinir
+    _SLUG_TABLE = str.maketrans({" ": "-", ":": None})
+    
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.TMDB_BASE_URL
         
         # ROADMAP HEDEFİ: Rate Limiting (Saniyede max 10 istek)
-        self.rate_limiter = AsyncLimiter(max_rate=10, time_period=1.0)
+        # 429/5xx gelirse hız düşer, temiz trafikte tekrar 10'a çıkar
+        self.rate_limiter = AdaptiveRateLimiter(max_rate=10, min_rate=2, time_period=1.0)
         
         self.headers = {
             "Authorization": f"Bearer {self.settings.TMDB_API_KEY}",
             "accept": "application/json"
         }
         self.default_params = {"language": "tr-TR"}
+        # Tüm isteklerin paylaştığı keep-alive client (ilk istekte açılır)
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Paylaşılan AsyncClient; TCP+TLS bağlantısı istekler arasında korunur."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=10.0,
+                headers=self.headers,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Paylaşılan client'ı kapat (sonraki istekte yeniden açılır)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def __aenter__(self) -> "TMDbService":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential_jitter(initial=0.5, max=4, jitter=0.5),
+        retry=retry_if_exception(_is_transient),
+        reraise=True,
+    )
+    async def _get(self, endpoint: str, params: dict) -> httpx.Response:
+        """Tek GET denemesi; her deneme limiter'dan ayrı izin alır."""
+        async with self.rate_limiter:
+            response = await self._get_client().get(endpoint, params=params)
+        if response.status_code == 429 or response.status_code >= 500:
+            self.rate_limiter.record_throttle()
+        # Hata varsa (404, 500) sessiz kalma, patlat ki yakalayalım
+        response.raise_for_status()
+        return response
     
     async def _request(self, endpoint: str, params: dict = None) -> Optional[dict]:
-        """Tüm isteklerin geçtiği ana kapı."""
+        """Tüm isteklerin geçtiği ana kapı (HTTP/ağ hatalarında None döner)."""
         if params is None: params = {}
         params = {**self.default_params, **params}
         
-        # Limiter kapısı
-        async with self.rate_limiter:
-            try:
-                # Tarayıcıyı aç (Client) ve iş bitince kapat (Context Manager)
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        f"{self.base_url}{endpoint}",
-                        headers=self.headers,
-                        params=params
-                    )
-                    # Hata varsa (404, 500) sessiz kalma, patlat ki yakalayalım
-                    response.raise_for_status()
-                    return response.json()
-            except Exception as e:
-                print(f"⚠️ TMDb Error ({endpoint}): {e}")
-                return None
+        try:
+            response = await self._get(endpoint, params)
+            # orjson ham byte'ları doğrudan parse eder (json.loads'tan hızlı)
+            data = orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            # 404 beklenen bir durum (film/yorum yok); gürültü yapma
+            if e.response.status_code != 404:
+                logger.warning("⚠️ TMDb Error (%s): %s", endpoint, e)
+            return None
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.warning("⚠️ TMDb Error (%s): %s", endpoint, e)
+            return None
+        
+        self.rate_limiter.record_success()
+        return data
     
     async def search_movie(self, query: str) -> Optional[int]:
         """İsimden arama yapar, ID döner."""
@@ -70,7 +130,7 @@ class TMDbService:
                     break
         
         # 2. Slug ID Oluştur (the-dark-knight-2008)
-        title_slug = data.get("title", "").lower().replace(" ", "-").replace(":", "")
+        title_slug = data.get("title", "").lower().translate(self._SLUG_TABLE)
         year_str = data.get("release_date", "")[:4] if data.get("release_date") else ""
         movie_slug = f"{title_slug}-{year_str}" if year_str else title_slug
         
@@ -92,29 +152,70 @@ class TMDbService:
             runtime=data.get("runtime")
         )
 
+    async def get_movie_bundle(
+        self,
+        tmdb_id: int,
+        review_pages: int = 1
+    ) -> Tuple[Optional[Movie], List[TMDbReview]]:
+        """
+        Film detayı ve yorumları birlikte çeker.
+        
+        İki istek eşzamanlı gider. append_to_response=reviews kullanılmaz,
+        çünkü yorumlar o zaman detay isteğinin dili (tr-TR) ile filtrelenirdi.
+        """
+        movie, reviews = await asyncio.gather(
+            self.get_movie(tmdb_id),
+            self.get_reviews(tmdb_id, max_pages=review_pages)
+        )
+        return movie, reviews
+
     async def get_reviews(self, tmdb_id: int, max_pages: int = 3) -> List[TMDbReview]:
         """Yorumları çeker ve 'TMDbReview' modeline çevirir."""
-        reviews = []
-        for page in range(1, max_pages + 1):
+        return [review async for review in self.get_reviews_stream(tmdb_id, max_pages)]
 
-            params = {"page": page, "language": "en-US"}
-            data = await self._request(f"/movie/{tmdb_id}/reviews", params)
-            if not data or not data.get("results"): break
-            
-            for item in data["results"]:
-                if not item.get("content"): continue
-                
-                reviews.append(TMDbReview(
-                    review_id=item["id"],
-                    movie_id=str(tmdb_id),
-                    author=item["author"],
-                    rating=item.get("author_details", {}).get("rating"),
-                    text=item["content"],
-                    source=DataSource.TMDB
-                ))
+    async def get_reviews_stream(self, tmdb_id: int, max_pages: int = 3) -> AsyncIterator[TMDbReview]:
+        """Yorumları sayfalar geldikçe sırayla yield eder (tüm sayfalar beklenmez)."""
+        endpoint = f"/movie/{tmdb_id}/reviews"
+        
+        # 1. sayfa toplam sayfa sayısını öğrenmek için tek başına çekilir
+        first = await self._request(endpoint, {"page": 1, "language": "en-US"})
+        if not first or not first.get("results"): return
+        
+        # Kalan sayfalar hemen başlatılır; hız sınırını _request'teki limiter korur
+        pages = min(max_pages, first.get("total_pages", 1))
+        tasks = [
+            asyncio.create_task(self._request(endpoint, {"page": page, "language": "en-US"}))
+            for page in range(2, pages + 1)
+        ]
+        try:
+            for review in self._parse_reviews(tmdb_id, first):
+                yield review
+            for task in tasks:
+                data = await task
+                # Boş/hatalı sayfada dur (sıralı akıştaki davranış)
+                if not data or not data.get("results"): break
+                for review in self._parse_reviews(tmdb_id, data):
+                    yield review
+        finally:
+            # Tüketici erken bıraktıysa bekleyen sayfaları iptal et
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _parse_reviews(tmdb_id: int, data: Dict[str, Any]) -> Iterator[TMDbReview]:
+        for item in data["results"]:
+            if not item.get("content"): continue
             
-            if page >= data.get("total_pages", 0): break
-        return reviews
+            yield TMDbReview(
+                review_id=item["id"],
+                movie_id=str(tmdb_id),
+                author=item["author"],
+                rating=item.get("author_details", {}).get("rating"),
+                text=item["content"],
+                source=DataSource.TMDB
+            )
 
-# Singleton
-tmdb_service = TMDbService()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_tmdb_service() -> TMDbService:
+    """Paylaşılan TMDbService (import anında değil, ilk kullanımda oluşturulur)."""
+    return TMDbService()
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Ingestion Workers
+Uzun süren ingestion işleri. API katmanından bağımsızdır;
+BackgroundTasks, CLI script'i veya harici bir task queue worker'ı
+aynı fonksiyonu çağırabilir.
+"""
+import logging
+
+from src.services.ingestion_coordinator import IngestionCoordinator
+
+logger = logging.getLogger(__name__)
+
+
+async def run_ingestion(source: str, limit: int) -> None:
+    """
+    Belirtilen kaynak için ingestion akışını çalıştır.
+
+    Args:
+        source: "tmdb", "imdb", "script" veya "all"
+        limit: Kaynak başına işlenecek film sayısı
+    """
+    coordinator = IngestionCoordinator()
+
+    try:
+        if source in ("tmdb", "all"):
+            await coordinator.run_tmdb_batch(limit=limit)
+        if source in ("imdb", "all"):
+            await coordinator.run_imdb_pipeline(limit=limit)
+        if source in ("script", "all"):
+            await coordinator.run_script_pipeline()
+    finally:
+        # Hata olsa bile HTTP session'ları kapat
+        coordinator.close()
@@ -4,13 +4,21 @@ Streamlit UI'dan Backend'e istek atar.
 """
 
 import os
+import json
+import time
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 
 
 # Environment'dan al, yoksa localhost (local dev için fallback)
 DEFAULT_API_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+HEALTH_TTL_SECONDS = 3.0  # Art arda "Kontrol Et" tıklamaları Backend'e gitmesin
+
+
+class QueryStreamError(Exception):
+    """Backend akış sırasında 'event: error' gönderdi."""
+
 
 class CineMindClient:
     """Backend API ile iletişim kurar."""
@@ -18,16 +26,39 @@ class CineMindClient:
     def __init__(self, base_url: str = DEFAULT_API_URL):
         self.base_url = base_url
         self.timeout = 60.0  # RAG sorguları uzun sürebilir
+        # Tüm çağrıların paylaştığı keep-alive client (her istekte yeni bağlantı açılmaz)
+        self._client = httpx.Client(
+            base_url=base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_keepalive_connections=10)
+        )
+        self._last_health: Optional[Tuple[float, Dict[str, Any]]] = None
+    
+    def close(self):
+        """Paylaşılan HTTP client'ı kapat."""
+        self._client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
     
     def health_check(self) -> Dict[str, Any]:
-        """Sistem sağlığını kontrol et."""
+        """Sistem sağlığını kontrol et (sonuç kısa süre önbellekte tutulur)."""
+        now = time.monotonic()
+        if self._last_health and now - self._last_health[0] < HEALTH_TTL_SECONDS:
+            return self._last_health[1]
+        
         try:
-            with httpx.Client(timeout=5.0) as client:
-                response = client.get(f"{self.base_url}/api/v1/health")
-                response.raise_for_status()
-                return response.json()
+            response = self._client.get("/api/v1/health", timeout=5.0)
+            response.raise_for_status()
+            health = response.json()
         except httpx.RequestError as e:
             return {"status": "error", "message": str(e)}
+        
+        self._last_health = (now, health)
+        return health
     
     def query(
         self, 
@@ -44,37 +75,69 @@ class CineMindClient:
             if source_filter:
                 payload["source_filter"] = source_filter
             
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/api/v1/query",
-                    json=payload
-                )
-                response.raise_for_status()
-                return response.json()
+            response = self._client.post("/api/v1/query", json=payload)
+            response.raise_for_status()
+            return response.json()
         except httpx.RequestError as e:
             return {"error": True, "message": str(e)}
     
+    def query_stream(
+        self,
+        question: str,
+        source_filter: Optional[str] = None,
+        limit: int = 10,
+        sources: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[str]:
+        """
+        RAG cevabını SSE üzerinden token token yield eder.
+        
+        Akış bitince `done` olayındaki kaynaklar verilen `sources` listesine
+        eklenir (st.write_stream generator'ın dönüş değerini okumaz).
+        Bağlantı hataları httpx exception'ı, Backend'in akış içi hataları
+        QueryStreamError olarak fırlatılır.
+        """
+        payload = {"question": question, "limit": limit}
+        if source_filter:
+            payload["source_filter"] = source_filter
+        
+        with self._client.stream(
+            "POST", "/api/v1/query", params={"stream": "true"}, json=payload
+        ) as response:
+            response.raise_for_status()
+            event = None
+            for line in response.iter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    if event == "error":
+                        raise QueryStreamError(data.get("detail", "Bilinmeyen hata"))
+                    if event == "done":
+                        if sources is not None:
+                            sources.extend(data.get("sources", []))
+                        return
+                    yield data.get("token", "")
+                elif not line:
+                    event = None  # Mesaj sonu
+    
     def get_movie(self, movie_id: str) -> Dict[str, Any]:
         """Film detaylarını getir."""
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(
-                    f"{self.base_url}/api/v1/movies/{movie_id}"
-                )
-                response.raise_for_status()
-                return response.json()
+            response = self._client.get(f"/api/v1/movies/{movie_id}", timeout=10.0)
+            response.raise_for_status()
+            return response.json()
         except httpx.RequestError as e:
             return {"error": True, "message": str(e)}
     
     def ingest(self, source: str, limit: int = 5) -> Dict[str, Any]:
         """Veri yükleme başlat."""
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.post(
-                    f"{self.base_url}/api/v1/ingest",
-                    json={"source": source, "limit": limit}
-                )
-                response.raise_for_status()
-                return response.json()
+            response = self._client.post(
+                "/api/v1/ingest",
+                json={"source": source, "limit": limit},
+                timeout=10.0
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.RequestError as e:
             return {"error": True, "message": str(e)}
\ No newline at end of file
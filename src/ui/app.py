@@ -2,8 +2,11 @@
 CineMind AI - Streamlit UI
 Sinema Analiz Asistanı Arayüzü
 """
+import atexit
+
+import httpx
 import streamlit as st
-from api_client import CineMindClient
+from api_client import CineMindClient, QueryStreamError
 
 # =============================================================================
 # SAYFA AYARLARI
@@ -21,8 +24,14 @@ st.set_page_config(
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+if "answers" not in st.session_state:
+    # (soru, filtre, limit) → (tamamlanmış cevap, kaynaklar); aynı soru tekrar akıtılmaz
+    st.session_state.answers = {}
+
 if "client" not in st.session_state:
     st.session_state.client = CineMindClient()
+    # Uygulama kapanırken keep-alive bağlantılarını bırak
+    atexit.register(st.session_state.client.close)
 
 # =============================================================================
 # SIDEBAR
@@ -125,27 +134,34 @@ if prompt := st.chat_input("Filmler hakkında bir soru sorun..."):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Asistan yanıtı
+    # Asistan yanıtı (token'lar geldikçe ekrana yazılır)
     with st.chat_message("assistant"):
-        with st.spinner("🤔 Düşünüyorum..."):
-            response = st.session_state.client.query(
-                question=prompt,
-                source_filter=source_filter,
-                limit=result_limit
-            )
-            
-            if "error" in response:
-                st.error(f"❌ Hata: {response.get('message', 'Bilinmeyen hata')}")
-                answer = "Üzgünüm, bir hata oluştu. Lütfen Backend'in çalıştığından emin olun."
-                sources = []
-            else:
-                answer = response.get("answer", "Yanıt alınamadı.")
-                sources = response.get("sources", [])
-            
+        cache_key = (prompt, source_filter, result_limit)
+        cached = st.session_state.answers.get(cache_key)
+        
+        if cached is not None:
+            answer, sources = cached
             st.markdown(answer)
-            
-            if sources:
-                render_sources(sources, similarity_threshold)
+        else:
+            # Kaynaklar akışın sonundaki done olayıyla gelir
+            sources = []
+            try:
+                answer = st.write_stream(
+                    st.session_state.client.query_stream(
+                        question=prompt,
+                        source_filter=source_filter,
+                        limit=result_limit,
+                        sources=sources
+                    )
+                )
+                st.session_state.answers[cache_key] = (answer, sources)
+            except (QueryStreamError, httpx.HTTPError) as e:
+                st.error(f"❌ Hata: {e}")
+                answer = "Üzgünüm, bir hata oluştu. Lütfen Backend'in çalıştığından emin olun."
+                st.markdown(answer)
+        
+        if sources:
+            render_sources(sources, similarity_threshold)
     
     # Asistan mesajını kaydet
     st.session_state.messages.append({
@@ -0,0 +1,37 @@
+"""
+Ortak pytest ayarları.
+
+`live` işaretli testler gerçek dış servislere (IMDb, TMDb, Gemini) istek atar;
+varsayılan olarak atlanır, `pytest --run-live` ile çalıştırılır.
+uvloop kuruluysa async testler onun event loop'unda koşar.
+"""
+import pytest
+
+try:
+    import uvloop
+except ImportError:  # Windows: uvloop yok, varsayılan asyncio loop'u kullanılır
+    uvloop = None
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-live",
+        action="store_true",
+        default=False,
+        help="Gerçek dış servislere bağlanan (live) testleri de çalıştır"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-live"):
+        return
+    skip_live = pytest.mark.skip(reason="--run-live verilmedi (gerçek network gerektirir)")
+    for item in items:
+        if "live" in item.keywords:
+            item.add_marker(skip_live)
+
+
+if uvloop is not None:
+    def pytest_asyncio_loop_factories(config, item):
+        """Async testler production'daki gibi uvloop üzerinde koşar."""
+        return {"uvloop": uvloop.new_event_loop}
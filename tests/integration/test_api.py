@@ -98,6 +98,50 @@ class TestQueryValidation:
         assert response.status_code == 422
 
 
+# =============================================================================
+# QUERY ENDPOINT - Streaming Tests
+# =============================================================================
+
+class TestQueryStream:
+    """POST /api/v1/query?stream=true SSE testleri."""
+    
+    def test_stream_emits_tokens_then_done(self, client, monkeypatch):
+        """Token'lar data satırı olarak gelmeli, akış done ile bitmeli."""
+        from src.api import routes
+        
+        async def fake_stream(question):
+            for token in ["Joker ", "kaos ", "istiyor."]:
+                yield token
+        
+        monkeypatch.setattr(routes, "astream_agent", fake_stream, raising=False)
+        response = client.post(
+            "/api/v1/query?stream=true",
+            json={"question": "Joker ne istiyor?"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.count('data: {"token"') == 3
+        assert response.text.rstrip().endswith('data: {"query":"Joker ne istiyor?","sources":[]}')
+    
+    def test_stream_error_sent_as_event(self, client, monkeypatch):
+        """Agent hatası error event'i olarak iletilmeli."""
+        from src.api import routes
+        
+        async def failing_stream(question):
+            raise RuntimeError("LLM down")
+            yield  # pragma: no cover
+        
+        monkeypatch.setattr(routes, "astream_agent", failing_stream, raising=False)
+        response = client.post(
+            "/api/v1/query?stream=true",
+            json={"question": "Joker ne istiyor?"}
+        )
+        
+        assert "event: error" in response.text
+        assert "LLM down" in response.text
+
+
 # =============================================================================
 # INGEST ENDPOINT - Validation Tests
 # =============================================================================
@@ -140,6 +184,40 @@ class TestIngestValidation:
 class TestHealthEndpoint:
     """GET /api/v1/health testleri."""
     
+    @pytest.fixture(autouse=True)
+    def embedding_probe(self, monkeypatch):
+        """Embedding ping'i Gemini'ye gitmesin; TTL önbelleği her testte boş başlar."""
+        from unittest.mock import Mock
+        from src.api import routes
+        
+        probe = Mock()
+        monkeypatch.setattr(routes, "_get_embedding_probe", lambda: probe)
+        monkeypatch.setattr(routes, "_embedding_health", {"status": None, "checked_at": 0.0})
+        return probe
+    
+    @pytest.mark.parametrize("first_error, second_error", [
+        (None, RuntimeError("API key revoked")),
+        (RuntimeError("API key invalid"), None),
+    ])
+    def test_embedding_status_revalidated_after_ttl(
+        self, embedding_probe, monkeypatch, first_error, second_error
+    ):
+        """ok → hata ve hata → ok geçişleri TTL dolunca görülmeli; TTL içinde ping tekrarlanmamalı."""
+        from src.api import routes
+        
+        embedding_probe.ping.side_effect = first_error
+        first = routes._check_embedding()
+        embedding_probe.ping.side_effect = second_error
+        cached = routes._check_embedding()
+        
+        monkeypatch.setattr(routes, "EMBEDDING_HEALTH_TTL", 0.0)
+        refreshed = routes._check_embedding()
+        
+        assert cached == first
+        assert (first == "ok") is (first_error is None)
+        assert (refreshed == "ok") is (second_error is None)
+        assert embedding_probe.ping.call_count == 2
+    
     def test_health_check_returns_200(self, client):
         """Health endpoint 200 döndürmeli."""
         response = client.get("/api/v1/health")
@@ -161,4 +239,97 @@ class TestHealthEndpoint:
         response = client.get("/api/v1/health")
         
         data = response.json()
-        assert data["status"] in ["healthy", "degraded"]
\ No newline at end of file
+        assert data["status"] in ["healthy", "degraded"]
+
+# =============================================================================
+# MOVIE ENDPOINT - Cache Tests
+# =============================================================================
+
+class TestMovieCache:
+    """GET /api/v1/movies/{movie_id} önbellek testleri."""
+    
+    @pytest.fixture
+    def fake_store(self):
+        """Vector store'u sahte collection ile değiştir."""
+        from unittest.mock import Mock
+        from src.api import routes
+        
+        store = Mock()
+        store.collection.get.return_value = {
+            "ids": ["doc-1", "doc-2"],
+            "metadatas": [{"movie_title": "The Dark Knight", "year": 2008}]
+        }
+        app.dependency_overrides[routes.get_vector_store] = lambda: store
+        routes._invalidate_movie_cache()
+        yield store
+        app.dependency_overrides.clear()
+        routes._invalidate_movie_cache()
+    
+    def test_second_request_served_from_cache(self, client, fake_store):
+        """Aynı film ikinci kez istenince vector store'a gidilmemeli."""
+        first = client.get("/api/v1/movies/the-dark-knight-2008")
+        calls = fake_store.collection.get.call_count
+        second = client.get("/api/v1/movies/the-dark-knight-2008")
+        
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert fake_store.collection.get.call_count == calls
+    
+    def test_invalidate_clears_cache(self, client, fake_store):
+        """Ingestion sonrası temizlik yeni sorguya zorlamalı."""
+        from src.api import routes
+        
+        client.get("/api/v1/movies/the-dark-knight-2008")
+        calls = fake_store.collection.get.call_count
+        routes._invalidate_movie_cache()
+        client.get("/api/v1/movies/the-dark-knight-2008")
+        
+        assert fake_store.collection.get.call_count > calls
+
+    def test_cache_size_is_bounded(self, client, fake_store, monkeypatch):
+        """Kapasite aşılınca en eski kullanılan film önbellekten çıkmalı."""
+        from src.api import routes
+        
+        monkeypatch.setattr(routes, "MOVIE_CACHE_MAX", 2)
+        for movie_id in ["a", "b", "a", "c"]:
+            client.get(f"/api/v1/movies/{movie_id}")
+        
+        assert list(routes._movie_cache) == ["a", "c"]
+
+    def test_single_vector_store_roundtrip(self, client, fake_store):
+        """Metadata ve kaynak sayısı tek collection.get ile gelmeli."""
+        response = client.get("/api/v1/movies/the-dark-knight-2008")
+        
+        assert response.status_code == 200
+        assert response.json()["source_count"] == 2
+        assert fake_store.collection.get.call_count == 1
+    
+    def test_genres_parsed_from_metadata(self, client, fake_store):
+        """Virgülle saklanan türler listeye çevrilmeli."""
+        fake_store.collection.get.return_value["metadatas"][0]["genres"] = "Action,Crime,Drama"
+        response = client.get("/api/v1/movies/the-dark-knight-2008")
+        
+        assert response.json()["genres"] == ["Action", "Crime", "Drama"]
+    
+    def test_etag_returned_and_304_on_match(self, client, fake_store):
+        """Aynı ETag ile yapılan istek gövdesiz 304 dönmeli."""
+        first = client.get("/api/v1/movies/the-dark-knight-2008")
+        etag = first.headers["etag"]
+        second = client.get(
+            "/api/v1/movies/the-dark-knight-2008",
+            headers={"If-None-Match": etag}
+        )
+        
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+    
+    def test_stale_etag_returns_full_body(self, client, fake_store):
+        """Eşleşmeyen ETag tam cevap döndürmeli."""
+        response = client.get(
+            "/api/v1/movies/the-dark-knight-2008",
+            headers={"If-None-Match": '"stale"'}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["title"] == "The Dark Knight"
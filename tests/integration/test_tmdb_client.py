@@ -4,6 +4,9 @@ from src.services.tmdb_service import TMDbService
 # DİKKAT: Bu testler MOCK DEĞİLDİR.
 # Gerçek API isteği atar. İnternet ve API Key şarttır.
 
+# Gerçek dış servislere bağlanır: sadece `pytest --run-live` ile çalışır
+pytestmark = pytest.mark.live
+
 @pytest.fixture
 def service():
     return TMDbService()
@@ -1,55 +1,35 @@
 import pytest
-import shutil
-import os
-import gc # <--- EKLENDİ: Garbage Collector
-import time
+from uuid import uuid4
 from src.infrastructure.vector_store import VectorStoreService
 
-# Testler için geçici veritabanı yolu
-TEST_DB_PATH = "data/test_vector_store_integration"
+
+def unique_collection(prefix: str) -> str:
+    """Testler aynı veritabanını paylaşır; izolasyon koleksiyon adıyla sağlanır."""
+    return f"{prefix}_{uuid4().hex}"
+
 
 class TestVectorStoreIntegration:
     
-    @pytest.fixture(autouse=True)
-    def setup_teardown(self):
+    @pytest.fixture(scope="module")
+    def persist_path(self, tmp_path_factory):
         """
-        Windows dostu temizlik mekanizması.
+        Modül boyunca tek geçici veritabanı dizini (pytest oturum sonunda siler).
+        Her testte sil/yeniden aç döngüsü yok; Chroma bir kez açılır.
         """
-        # --- SETUP ---
-        # Önceki testten kalan varsa temizle (Zorla)
-        if os.path.exists(TEST_DB_PATH):
-            try:
-                shutil.rmtree(TEST_DB_PATH)
-            except PermissionError:
-                pass # Setup aşamasında hata verirse yoksay, teardown halleder.
-            
-        yield # Test burada çalışır
-        
-        # --- TEARDOWN ---
-        # Test bitti, değişkenleri bellekten sil
-        gc.collect() # Çöpçüyü çağır: "Kullanılmayan bağlantıları kapat"
-        
-        # Dosya kilidinin açılması için Windows'a milisaniyelik nefes payı ver
-        time.sleep(0.1) 
-        
-        if os.path.exists(TEST_DB_PATH):
-            try:
-                shutil.rmtree(TEST_DB_PATH)
-            except PermissionError:
-                # Bazen Windows çok inatçıdır, ikinci kez deneriz
-                time.sleep(0.5)
-                try:
-                    shutil.rmtree(TEST_DB_PATH)
-                except:
-                    print(f"\n⚠️ Windows dosyayı bırakmadı: {TEST_DB_PATH} (Manuel silinebilir)")
+        return str(tmp_path_factory.mktemp("vector_store"))
 
-    def test_full_flow(self):
-        """Uçtan Uca Test Senaryosu"""
+    @pytest.fixture
+    def store(self, persist_path):
+        """Teste özel koleksiyon; handle'lar teardown'da kapatılır (GC'ye kalmaz)."""
         store = VectorStoreService(
-            collection_name="integration_test", 
-            persist_path=TEST_DB_PATH
+            collection_name=unique_collection("test"),
+            persist_path=persist_path
         )
-        
+        yield store
+        store.close()
+
+    def test_full_flow(self, store):
+        """Uçtan Uca Test Senaryosu"""
         vec_a = [1.0] + [0.0] * 767
         vec_b = [0.0] + [1.0] * 767
         
@@ -70,23 +50,126 @@ class TestVectorStoreIntegration:
         
         store.delete_by_ids([doc_id])
         assert store.count() == 1
+
+    def test_http_mode_from_environment(self, monkeypatch):
+        """CHROMA_DB_TYPE=http ise yerel disk yerine sunucuya bağlanmalı."""
+        from unittest.mock import patch
+        
+        monkeypatch.setenv("CHROMA_DB_TYPE", "http")
+        monkeypatch.setenv("CHROMA_DB_HOST", "chromadb")
+        monkeypatch.setenv("CHROMA_DB_PORT", "8000")
+        
+        with patch("src.infrastructure.vector_store.chromadb.HttpClient") as http_client:
+            store = VectorStoreService(collection_name="http_test")
+        
+        http_client.assert_called_once_with(host="chromadb", port=8000)
+        assert store.collection is http_client.return_value.get_or_create_collection.return_value
+
+    @pytest.mark.parametrize("space, warns", [("cosine", False), ("l2", True)])
+    def test_existing_collection_space_checked(self, persist_path, caplog, space, warns):
+        """Eski koleksiyon ip dışı bir uzaydaysa (cosine hariç) uyarı loglanmalı."""
+        import chromadb
+        
+        name = unique_collection(space)
+        client = chromadb.PersistentClient(path=persist_path)
+        client.create_collection(name, metadata={"hnsw:space": space})
+        client.close()
+        
+        store = VectorStoreService(collection_name=name, persist_path=persist_path)
+        store.close()
+        
+        assert store.collection.metadata["hnsw:space"] == space
+        assert ("uzayında" in caplog.text) is warns
+
+    def test_reingest_is_idempotent(self, store):
+        """Aynı içerik tekrar eklenince kopya oluşmamalı."""
+        vec = [1.0] + [0.0] * 767
+        
+        store.add_documents(["Batman Hero", "Batman Hero"], [vec, vec], [{"n": 1}, {"n": 2}])
+        store.add_documents(["Batman Hero"], [vec], [{"n": 3}])
+        
+        assert store.count() == 1
+        doc = store.get_by_id(VectorStoreService.content_id("Batman Hero"))
+        assert doc["metadata"]["n"] == 3
         
-        # Belleği temizle ki Windows dosyayı bıraksın
-        del store 
+        known = VectorStoreService.content_id("Batman Hero")
+        assert store.existing_ids([known, "missing"]) == {known}
 
-    def test_dimension_check(self):
+    def test_vectors_are_normalized_for_ip_space(self, store):
+        """Uzunluğu farklı ama aynı yöndeki vektörler arası mesafe ~0 olmalı."""
+        store.add_documents(["Batman Hero"], [[3.0] + [0.0] * 767], [{"type": "hero"}])
+        
+        results = store.search([0.5] + [0.0] * 767, limit=1)
+        
+        assert results[0]["distance"] == pytest.approx(0.0, abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_asearch_coalesces_concurrent_queries(self, store):
+        """Eşzamanlı asearch çağrıları tek search_many ile cevaplanmalı."""
+        import asyncio
+        from unittest.mock import patch
+        
+        vec_a = [1.0] + [0.0] * 767
+        vec_b = [0.0] + [1.0] * 767
+        store.add_documents(
+            ["Batman Hero", "Joker Villain"],
+            [vec_a, vec_b],
+            [{"type": "hero"}, {"type": "villain"}]
+        )
+        
+        with patch.object(store, "search_many", wraps=store.search_many) as spy:
+            res_a, res_b = await asyncio.gather(
+                store.asearch(vec_a, limit=1),
+                store.asearch(vec_b, limit=1)
+            )
+        
+        assert spy.call_count == 1
+        assert res_a[0]["document"] == "Batman Hero"
+        assert res_b[0]["document"] == "Joker Villain"
+
+    @pytest.mark.asyncio
+    async def test_asearch_propagates_batch_errors(self, store):
+        """search_many patlarsa batch'teki tüm asearch çağrıları hatayı almalı (askıda kalmamalı)."""
+        import asyncio
+        from unittest.mock import patch
+        
+        vec = [1.0] + [0.0] * 767
+        with patch.object(store, "search_many", side_effect=RuntimeError("chroma down")):
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    store.asearch(vec, limit=1),
+                    store.asearch(vec, limit=1),
+                    return_exceptions=True
+                ),
+                timeout=5
+            )
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_asearch_fails_on_result_count_mismatch(self, store):
+        import asyncio
+        from unittest.mock import patch
+        
+        vec = [1.0] + [0.0] * 767
+        with patch.object(store, "search_many", return_value=[[]]):
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    store.asearch(vec, limit=1),
+                    store.asearch(vec, limit=1),
+                    return_exceptions=True
+                ),
+                timeout=5
+            )
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_dimension_check(self, store):
         """Hata yönetimi testi"""
-        store = VectorStoreService(persist_path=TEST_DB_PATH)
         vec_wrong = [[0.1, 0.2]]
         
         try:
             # DÜZELTME: Boş metadata ({}) yerine dolu metadata ({"test": "true"}) gönderiyoruz.
             store.add_documents(["Test"], vec_wrong, [{"test": "true"}])
-            assert True 
         except Exception as e:
-            # Hatanın ne olduğunu görmek için loga basalım
-            print(f"\nBeklenmeyen Hata: {e}")
-            pytest.fail("Yanlış boyut sistemi çökertti!")
-        
-        # Belleği temizle
-        del store
\ No newline at end of file
+            pytest.fail(f"Yanlış boyut sistemi çökertti: {e!r}")
\ No newline at end of file
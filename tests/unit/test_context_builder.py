@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import Mock, patch
+
+from src.services.rag import context_builder
+from src.services.rag.context_builder import ContextBuilder
+from src.services.rag.dtos import RetrievedDocument, SourceType
+
+
+def make_doc(content, source=SourceType.IMDB):
+    return RetrievedDocument(content=content, source=source, movie_title="Joker", distance=0.1)
+
+
+class TestContextBuilder:
+
+    @pytest.fixture(autouse=True)
+    def clear_token_cache(self):
+        context_builder.count_tokens.cache_clear()
+        yield
+        context_builder.count_tokens.cache_clear()
+
+    def test_tokens_counted_with_encoding_and_cached(self):
+        """Tokenizer varsa sayım ondan gelmeli, aynı içerik tekrar encode edilmemeli."""
+        encoding = Mock()
+        encoding.encode.side_effect = lambda text, **kwargs: text.split()
+
+        with patch.object(context_builder, "_get_encoding", return_value=encoding):
+            builder = ContextBuilder()
+            assert builder._estimate_tokens("Why so serious") == 3
+            assert builder._estimate_tokens("Why so serious") == 3
+
+        encoding.encode.assert_called_once()
+
+    def test_falls_back_to_char_estimate_without_encoding(self):
+        """Tokenizer yüklenemezse 4 karakter ≈ 1 token kuralı kullanılmalı."""
+        with patch.object(context_builder, "_get_encoding", return_value=None):
+            assert ContextBuilder()._estimate_tokens("x" * 40) == 10
+
+    def test_encoding_failure_is_retried_later(self, monkeypatch):
+        """Tokenizer yükleme hatası kalıcı önbelleklenmemeli; süre dolunca tekrar denenmeli."""
+        encoding = Mock()
+        get_encoding = Mock(side_effect=[OSError("offline"), encoding])
+        monkeypatch.setattr(context_builder.tiktoken, "get_encoding", get_encoding)
+        monkeypatch.setattr(context_builder, "_encoding", None)
+        monkeypatch.setattr(context_builder, "_encoding_failed_at", None)
+
+        assert context_builder._get_encoding() is None
+        assert context_builder._get_encoding() is None  # bekleme süresi dolmadı
+        assert get_encoding.call_count == 1
+
+        monkeypatch.setattr(context_builder, "_ENCODING_RETRY_SECONDS", 0.0)
+        assert context_builder._get_encoding() is encoding
+        assert get_encoding.call_count == 2
+
+    def test_build_stops_at_token_budget(self):
+        """Bütçeyi aşacak doküman context'e eklenmemeli."""
+        docs = [make_doc("a " * 10), make_doc("b " * 10), make_doc("c " * 10)]
+
+        with patch.object(context_builder, "_get_encoding", return_value=None):
+            context = ContextBuilder(max_tokens=10).build(docs)
+
+        assert "a a" in context
+        assert "b b" in context
+        assert "c c" not in context
+        assert context.startswith("[🎬 IMDB YORUM] Joker\n---\n")
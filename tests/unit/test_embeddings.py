@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from unittest.mock import Mock, patch
 from src.domain.embeddings import EmbeddingService
@@ -10,59 +11,228 @@ class TestEmbeddingService:
         with patch("src.domain.embeddings.genai") as mock:
             yield mock
 
+    @pytest.fixture
+    def api_key(self, monkeypatch):
+        monkeypatch.setenv("GOOGLE_API_KEY", "fake_key")
+
+    @pytest.fixture
+    def service(self, api_key, mock_genai):
+        """Varsayılan ayarlarla, mock API'ye bağlı servis."""
+        return EmbeddingService()
+
     def test_init_raises_error_without_api_key(self):
         """API Key yoksa hata vermeli."""
         with patch.dict("os.environ", {}, clear=True):
             with pytest.raises(ValueError, match="GOOGLE_API_KEY bulunamadı"):
                 EmbeddingService()
 
-    def test_embed_query_success(self, mock_genai):
+    def test_embed_query_success(self, service, mock_genai):
         """Başarılı bir sorgu embedding senaryosu."""
-        # Ortam değişkeni ayarla
-        with patch.dict("os.environ", {"GOOGLE_API_KEY": "fake_key"}):
-            service = EmbeddingService()
-            
-            # API'nin döneceği fake cevap
-            mock_response = {'embedding': [0.1, 0.2, 0.3]}
-            mock_genai.embed_content.return_value = mock_response
-            
-            # Test et
-            vector = service.embed_query("Batman")
-            
-            assert vector == [0.1, 0.2, 0.3]
-            # Doğru parametrelerle çağrıldı mı?
-            mock_genai.embed_content.assert_called_with(
-                model="models/text-embedding-004",
-                content="Batman",
-                task_type="retrieval_query"
-            )
-
-    def test_embed_documents_batching(self, mock_genai):
+        # API'nin döneceği fake cevap
+        mock_response = {'embedding': [0.1, 0.2, 0.3]}
+        mock_genai.embed_content.return_value = mock_response
+        
+        # Test et
+        vector = service.embed_query("Batman")
+        
+        assert vector == [0.1, 0.2, 0.3]
+        # Doğru parametrelerle çağrıldı mı?
+        mock_genai.embed_content.assert_called_with(
+            model="models/text-embedding-004",
+            content="Batman",
+            task_type="retrieval_query"
+        )
+
+    def test_embed_documents_batching(self, service, mock_genai):
         """Batch (Gruplama) mantığı doğru çalışıyor mu?"""
-        with patch.dict("os.environ", {"GOOGLE_API_KEY": "fake_key"}):
-            service = EmbeddingService()
-            
-            # 2 tane doküman yollayalım
-            docs = ["Doc1", "Doc2"]
-            
-            # API'nin dönüşü (Liste içinde liste)
-            mock_genai.embed_content.return_value = {
-                'embedding': [[0.1], [0.2]]
-            }
+        # 2 tane doküman yollayalım
+        docs = ["Doc1", "Doc2"]
+        
+        # API'nin dönüşü (Liste içinde liste)
+        mock_genai.embed_content.return_value = {
+            'embedding': [[0.1], [0.2]]
+        }
+        
+        vectors = service.embed_documents(docs)
+        
+        assert len(vectors) == 2
+        np.testing.assert_allclose(vectors[0], [0.1])
+        assert mock_genai.embed_content.call_count == 1 # Tek seferde gitmeli
+        
+    def test_api_failure_handling(self, service, mock_genai):
+        """API hata verirse sistem çökmemeli, None dönmeli."""
+        # API hata fırlatsın
+        mock_genai.embed_content.side_effect = Exception("API Down")
+        
+        vector = service.embed_query("Joker")
+        assert vector is None # Çökmedi, None döndü
+
+    def test_embed_documents_retries_failed_batch(self, service, mock_genai):
+        """Geçici hata sonrası batch tekrar denenip başarıya ulaşmalı."""
+        from google.api_core.exceptions import ServiceUnavailable
+        
+        with patch("time.sleep") as mock_sleep:
+            mock_genai.embed_content.side_effect = [
+                ServiceUnavailable("503"),
+                {'embedding': [[0.1], [0.2]]}
+            ]
             
-            vectors = service.embed_documents(docs)
+            vectors = service.embed_documents(["Doc1", "Doc2"])
             
-            assert len(vectors) == 2
-            assert vectors[0] == [0.1]
-            assert mock_genai.embed_content.call_count == 1 # Tek seferde gitmeli
+            np.testing.assert_allclose(np.stack(vectors), [[0.1], [0.2]])
+            assert mock_genai.embed_content.call_count == 2
+            mock_sleep.assert_called_once_with(1)
+
+    def test_embed_documents_does_not_retry_permanent_error(self, service, mock_genai):
+        """Geçici olmayan hata tekrar denenmeden None ile sonuçlanmalı."""
+        with patch("time.sleep") as mock_sleep:
+            mock_genai.embed_content.side_effect = ValueError("bad request")
             
-    def test_api_failure_handling(self, mock_genai):
-        """API hata verirse sistem çökmemeli, None dönmeli."""
-        with patch.dict("os.environ", {"GOOGLE_API_KEY": "fake_key"}):
-            service = EmbeddingService()
+            vectors = service.embed_documents(["Doc1", "Doc2"])
             
-            # API hata fırlatsın
-            mock_genai.embed_content.side_effect = Exception("API Down")
+            assert vectors == [None, None]
+            assert mock_genai.embed_content.call_count == 1
+            mock_sleep.assert_not_called()
+
+    def test_embed_documents_default_batch_is_api_limit(self, service, mock_genai):
+        """batch_size verilmezse 100'e kadar metin tek çağrıda gitmeli."""
+        docs = [f"Doc{i}" for i in range(60)]
+        mock_genai.embed_content.return_value = {'embedding': [[0.1]] * 60}
+        
+        vectors = service.embed_documents(docs)
+        
+        assert len(vectors) == 60
+        assert mock_genai.embed_content.call_count == 1
+
+    def test_embed_documents_deduplicates_texts(self, service, mock_genai):
+        """Aynı metin tek kez gönderilip sonucu tüm index'lere dağıtılmalı."""
+        mock_genai.embed_content.return_value = {'embedding': [[0.1], [0.2]]}
+        
+        vectors = service.embed_documents(["Doc1", "Doc2", "Doc1"])
+        
+        np.testing.assert_allclose(np.stack(vectors), [[0.1], [0.2], [0.1]])
+        assert mock_genai.embed_content.call_args.kwargs["content"] == ["Doc1", "Doc2"]
+
+    def test_embed_documents_halves_batch_on_request_size_error(self, service, mock_genai):
+        """İstek boyutu hatasında batch yarıya bölünüp tekrar denenmeli."""
+        from google.api_core.exceptions import InvalidArgument
+        
+        mock_genai.embed_content.side_effect = [
+            InvalidArgument("payload too large"),
+            {'embedding': [0.1]},
+            {'embedding': [0.2]}
+        ]
+        
+        vectors = service.embed_documents(["Doc1", "Doc2"])
+        
+        np.testing.assert_allclose(np.stack(vectors), [[0.1], [0.2]])
+        assert mock_genai.embed_content.call_count == 3
+        assert mock_genai.embed_content.call_args.kwargs["content"] == ["Doc2"]
+
+    def test_embed_documents_does_not_split_on_quota_error(self, service, mock_genai):
+        """Kota hatası bölünerek çoğaltılmamalı; retry bitince batch None döner."""
+        from google.api_core.exceptions import ResourceExhausted
+        
+        with patch("time.sleep"):
+            mock_genai.embed_content.side_effect = ResourceExhausted("429")
             
-            vector = service.embed_query("Joker")
-            assert vector is None # Çökmedi, None döndü
\ No newline at end of file
+            vectors = service.embed_documents(["Doc1", "Doc2"])
+        
+        assert vectors == [None, None]
+        assert mock_genai.embed_content.call_count == service.MAX_RETRIES + 1
+
+    @pytest.mark.asyncio
+    async def test_embed_documents_async_preserves_order(self, service, mock_genai):
+        """Paralel batch'ler giriş sırasıyla birleştirilmeli."""
+        def fake_embed(model, content, task_type):
+            vectors = [[float(t[3:])] for t in content]
+            # Tek elemanlı batch'te API düz liste döner
+            return {'embedding': vectors[0] if len(vectors) == 1 else vectors}
+        
+        mock_genai.embed_content.side_effect = fake_embed
+        
+        docs = [f"Doc{i}" for i in range(5)]
+        vectors = await service.embed_documents_async(docs, batch_size=2, workers=3)
+        
+        np.testing.assert_allclose(np.stack(vectors), [[0.0], [1.0], [2.0], [3.0], [4.0]])
+        assert mock_genai.embed_content.call_count == 3
+
+    def test_embed_query_cached_in_memory(self, service, mock_genai):
+        """Aynı sorgu ikinci kez API'ye gitmemeli."""
+        mock_genai.embed_content.return_value = {'embedding': [0.1, 0.2]}
+        
+        first = service.embed_query("Batman")
+        second = service.embed_query("Batman")
+        
+        assert first == second == [0.1, 0.2]
+        assert mock_genai.embed_content.call_count == 1
+
+    def test_embed_query_cache_ignores_case_and_punctuation(self, service, mock_genai):
+        """Sadece yazım farkı olan sorgular aynı cache kaydını kullanmalı."""
+        mock_genai.embed_content.return_value = {'embedding': [0.1, 0.2]}
+        
+        service.embed_query("Joker'in planı neydi?")
+        service.embed_query("  joker in planı NEYDI ")
+        
+        assert mock_genai.embed_content.call_count == 1
+
+    def test_embed_documents_uses_persistent_cache(self, api_key, mock_genai, tmp_path):
+        """Cache'teki metinler API'ye tekrar gönderilmemeli."""
+        cache_path = str(tmp_path / "embed_cache.sqlite")
+        service = EmbeddingService(cache_path=cache_path)
+        mock_genai.embed_content.return_value = {'embedding': [[0.5], [0.25]]}
+        service.embed_documents(["Doc1", "Doc2"])
+        service.close()
+        
+        # Yeni instance aynı dosyayı kullanır; sadece Doc3 eksik
+        service = EmbeddingService(cache_path=cache_path)
+        mock_genai.embed_content.return_value = {'embedding': [0.75]}
+        vectors = service.embed_documents(["Doc2", "Doc3", "Doc1"])
+        service.close()
+        
+        np.testing.assert_allclose(np.stack(vectors), [[0.25], [0.75], [0.5]])
+        last_call = mock_genai.embed_content.call_args
+        assert last_call.kwargs["content"] == ["Doc3"]
+
+    def test_cache_hit_and_miss_return_same_vector(self, api_key, mock_genai, tmp_path):
+        """Aynı metin cache'te olsa da olmasa da birebir aynı vektörü almalı."""
+        cache_path = str(tmp_path / "embed_cache.sqlite")
+        service = EmbeddingService(cache_path=cache_path)
+        mock_genai.embed_content.return_value = {'embedding': [0.123, -0.987, 0.456]}
+        
+        miss = service.embed_documents(["Doc1"])[0]
+        hit = service.embed_documents(["Doc1"])[0]
+        service.close()
+        
+        assert mock_genai.embed_content.call_count == 1
+        np.testing.assert_array_equal(hit, miss)
+
+    def test_output_dimensionality_is_forwarded(self, api_key, mock_genai):
+        """Kısaltılmış boyut API'ye iletilmeli ve raporlanmalı."""
+        service = EmbeddingService(output_dimensionality=384)
+        mock_genai.embed_content.return_value = {'embedding': [[0.1], [0.2]]}
+        
+        service.embed_documents(["Doc1", "Doc2"])
+        
+        assert mock_genai.embed_content.call_args.kwargs["output_dimensionality"] == 384
+        assert service.get_embedding_dimension() == 384
+
+
+class TestEmbeddingCache:
+
+    def test_int8_roundtrip_keeps_cosine(self, tmp_path):
+        """Quantize edilen vektör yön olarak neredeyse aynı kalmalı."""
+        from src.infrastructure.embedding_cache import EmbeddingCache
+        
+        rng = np.random.default_rng(42)
+        vec = rng.standard_normal(768).astype(np.float32)
+        cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+        key = EmbeddingCache.make_key("model", "text")
+        
+        cache.put_many({key: vec})
+        restored = cache.get_many([key])[key]
+        cache.close()
+        
+        cosine = float(vec @ restored / (np.linalg.norm(vec) * np.linalg.norm(restored)))
+        assert restored.dtype == np.float32
+        assert cosine > 0.999
@@ -1,4 +1,5 @@
 import pytest
+import pytest_asyncio
 from unittest.mock import Mock, patch, AsyncMock
 import httpx
 from src.services.imdb_scraper_service import ImdbScraperService
@@ -27,113 +28,126 @@ MOCK_HTML_CONTENT = """
 </html>
 """
 
-@pytest.mark.asyncio
-async def test_fetch_reviews_success():
+# 20 karakterden kısa yorum içeren sayfa
+SHORT_REVIEW_HTML = """
+<html>
+<body>
+    <article class="user-review-item">
+        <h3 class="ipc-title__text">Test</h3>
+        <div class="ipc-html-content-inner-div">Kısa</div>
+    </article>
+    <article class="user-review-item">
+        <h3 class="ipc-title__text">Valid Review</h3>
+        <div class="ipc-html-content-inner-div">
+            Bu yeterince uzun bir yorum metnidir ve parse edilmelidir.
+        </div>
+    </article>
+</body>
+</html>
+"""
+
+
+def html_response(html):
+    response = Mock()
+    response.status_code = 200
+    response.text = html
+    response.raise_for_status = Mock()
+    return response
+
+
+def status_error_response(status_code):
+    response = Mock()
+    response.status_code = status_code
+    response.raise_for_status.side_effect = httpx.HTTPStatusError(
+        "Not Found", request=Mock(), response=response
+    )
+    return response
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def scraper():
     """
-    SENARYO 1: Başarılı Scraping İşlemi
+    Modüldeki mock testlerin paylaştığı tek scraper.
+    Ardışık testler limiter'da beklemesin diye aralık kısaltılır.
     """
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = MOCK_HTML_CONTENT
-    mock_response.raise_for_status = Mock()
-
-    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get, \
-         patch("asyncio.sleep", new_callable=AsyncMock):
-        
-        mock_get.return_value = mock_response
-        
+    with patch.object(ImdbScraperService, "REQUEST_INTERVAL", 0.001):
         service = ImdbScraperService()
-        reviews = await service.fetch_reviews("tt_dummy_id", max_reviews=5)
-
-        # Doğrulamalar
-        assert len(reviews) == 2, "2 adet yorum çekilmeliydi"
-        
-        # Yorum 1 (tam veri)
-        review1 = reviews[0]
-        assert review1["title"] == "Mükemmel Bir Film"
-        assert review1["rating"] == 10.0  # Artık float olarak direkt
-        assert "sinema tarihinin" in review1["content"]
-        assert review1["source"] == "imdb"
-        
-        # Yorum 2 (eksik rating)
-        review2 = reviews[1]
-        assert review2["title"] == "Fena Değil"
-        assert review2["rating"] is None
-        assert "Ortalama" in review2["content"]
+    yield service
+    await service.aclose()
 
-@pytest.mark.asyncio
-async def test_fetch_reviews_network_error():
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("outcome, expected_titles", [
+    # SENARYO 1: Başarılı scraping (biri puansız 2 yorum)
+    (html_response(MOCK_HTML_CONTENT), ["Mükemmel Bir Film", "Fena Değil"]),
+    # SENARYO 2: Boş içerik filtresi (20 karakterden kısa yorum atlanmalı)
+    (html_response(SHORT_REVIEW_HTML), ["Valid Review"]),
+    # SENARYO 3: HTTP 404 hatası
+    (status_error_response(404), []),
+    # SENARYO 4: Network hatası
+    (httpx.RequestError("Bağlantı koptu"), []),
+], ids=["success", "short-content", "http-404", "network-error"])
+async def test_fetch_reviews(scraper, outcome, expected_titles):
     """
-    SENARYO 2: Network Hatası
+    fetch_reviews hata durumlarında boş liste, aksi halde parse edilen yorumları dönmeli.
     """
-    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get, \
-         patch("asyncio.sleep", new_callable=AsyncMock):
-        
-        mock_get.side_effect = httpx.RequestError("Bağlantı koptu")
-        
-        service = ImdbScraperService()
-        reviews = await service.fetch_reviews("tt_dummy_id")
-        
-        assert reviews == []
-        assert isinstance(reviews, list)
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        # side_effect listesi: exception ise fırlatılır, değilse dönülür
+        mock_get.side_effect = [outcome]
+        reviews = await scraper.fetch_reviews("tt_dummy_id", max_reviews=5)
 
-@pytest.mark.asyncio
-async def test_fetch_reviews_http_error():
+    assert isinstance(reviews, list)
+    assert [r["title"] for r in reviews] == expected_titles
+
+
+def test_parse_html_fields():
     """
-    SENARYO 3: HTTP 404 Hatası
+    Parse edilen yorumların alanları doğru doldurulmalı (rating yoksa None)
     """
-    mock_response = Mock()
-    mock_response.status_code = 404
-    mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-        "Not Found", request=Mock(), response=mock_response
-    )
+    review1, review2 = ImdbScraperService()._parse_html(MOCK_HTML_CONTENT, limit=5)
+
+    # Yorum 1 (tam veri)
+    assert review1["title"] == "Mükemmel Bir Film"
+    assert review1["rating"] == 10.0
+    assert "sinema tarihinin" in review1["content"]
+    assert review1["source"] == "imdb"
+
+    # Yorum 2 (eksik rating)
+    assert review2["title"] == "Fena Değil"
+    assert review2["rating"] is None
+    assert "Ortalama" in review2["content"]
 
-    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get, \
-         patch("asyncio.sleep", new_callable=AsyncMock):
-        
-        mock_get.return_value = mock_response
-        
-        service = ImdbScraperService()
-        reviews = await service.fetch_reviews("tt_yanlis_id")
-        
-        assert reviews == []
 
 @pytest.mark.asyncio
-async def test_empty_content_filtering():
+async def test_client_is_shared_between_requests():
     """
-    SENARYO 4: Boş İçerik Filtresi
-    Beklenti: 20 karakterden kısa yorumlar atlanmalı
+    SENARYO 5: Ardışık istekler aynı AsyncClient'ı kullanmalı
     """
-    mock_html = """
-    <html>
-    <body>
-        <article class="user-review-item">
-            <h3 class="ipc-title__text">Test</h3>
-            <div class="ipc-html-content-inner-div">Kısa</div>
-        </article>
-        <article class="user-review-item">
-            <h3 class="ipc-title__text">Valid Review</h3>
-            <div class="ipc-html-content-inner-div">
-                Bu yeterince uzun bir yorum metnidir ve parse edilmelidir.
-            </div>
-        </article>
-    </body>
-    </html>
-    """
-    
     mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
+    mock_response.text = MOCK_HTML_CONTENT
     mock_response.raise_for_status = Mock()
 
     with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get, \
-         patch("asyncio.sleep", new_callable=AsyncMock):
-        
+         patch.object(ImdbScraperService, "REQUEST_INTERVAL", 0.01):
         mock_get.return_value = mock_response
-        
+
         service = ImdbScraperService()
-        reviews = await service.fetch_reviews("tt_test", max_reviews=10)
-        
-        # Sadece ikinci yorum (uzun olan) dönmeli
-        assert len(reviews) == 1
-        assert reviews[0]["title"] == "Valid Review"
\ No newline at end of file
+        await service.fetch_reviews("tt1", max_reviews=5)
+        client = service._client
+        await service.fetch_reviews("tt2", max_reviews=5)
+
+        assert client is not None
+        assert service._client is client
+
+        await service.aclose()
+        assert service._client is None
+
+def test_parse_html_without_fetch():
+    """
+    SENARYO 6: Parser doğrudan test edilir (HTTP/limiter yolu olmadan)
+    Beklenti: limit kadar yorum dönmeli
+    """
+    reviews = ImdbScraperService()._parse_html(MOCK_HTML_CONTENT, limit=1)
+
+    assert [r["title"] for r in reviews] == ["Mükemmel Bir Film"]
+    assert reviews[0]["rating"] == 10.0
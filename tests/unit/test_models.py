@@ -0,0 +1,98 @@
+import pytest
+from src.domain.models import (
+    CinemaDocument,
+    DataSource,
+    IMDbReview,
+    Movie,
+    ScriptScene,
+    SentimentResult,
+    TMDbReview,
+)
+
+
+class TestCinemaDocumentFactories:
+
+    @pytest.fixture
+    def movie(self):
+        return Movie(movie_id="the-dark-knight-2008", title="The Dark Knight", year=2008)
+
+    def test_from_tmdb_review(self, movie):
+        """TMDb yorumu içerik ve Chroma metadata'sına doğru çevrilmeli."""
+        review = TMDbReview(
+            review_id="r1", movie_id=movie.movie_id, author="alice",
+            rating=9.0, text="Masterpiece.",
+            sentiment=SentimentResult(label="POSITIVE", score=0.98)
+        )
+
+        doc = CinemaDocument.from_tmdb_review(movie, review)
+        doc_id, content, meta, embedding = doc.to_chroma_format()
+
+        assert doc_id == "tmdb-r1"
+        assert content == (
+            "Title: The Dark Knight (2008)\n"
+            "User Review by alice (Rating: 9.0/10)\n"
+            "Review: Masterpiece."
+        )
+        assert meta["source"] == "tmdb"
+        assert meta["movie_id"] == "the-dark-knight-2008"
+        assert meta["sentiment_label"] == "POSITIVE"
+        assert "date" not in meta  # None değerler Chroma'ya gitmemeli
+        assert embedding is None
+
+    def test_from_imdb_review_without_rating(self, movie):
+        """Puansız IMDb yorumunda rating kısmı olmamalı."""
+        review = IMDbReview(
+            review_id="i1", movie_id=movie.movie_id, author="bob",
+            text="Too long.", helpful_count=3
+        )
+
+        doc_id, content, meta, _ = CinemaDocument.from_imdb_review(movie, review).to_chroma_format()
+
+        assert doc_id == "imdb-i1"
+        assert content == "Title: The Dark Knight (2008)\nIMDb Review by bob\nReview: Too long."
+        assert meta["source"] == "imdb"
+        assert meta["helpful_count"] == 3
+        assert "sentiment_label" not in meta
+
+    def test_from_script_scene(self, movie):
+        """Senaryo sahnesi başlık ve diyaloğu içermeli."""
+        scene = ScriptScene(
+            scene_id="s1", movie_id=movie.movie_id, scene_number=1,
+            heading="INT. BANK - DAY", dialogue="JOKER: Why so serious?"
+        )
+
+        doc_id, content, meta, _ = CinemaDocument.from_script_scene(movie, scene).to_chroma_format()
+
+        assert doc_id == "script-s1"
+        assert content == (
+            "Movie: The Dark Knight (2008)\n"
+            "Scene 1: INT. BANK - DAY\n"
+            "Dialogue:\nJOKER: Why so serious?"
+        )
+        assert meta["source"] == "script"
+        assert meta["scene_number"] == 1
+
+    def test_validated_document_source_is_plain_string(self, movie):
+        """Enum olarak verilen source metadata'da düz string olmalı."""
+        doc = CinemaDocument(
+            doc_id="d1", movie=movie, content="x", source=DataSource.IMDB
+        )
+
+        record = doc.to_chroma_format()
+
+        assert record.metadata["source"] == "imdb"
+        assert record.doc_id == "d1"
+
+    def test_batch_factory_matches_single(self, movie):
+        """Toplu factory tekli factory ile aynı dokümanları üretmeli."""
+        reviews = [
+            TMDbReview(review_id=f"r{i}", movie_id=movie.movie_id, author="a", text=f"t{i}")
+            for i in range(3)
+        ]
+
+        docs = CinemaDocument.from_tmdb_reviews(movie, reviews)
+
+        assert [d.doc_id for d in docs] == ["tmdb-r0", "tmdb-r1", "tmdb-r2"]
+        assert [d.content for d in docs] == [
+            CinemaDocument.from_tmdb_review(movie, r).content for r in reviews
+        ]
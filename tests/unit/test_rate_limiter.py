@@ -0,0 +1,63 @@
+import pytest
+from unittest.mock import patch
+from src.infrastructure.rate_limiter import AdaptiveRateLimiter, TokenBucket
+
+
+class TestTokenBucket:
+
+    def test_no_wait_while_budget_available(self):
+        """Bütçe doluyken acquire beklememeli."""
+        bucket = TokenBucket(rpm=60)
+        with patch("src.infrastructure.rate_limiter.time.sleep") as mock_sleep:
+            for _ in range(60):
+                bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    def test_waits_when_budget_exhausted(self):
+        """Token bitince bir sonraki token'ın dolma süresi kadar beklemeli."""
+        clock = [0.0]
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with patch("src.infrastructure.rate_limiter.time.monotonic", side_effect=lambda: clock[0]), \
+             patch("src.infrastructure.rate_limiter.time.sleep", side_effect=fake_sleep) as mock_sleep:
+            bucket = TokenBucket(rpm=60)
+            for _ in range(61):
+                bucket.acquire()
+
+        mock_sleep.assert_called_once()
+        assert abs(clock[0] - 1.0) < 1e-9  # 60 rpm → saniyede 1 token
+
+
+class TestAdaptiveRateLimiter:
+
+    def test_throttle_halves_rate_with_floor(self):
+        """429/5xx sonrası hız yarıya inmeli, min_rate altına düşmemeli."""
+        limiter = AdaptiveRateLimiter(max_rate=10, min_rate=2)
+
+        limiter.record_throttle()
+        assert limiter.rate == 5
+        limiter.record_throttle()
+        limiter.record_throttle()
+        assert limiter.rate == 2
+
+    def test_successes_raise_rate_up_to_max(self):
+        """Her increase_after başarıda hız 1 artmalı, max_rate'i geçmemeli."""
+        limiter = AdaptiveRateLimiter(max_rate=10, min_rate=2, increase_after=3)
+        limiter.record_throttle()  # 10 → 5
+
+        for _ in range(3):
+            limiter.record_success()
+        assert limiter.rate == 6
+
+        for _ in range(30):
+            limiter.record_success()
+        assert limiter.rate == 10
+
+    @pytest.mark.asyncio
+    async def test_context_manager_acquires(self):
+        limiter = AdaptiveRateLimiter(max_rate=2)
+        async with limiter:
+            pass
+        assert limiter.rate == 2
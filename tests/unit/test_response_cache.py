@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.services.rag.dtos import RAGResponse, RetrievedDocument, SourceType
+from src.services.rag.generator import GenerationError
+from src.services.rag.pipeline import RAGPipeline
+from src.services.rag.response_cache import ResponseCache, clear_response_caches
+
+PARAMS = (10, None)
+
+
+def make_response(question, answer="Kaos yaratmak istiyor."):
+    return RAGResponse(answer=answer, sources=[], query=question)
+
+
+class TestResponseCache:
+
+    def test_exact_hit(self):
+        cache = ResponseCache()
+        cache.put("Joker ne istiyor?", [1.0, 0.0], PARAMS, make_response("Joker ne istiyor?"))
+
+        assert cache.get_exact("Joker ne istiyor?", PARAMS).answer == "Kaos yaratmak istiyor."
+        assert cache.get_exact("Batman kim?", PARAMS) is None
+
+    def test_similar_question_hit_keeps_new_query(self):
+        """Eşik üstü benzer soru cevabı dönmeli, query alanı yeni soru olmalı."""
+        cache = ResponseCache(similarity_threshold=0.97)
+        cache.put("Joker motivasyon?", [1.0, 0.0, 0.0], PARAMS, make_response("Joker motivasyon?"))
+
+        hit = cache.get_similar("Joker'in motivasyonu", [0.99, 0.05, 0.0], PARAMS)
+        miss = cache.get_similar("Batman kim?", [0.0, 1.0, 0.0], PARAMS)
+
+        assert hit.answer == "Kaos yaratmak istiyor."
+        assert hit.query == "Joker'in motivasyonu"
+        assert miss is None
+
+    def test_params_must_match(self):
+        """Farklı kaynak filtresiyle sorulan soru önbellekten dönmemeli."""
+        cache = ResponseCache()
+        cache.put("Joker?", [1.0, 0.0], PARAMS, make_response("Joker?"))
+
+        assert cache.get_exact("Joker?", (10, SourceType.SCRIPT)) is None
+        assert cache.get_similar("Joker?", [1.0, 0.0], (10, SourceType.SCRIPT)) is None
+
+    def test_least_recently_used_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", [1.0, 0.0], PARAMS, make_response("a"))
+        cache.put("b", [0.0, 1.0], PARAMS, make_response("b"))
+        cache.get_exact("a", PARAMS)  # a yeniden kullanıldı → b en eski
+        cache.put("c", [1.0, 1.0], PARAMS, make_response("c"))
+
+        assert len(cache) == 2
+        assert cache.get_exact("b", PARAMS) is None
+        assert cache.get_exact("a", PARAMS) is not None
+
+    def test_expired_entries_not_returned(self):
+        cache = ResponseCache(ttl=0)
+        cache.put("Joker?", [1.0, 0.0], PARAMS, make_response("Joker?"))
+
+        assert cache.get_similar("Joker?", [1.0, 0.0], PARAMS) is None
+        assert cache.get_exact("Joker?", PARAMS) is None
+        assert len(cache) == 0
+
+    def test_clear_response_caches_clears_all_instances(self):
+        caches = [ResponseCache(), ResponseCache()]
+        for cache in caches:
+            cache.put("Joker?", [1.0, 0.0], PARAMS, make_response("Joker?"))
+
+        clear_response_caches()
+
+        assert [len(cache) for cache in caches] == [0, 0]
+
+
+class TestPipelineCaching:
+
+    @pytest.fixture
+    def pipeline(self):
+        retriever = Mock()
+        retriever.embed_query.return_value = [1.0, 0.0, 0.0]
+        retriever.retrieve.return_value = [
+            RetrievedDocument(content="Why so serious?", source=SourceType.SCRIPT,
+                              movie_title="The Dark Knight", distance=0.2)
+        ]
+        context_builder = Mock()
+        context_builder.build.return_value = "context"
+        context_builder.max_tokens = 3000
+        generator = Mock()
+        generator.generate.return_value = "Kaos."
+        return RAGPipeline(retriever=retriever, context_builder=context_builder, generator=generator)
+
+    def test_repeated_question_skips_pipeline(self, pipeline):
+        first = pipeline.query("Joker ne istiyor?")
+        second = pipeline.query("Joker ne istiyor?")
+
+        assert second is first
+        pipeline._retriever.embed_query.assert_called_once()
+        pipeline._generator.generate.assert_called_once()
+
+    def test_similar_question_skips_retrieval(self, pipeline):
+        pipeline.query("Joker motivasyon?")
+        pipeline._retriever.embed_query.return_value = [0.99, 0.01, 0.0]
+
+        response = pipeline.query("Joker'in motivasyonu")
+
+        assert response.answer == "Kaos."
+        assert response.query == "Joker'in motivasyonu"
+        pipeline._retriever.retrieve.assert_called_once()
+        pipeline._generator.generate.assert_called_once()
+
+    def test_query_vector_reused_for_retrieval(self, pipeline):
+        pipeline.query("Batman kim?")
+
+        kwargs = pipeline._retriever.retrieve.call_args.kwargs
+        assert kwargs["query_vector"] == [1.0, 0.0, 0.0]
+        assert kwargs["max_tokens"] == 3000
+
+    def test_failed_generation_not_cached(self, pipeline):
+        """Geçici LLM hatası cevabı önbellekten tekrar servis edilmemeli."""
+        pipeline._generator.generate.side_effect = [GenerationError("ResourceExhausted"), "Kaos."]
+
+        failed = pipeline.query("Joker ne istiyor?")
+        retried = pipeline.query("Joker ne istiyor?")
+
+        assert "ResourceExhausted" in failed.answer
+        assert retried.answer == "Kaos."
+        assert pipeline._generator.generate.call_count == 2
+
+    def test_empty_retrieval_not_cached(self, pipeline):
+        pipeline._retriever.retrieve.return_value = []
+
+        pipeline.query("Joker ne istiyor?")
+
+        assert len(pipeline._response_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_aquery_shares_cache_with_query(self, pipeline):
+        """Async akış async bileşenleri kullanmalı; cevabı senkron query'ye de açık olmalı."""
+        retriever = pipeline._retriever
+        retriever.aembed_query = AsyncMock(return_value=[1.0, 0.0, 0.0])
+        retriever.aretrieve = AsyncMock(return_value=retriever.retrieve.return_value)
+        pipeline._generator.agenerate = AsyncMock(return_value="Kaos.")
+
+        response = await pipeline.aquery("Joker ne istiyor?")
+
+        assert response.answer == "Kaos."
+        assert pipeline.query("Joker ne istiyor?") is response
+        retriever.retrieve.assert_not_called()
+        pipeline._generator.generate.assert_not_called()
@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.services.rag.dtos import SourceType
+from src.services.rag.retriever import Retriever
+
+
+def make_result(doc, source, distance):
+    return {
+        "document": doc,
+        "metadata": {"source": source, "movie_title": "The Dark Knight"},
+        "distance": distance,
+    }
+
+
+class TestRetriever:
+
+    @pytest.fixture
+    def embedding(self):
+        provider = Mock()
+        provider.embed_query.return_value = [0.1, 0.2, 0.3]
+        return provider
+
+    def test_results_sorted_by_weighted_score(self, embedding):
+        """Mesafe kaynak ağırlığına bölünüp artan sırada dönmeli."""
+        store = Mock()
+        store.search.return_value = [
+            make_result("tmdb", "tmdb", 0.40),     # 0.40 / 0.8 = 0.50
+            make_result("script", "script", 0.45), # 0.45 / 1.0 = 0.45
+            make_result("imdb", "imdb", 0.36),     # 0.36 / 0.9 = 0.40
+        ]
+
+        docs = Retriever(embedding, store).retrieve("Joker neden kaos istiyor?", limit=3)
+
+        assert [d.content for d in docs] == ["imdb", "script", "tmdb"]
+        assert [d.source for d in docs] == [SourceType.IMDB, SourceType.SCRIPT, SourceType.TMDB]
+        assert docs[0].weighted_score == pytest.approx(0.40)
+        assert docs[2].weighted_score == pytest.approx(0.50)
+
+    def test_equal_scores_keep_search_order(self, embedding):
+        """Eşit skorlu dokümanlar vector store sırasını korumalı."""
+        store = Mock()
+        store.search.return_value = [make_result(f"s{i}", "script", 0.3) for i in range(5)]
+
+        docs = Retriever(embedding, store).retrieve("soru", limit=5)
+
+        assert [d.content for d in docs] == ["s0", "s1", "s2", "s3", "s4"]
+
+    def test_token_budget_stops_at_first_overflow(self, embedding):
+        """Bütçeyi aşan ilk dokümanda kesilmeli (sonrakiler sığsa bile)."""
+        store = Mock()
+        store.search.return_value = [
+            make_result("a b c", "script", 0.1),
+            make_result("d e f g", "script", 0.2),
+            make_result("h", "script", 0.3),
+        ]
+
+        with patch("src.services.rag.retriever.count_tokens", side_effect=lambda t: len(t.split())):
+            docs = Retriever(embedding, store).retrieve("soru", limit=3, max_tokens=5)
+
+        assert [d.content for d in docs] == ["a b c"]
+
+    @pytest.mark.asyncio
+    async def test_aretrieve_uses_async_search(self, embedding):
+        """Async yol asearch'ü kullanmalı, sıralama senkron yolla aynı olmalı."""
+        store = Mock()
+        store.asearch = AsyncMock(return_value=[
+            make_result("tmdb", "tmdb", 0.40),
+            make_result("script", "script", 0.45),
+        ])
+
+        docs = await Retriever(embedding, store).aretrieve("soru", limit=2, source_filter=SourceType.SCRIPT)
+
+        assert [d.content for d in docs] == ["script", "tmdb"]
+        store.asearch.assert_awaited_once_with(
+            query_vector=[0.1, 0.2, 0.3], limit=2, filter={"source": "script"}
+        )
+        store.search.assert_not_called()
+
+    def test_failed_embedding_returns_empty(self, embedding):
+        """Query embedding alınamazsa vector store'a gidilmemeli."""
+        embedding.embed_query.return_value = None
+        store = Mock()
+
+        assert Retriever(embedding, store).retrieve("soru") == []
+        store.search.assert_not_called()
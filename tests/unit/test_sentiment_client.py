@@ -1,6 +1,8 @@
 import pytest
-import requests
-from unittest.mock import Mock, patch, MagicMock, call
+import httpx
+import orjson
+from types import SimpleNamespace
+from unittest.mock import Mock, patch, MagicMock, AsyncMock, call
 import sys
 from pathlib import Path
 
@@ -9,7 +11,29 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 # DOĞRU IMPORT: src.services.sentiment_client modülünden
-from src.services.sentiment_client import SentimentClient, _should_retry
+from src.services.sentiment_client import SentimentClient, _should_retry, _wait_before_retry
+
+
+# Testlerin paylaştığı girdiler (her testte yeniden üretilmez)
+TEXTS = tuple(f"Text{i}" for i in range(100))
+NEUTRAL_RESULT = {"sentiment": "Nötr", "confidence": 0.5}
+
+
+def status_error(status_code, headers=None):
+    """Verilen status kodlu cevap taşıyan httpx.HTTPStatusError."""
+    response = httpx.Response(status_code, headers=headers, request=httpx.Request("POST", "http://test"))
+    return httpx.HTTPStatusError("HTTP error", request=response.request, response=response)
+
+
+@pytest.fixture(scope="module")
+def shared_client():
+    """
+    Varsayılan ayarlı tek client (HTTP çağrıları testlerde mocklanır).
+    Init/close davranışını test edenler kendi client'ını açar.
+    """
+    client = SentimentClient()
+    yield client
+    client.close()
 
 
 # ============================================================================
@@ -20,28 +44,35 @@ class TestShouldRetry:
     """Retry stratejisinin doğru çalıştığını test et."""
     
     def test_timeout_should_retry(self):
-        exc = requests.Timeout("Connection timeout")
+        exc = httpx.ReadTimeout("Connection timeout")
         assert _should_retry(exc) is True
     
     def test_connection_error_should_retry(self):
-        exc = requests.ConnectionError("Network unreachable")
+        exc = httpx.ConnectError("Network unreachable")
         assert _should_retry(exc) is True
     
     def test_5xx_error_should_retry(self):
-        response = Mock(status_code=503)
-        exc = requests.HTTPError()
-        exc.response = response
-        assert _should_retry(exc) is True
+        assert _should_retry(status_error(503)) is True
+    
+    def test_429_should_retry(self):
+        assert _should_retry(status_error(429)) is True
     
     def test_4xx_error_should_not_retry(self):
-        response = Mock(status_code=400)
-        exc = requests.HTTPError()
-        exc.response = response
-        assert _should_retry(exc) is False
+        assert _should_retry(status_error(400)) is False
     
     def test_other_exceptions_should_not_retry(self):
         assert _should_retry(ValueError("Test")) is False
         assert _should_retry(KeyError("Test")) is False
+    
+    def test_wait_honors_retry_after_with_cap(self):
+        """Retry-After varsa beklenir (30 sn ile sınırlı), yoksa backoff kullanılır."""
+        def state(status, headers):
+            exc = status_error(status, headers)
+            return SimpleNamespace(attempt_number=1, outcome=SimpleNamespace(exception=lambda: exc))
+        
+        assert _wait_before_retry(state(429, {"Retry-After": "5"})) == 5
+        assert _wait_before_retry(state(503, {"Retry-After": "120"})) == 30
+        assert 0 < _wait_before_retry(state(500, {"Retry-After": "5"})) <= 8
 
 
 # ============================================================================
@@ -75,6 +106,13 @@ class TestSentimentClientInit:
         assert client.timeout_seconds == 30
         client.close()
     
+    def test_client_targets_service(self):
+        client = SentimentClient(base_url="http://custom:9000/", timeout_seconds=30)
+        assert client.batch_url == "http://custom:9000/api/v1/analyze-batch"
+        assert client.client.timeout.read == 30
+        assert client.client.headers["Content-Type"] == "application/json"
+        client.close()
+    
     def test_fail_closed_mode(self):
         client = SentimentClient(fail_open=False)
         assert client.fail_open is False
@@ -88,12 +126,12 @@ class TestSentimentClientInit:
 class TestContextManager:
     """Context manager desteğini test et."""
     
-    def test_context_manager_closes_session(self):
-        """Context manager çıkışında session.close() çağrılmalı."""
-        # Session.close metodunu izleyelim (spy/mock)
-        with patch('requests.Session.close') as mock_close:
+    def test_context_manager_closes_client(self):
+        """Context manager çıkışında client.close() çağrılmalı."""
+        # httpx.Client.close metodunu izleyelim (spy/mock)
+        with patch.object(httpx.Client, 'close') as mock_close:
             with SentimentClient() as client:
-                assert client.session is not None
+                assert client.client is not None
             
             # with bloğundan çıkınca close çağrılmış olmalı
             mock_close.assert_called_once()
@@ -106,32 +144,23 @@ class TestContextManager:
 class TestHealthCheck:
     """Health check fonksiyonunu test et."""
     
-    # DİKKAT: Patch yolu 'src.services.sentiment_client...' olarak güncellendi
-    @patch('src.services.sentiment_client.requests.Session.get')
-    def test_health_check_success(self, mock_get):
-        mock_response = Mock(status_code=200)
-        mock_get.return_value = mock_response
+    @patch.object(httpx.Client, 'get')
+    def test_health_check_success(self, mock_get, shared_client):
+        mock_get.return_value = SimpleNamespace(status_code=200)
         
-        client = SentimentClient()
-        assert client.check_health() is True
-        client.close()
+        assert shared_client.check_health() is True
     
-    @patch('src.services.sentiment_client.requests.Session.get')
-    def test_health_check_failure_500(self, mock_get):
-        mock_response = Mock(status_code=500)
-        mock_get.return_value = mock_response
+    @patch.object(httpx.Client, 'get')
+    def test_health_check_failure_500(self, mock_get, shared_client):
+        mock_get.return_value = SimpleNamespace(status_code=500)
         
-        client = SentimentClient()
-        assert client.check_health() is False
-        client.close()
+        assert shared_client.check_health() is False
     
-    @patch('src.services.sentiment_client.requests.Session.get')
-    def test_health_check_timeout(self, mock_get):
-        mock_get.side_effect = requests.Timeout("Timeout")
+    @patch.object(httpx.Client, 'get')
+    def test_health_check_timeout(self, mock_get, shared_client):
+        mock_get.side_effect = httpx.ConnectTimeout("Timeout")
         
-        client = SentimentClient()
-        assert client.check_health() is False
-        client.close()
+        assert shared_client.check_health() is False
 
 
 # ============================================================================
@@ -141,55 +170,45 @@ class TestHealthCheck:
 class TestSendBatch:
     """_send_batch() metodunu test et (retry devre dışı)."""
     
-    # DİKKAT: Patch yolu 'src.services.sentiment_client...' olarak güncellendi
-    @patch('src.services.sentiment_client.requests.Session.post')
-    def test_send_batch_success(self, mock_post):
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+    @patch.object(httpx.Client, 'post')
+    def test_send_batch_success(self, mock_post, shared_client):
+        mock_post.return_value = SimpleNamespace(status_code=200, is_error=False, content=orjson.dumps({
             "results": [
                 {"sentiment": "Pozitif", "confidence": 0.95},
                 {"sentiment": "Negatif", "confidence": 0.89}
             ]
-        }
-        mock_post.return_value = mock_response
+        }))
         
-        client = SentimentClient()
         # Retry sayacını temizlemek gerekebilir ama mock ile genelde sorun olmaz
-        results = client._send_batch(["Great!", "Bad!"])
+        results = shared_client._send_batch(["Great!", "Bad!"])
         
         assert len(results) == 2
         assert results[0]["sentiment"] == "Pozitif"
         assert results[1]["sentiment"] == "Negatif"
-        client.close()
+        # Gövde orjson ile önceden serialize edilip gönderilmeli
+        assert orjson.loads(mock_post.call_args.kwargs["content"]) == {"texts": ["Great!", "Bad!"]}
     
-    @patch('src.services.sentiment_client.requests.Session.post')
-    def test_send_batch_invalid_response_format(self, mock_post):
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"results": "NOT_A_LIST"} 
-        mock_post.return_value = mock_response
+    @patch.object(httpx.Client, 'post')
+    def test_send_batch_invalid_response_format(self, mock_post, shared_client):
+        mock_post.return_value = SimpleNamespace(
+            status_code=200, is_error=False, content=orjson.dumps({"results": "NOT_A_LIST"})
+        )
         
-        client = SentimentClient()
         with pytest.raises(ValueError, match="beklenmeyen format"):
-            client._send_batch(["Test"])
-        client.close()
+            shared_client._send_batch(["Test"])
     
-    @patch('src.services.sentiment_client.requests.Session.post')
-    def test_send_batch_4xx_error_no_retry(self, mock_post):
-        mock_response = Mock()
-        mock_response.status_code = 400
+    @patch.object(httpx.Client, 'post')
+    def test_send_batch_4xx_error_no_retry(self, mock_post, shared_client):
+        mock_response = Mock(status_code=400, is_error=True)
         mock_response.text = "Bad Request"
         # raise_for_status çağrılınca hata fırlatsın
-        mock_response.raise_for_status.side_effect = requests.HTTPError()
+        mock_response.raise_for_status.side_effect = status_error(400)
         mock_post.return_value = mock_response
         
-        client = SentimentClient()
-        with pytest.raises(requests.HTTPError):
-            client._send_batch(["Test"])
+        with pytest.raises(httpx.HTTPStatusError):
+            shared_client._send_batch(["Test"])
         
         assert mock_post.call_count == 1
-        client.close()
 
 
 # ============================================================================
@@ -198,25 +217,19 @@ class TestSendBatch:
 
 class TestAnalyzeBatchValidation:
     
-    def test_empty_list_returns_empty(self):
-        client = SentimentClient()
-        result = client.analyze_batch([])
+    def test_empty_list_returns_empty(self, shared_client):
+        result = shared_client.analyze_batch([])
         assert result == []
-        client.close()
     
-    def test_batch_size_too_small(self):
-        client = SentimentClient()
+    def test_batch_size_too_small(self, shared_client):
         with pytest.raises(ValueError, match="1-100 arasında olmalı"):
-            client.analyze_batch(["Test"], batch_size=0)
+            shared_client.analyze_batch(["Test"], batch_size=0)
         with pytest.raises(ValueError, match="1-100 arasında olmalı"):
-            client.analyze_batch(["Test"], batch_size=-5)
-        client.close()
+            shared_client.analyze_batch(["Test"], batch_size=-5)
     
-    def test_batch_size_too_large(self):
-        client = SentimentClient()
+    def test_batch_size_too_large(self, shared_client):
         with pytest.raises(ValueError, match="1-100 arasında olmalı"):
-            client.analyze_batch(["Test"], batch_size=101)
-        client.close()
+            shared_client.analyze_batch(["Test"], batch_size=101)
 
 
 # ============================================================================
@@ -226,43 +239,77 @@ class TestAnalyzeBatchValidation:
 class TestAnalyzeBatchHappyPath:
     
     @patch.object(SentimentClient, '_send_batch')
-    def test_single_batch_success(self, mock_send):
+    def test_single_batch_success(self, mock_send, shared_client):
         mock_send.return_value = [
             {"sentiment": "Pozitif", "confidence": 0.9},
             {"sentiment": "Negatif", "confidence": 0.8}
         ]
         
-        client = SentimentClient()
-        results = client.analyze_batch(["Good", "Bad"], batch_size=10)
+        results = shared_client.analyze_batch(["Good", "Bad"], batch_size=10)
         
         assert len(results) == 2
         assert results[0]["sentiment"] == "Pozitif"
         assert mock_send.call_count == 1
-        client.close()
     
     @patch.object(SentimentClient, '_send_batch')
-    def test_multiple_batches(self, mock_send):
-        mock_send.return_value = [{"sentiment": "Nötr", "confidence": 0.5}] * 2
+    def test_multiple_batches(self, mock_send, shared_client):
+        mock_send.return_value = [NEUTRAL_RESULT] * 2
         
-        client = SentimentClient()
-        texts = ["Text"] * 5 
-        results = client.analyze_batch(texts, batch_size=2) 
+        texts = TEXTS[:5]
+        results = shared_client.analyze_batch(texts, batch_size=2) 
         
         assert len(results) == 5
         assert mock_send.call_count == 3 
-        client.close()
     
     @patch.object(SentimentClient, '_send_batch')
-    def test_none_values_normalized(self, mock_send):
+    def test_none_values_normalized(self, mock_send, shared_client):
         mock_send.return_value = [{"sentiment": "Nötr", "confidence": 0.0}] * 2
         
-        client = SentimentClient()
-        results = client.analyze_batch([None, "Test"], batch_size=10)
+        results = shared_client.analyze_batch([None, "Test"], batch_size=10)
         
         call_args = mock_send.call_args[0][0]
         assert call_args[0] == "" 
         assert call_args[1] == "Test"
-        client.close()
+    
+    @patch.object(SentimentClient, '_send_batch')
+    def test_default_batch_uses_service_limit(self, mock_send, shared_client):
+        """Varsayılan batch size servis limiti olmalı: 100 metin tek istekte gider."""
+        mock_send.return_value = [NEUTRAL_RESULT] * 100
+        
+        shared_client.analyze_batch(TEXTS)
+        
+        assert mock_send.call_count == 1
+    
+    @patch.object(SentimentClient, '_send_batch')
+    def test_byte_limit_splits_batch(self, mock_send, shared_client):
+        """Toplam boyut max_bytes'ı aşarsa batch bölünmeli."""
+        mock_send.side_effect = lambda chunk: [NEUTRAL_RESULT] * len(chunk)
+        
+        results = shared_client.analyze_batch([str(i) * 40 for i in range(5)], max_bytes=100)
+        
+        assert len(results) == 5
+        assert sorted(len(c.args[0]) for c in mock_send.call_args_list) == [1, 2, 2]
+    
+    @patch.object(SentimentClient, '_send_batch')
+    def test_duplicate_texts_sent_once(self, mock_send, shared_client):
+        """Tekrarlanan metinler bir kez gönderilmeli, sonuç her pozisyona dağıtılmalı."""
+        mock_send.side_effect = lambda chunk: [{"sentiment": t, "confidence": 1.0} for t in chunk]
+        
+        results = shared_client.analyze_batch(["OK", None, "Great", "OK", ""])
+        
+        assert mock_send.call_args[0][0] == ["OK", "", "Great"]
+        assert [r["sentiment"] for r in results] == ["OK", "", "Great", "OK", ""]
+    
+    @patch.object(SentimentClient, '_send_batch')
+    def test_concurrent_batches_keep_order(self, mock_send, shared_client):
+        """Eşzamanlı gönderilen batch sonuçları metin sırasıyla dönmeli."""
+        mock_send.side_effect = lambda chunk: [{"sentiment": t, "confidence": 1.0} for t in chunk]
+        
+        texts = [f"T{i}" for i in range(10)]
+        results = shared_client.analyze_batch(texts, batch_size=3)
+        
+        assert [r["sentiment"] for r in results] == texts
+        assert mock_send.call_count == 4
 
 
 # ============================================================================
@@ -272,46 +319,112 @@ class TestAnalyzeBatchHappyPath:
 class TestAnalyzeBatchErrorHandling:
     
     @patch.object(SentimentClient, '_send_batch')
-    def test_fail_open_mode_network_error(self, mock_send):
-        mock_send.side_effect = requests.ConnectionError("Network down")
+    def test_fail_open_mode_network_error(self, mock_send, shared_client):
+        mock_send.side_effect = httpx.ConnectError("Network down")
         
-        client = SentimentClient(fail_open=True)
-        results = client.analyze_batch(["Test1", "Test2"], batch_size=10)
+        results = shared_client.analyze_batch(["Test1", "Test2"], batch_size=10)
         
         assert len(results) == 2
         assert all(r["sentiment"] == "Nötr" for r in results)
-        client.close()
+    
+    @patch.object(SentimentClient, '_send_batch')
+    def test_fail_open_results_are_independent_dicts(self, mock_send, shared_client):
+        """Nötr sonuçlar düz dict olmalı: değiştirilebilir ve serialize edilebilir."""
+        mock_send.side_effect = httpx.ConnectError("Network down")
+        
+        results = shared_client.analyze_batch(["Test1", "Test2"], batch_size=10)
+        results[0]["sentiment"] = "Pozitif"
+        
+        assert results[1]["sentiment"] == "Nötr"
+        assert orjson.loads(orjson.dumps(results))[1] == {"sentiment": "Nötr", "confidence": 0.0}
     
     @patch.object(SentimentClient, '_send_batch')
     def test_fail_closed_mode_raises_error(self, mock_send):
-        mock_send.side_effect = requests.ConnectionError("Network down")
+        mock_send.side_effect = httpx.ConnectError("Network down")
         
         client = SentimentClient(fail_open=False)
-        with pytest.raises(requests.ConnectionError):
+        with pytest.raises(httpx.ConnectError):
             client.analyze_batch(["Test"], batch_size=10)
         client.close()
     
     @patch.object(SentimentClient, '_send_batch')
-    def test_length_mismatch_fills_neutral(self, mock_send):
+    def test_length_mismatch_fills_neutral(self, mock_send, shared_client):
         mock_send.return_value = [
             {"sentiment": "Pozitif", "confidence": 0.9},
             {"sentiment": "Negatif", "confidence": 0.8}
         ]
         
-        client = SentimentClient()
-        results = client.analyze_batch(["A", "B", "C"], batch_size=10)
+        results = shared_client.analyze_batch(["A", "B", "C"], batch_size=10)
         
         assert len(results) == 3
         assert results[2]["sentiment"] == "Nötr"
-        client.close()
     
     @patch.object(SentimentClient, '_send_batch')
-    def test_critical_error_raises(self, mock_send):
+    def test_critical_error_raises(self, mock_send, shared_client):
         mock_send.side_effect = MemoryError("Out of memory")
         
-        client = SentimentClient(fail_open=True)
         with pytest.raises(MemoryError):
-            client.analyze_batch(["Test"], batch_size=10)
+            shared_client.analyze_batch(["Test"], batch_size=10)
+
+
+# ============================================================================
+# ASYNC TESTS: analyze_batch_async()
+# ============================================================================
+
+class TestAnalyzeBatchAsync:
+    
+    @pytest.mark.asyncio
+    async def test_texts_sent_in_single_request(self):
+        mock_response = SimpleNamespace(is_error=False, content=orjson.dumps({
+            "results": [{"sentiment": "Pozitif", "confidence": 0.9}] * 3
+        }))
+        
+        client = SentimentClient()
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = mock_response
+            results = await client.analyze_batch_async(["A", "B", "C"])
+        
+        assert mock_post.call_count == 1
+        assert orjson.loads(mock_post.call_args.kwargs["content"]) == {"texts": ["A", "B", "C"]}
+        assert [r["sentiment"] for r in results] == ["Pozitif"] * 3
+        await client.aclose()
+        client.close()
+    
+    @pytest.mark.asyncio
+    async def test_fail_open_mode_network_error(self):
+        client = SentimentClient(fail_open=True)
+        with patch.object(SentimentClient, "_send_batch_async", new_callable=AsyncMock) as mock_send:
+            mock_send.side_effect = httpx.ConnectError("Network down")
+            results = await client.analyze_batch_async(["Test1", "Test2"])
+        
+        assert len(results) == 2
+        assert all(r["sentiment"] == "Nötr" for r in results)
+        client.close()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_batches_capped(self):
+        """Async yol da senkron yol gibi en fazla MAX_CONCURRENT_BATCHES istek uçurmalı."""
+        import asyncio
+        
+        in_flight = peak = 0
+        
+        async def fake_send(texts):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [NEUTRAL_RESULT] * len(texts)
+        
+        client = SentimentClient()
+        with patch.object(client, "_send_batch_async", side_effect=fake_send) as mock_send:
+            results = await client.analyze_batch_async(
+                [f"Yorum {i}" for i in range(40)], batch_size=2
+            )
+        
+        assert len(results) == 40
+        assert mock_send.call_count == 20
+        assert peak == client.MAX_CONCURRENT_BATCHES
         client.close()
 
 
@@ -325,12 +438,10 @@ class TestAnalyzeBatchErrorHandling:
     (3, 4),
 ])
 @patch.object(SentimentClient, '_send_batch')
-def test_batch_splitting(mock_send, batch_size, expected_calls):
-    mock_send.return_value = [{"sentiment": "Nötr", "confidence": 0.5}] * batch_size
+def test_batch_splitting(mock_send, batch_size, expected_calls, shared_client):
+    mock_send.return_value = [NEUTRAL_RESULT] * batch_size
     
-    client = SentimentClient()
-    texts = ["Text"] * 10
-    client.analyze_batch(texts, batch_size=batch_size)
+    texts = TEXTS[:10]
+    shared_client.analyze_batch(texts, batch_size=batch_size)
     
-    assert mock_send.call_count == expected_calls
-    client.close()
\ No newline at end of file
+    assert mock_send.call_count == expected_calls
\ No newline at end of file
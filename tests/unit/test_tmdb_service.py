@@ -1,15 +1,27 @@
+import asyncio
+import httpx
 import pytest
+import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock
+from tenacity import wait_none
 from src.services.tmdb_service import TMDbService
 from src.domain.models import Movie, TMDbReview
 
 # Testlerde gerçek bir Service örneği kullanacağız
 # Ama HTTP isteklerini engelleyeceğiz (Mocking)
+# Modül boyunca tek instance + tek event loop; mocker yamaları her testten sonra geri alınır
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def service():
+    service = TMDbService()
+    yield service
+    await service.aclose()
+
 @pytest.fixture
-def service():
-    return TMDbService()
+def no_retry_wait(mocker):
+    """Retry'lar arasında beklemeyi kapat (testler hızlı kalsın)."""
+    mocker.patch.object(TMDbService._get.retry, "wait", wait_none())
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_search_movie_success(service, mocker):
     """
     Senaryo: Başarılı bir arama isteği.
@@ -32,7 +44,7 @@ async def test_search_movie_success(service, mocker):
     # _request'in doğru parametrelerle çağrılıp çağrılmadığını kontrol et
     service._request.assert_called_with("/search/movie", {"query": "The Dark Knight"})
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_search_movie_empty(service, mocker):
     """
     Senaryo: Arama sonucu boş dönerse.
@@ -43,7 +55,7 @@ async def test_search_movie_empty(service, mocker):
     result = await service.search_movie("Bilinmeyen Film 123")
     assert result is None
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_get_movie_details_success(service, mocker):
     """
     Senaryo: Başarılı film detayı ve Credits çekimi.
@@ -80,7 +92,7 @@ async def test_get_movie_details_success(service, mocker):
     assert movie.movie_id == "the-dark-knight-2008"  # Slug mantığı
     assert str(movie.poster_url) == "https://image.tmdb.org/t/p/w500/poster.jpg"
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_get_movie_not_found(service, mocker):
     """
     Senaryo: API boş cevap dönerse veya 404 alırsa.
@@ -92,7 +104,7 @@ async def test_get_movie_not_found(service, mocker):
     movie = await service.get_movie(999999)
     assert movie is None
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_get_reviews_success(service, mocker):
     """
     Senaryo: Başarılı yorum çekimi.
@@ -121,31 +133,114 @@ async def test_get_reviews_success(service, mocker):
     assert reviews[0].movie_id == "155"
 
 # --- ERROR HANDLING TESTİ (Derinlemesine) ---
-@pytest.mark.asyncio
-async def test_http_exception_handling(service, mocker):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_http_exception_handling(service, mocker, no_retry_wait):
     """
     Senaryo: _request metodunun kendisinin hata yönetimi.
     Bu testte direkt service._request'i değil, onun içindeki httpx'i mockluyoruz.
     Amacımız: try/except bloğunun çalışıp çalışmadığını görmek.
     """
     # httpx.AsyncClient().get() metodunu patlatacağız
-    # Bu biraz karmaşık bir mock, çünkü Context Manager (async with) var.
     
     # 1. Mock Client Oluştur
     mock_client = AsyncMock()
     # get metodu bir hata fırlatsın (örn: Bağlantı hatası)
-    mock_client.get.side_effect = Exception("Connection Error")
+    mock_client.get.side_effect = httpx.ConnectError("Connection Error")
 
-    # 2. httpx.AsyncClient'ın bu mock_client'ı dönmesini sağla
-    # Service dosyasındaki 'httpx' modülünü patchliyoruz
-    mocker.patch("src.services.tmdb_service.httpx.AsyncClient", return_value=mock_client)
-    
-    # Context manager (__aenter__) mocklaması
-    mock_client.__aenter__.return_value = mock_client
-    mock_client.__aexit__.return_value = None
+    # 2. Paylaşılan client yerine bu mock_client dönsün
+    # (service modül boyunca ortak; gerçek client'ı önbelleğe almadan yamalıyoruz)
+    mocker.patch.object(service, "_get_client", return_value=mock_client)
 
     # 3. Aksiyon
     # _request metodu hatayı yakalayıp ekrana basmalı ve None dönmeli
     result = await service._request("/test-endpoint")
     
-    assert result is None
\ No newline at end of file
+    assert result is None
+    # Bağlantı hatası geçici sayılır → 3 deneme
+    assert mock_client.get.call_count == 3
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_not_found_is_not_retried(service, mocker, no_retry_wait):
+    """
+    Senaryo: TMDb 404 döner.
+    Beklenen: Tekrar denenmeden None.
+    """
+    request = httpx.Request("GET", "https://api.themoviedb.org/3/movie/1")
+    mock_client = AsyncMock()
+    mock_client.get.return_value = httpx.Response(404, request=request)
+    mocker.patch.object(service, "_get_client", return_value=mock_client)
+
+    assert await service._request("/movie/1") is None
+    assert mock_client.get.call_count == 1
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_programming_errors_propagate(service, mocker):
+    """
+    Senaryo: HTTP dışı bir hata (bug).
+    Beklenen: None'a çevrilip gizlenmemeli.
+    """
+    mock_client = AsyncMock()
+    mock_client.get.side_effect = TypeError("bug")
+    mocker.patch.object(service, "_get_client", return_value=mock_client)
+
+    with pytest.raises(TypeError):
+        await service._request("/movie/1")
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_reviews_fetches_remaining_pages_concurrently(service, mocker):
+    """
+    Senaryo: 3 sayfalık yorum.
+    Beklenen: 1. sayfadan sonra kalanlar birlikte istenmeli, sıra korunmalı.
+    """
+    def page(n, total=3):
+        return {
+            "results": [{"id": f"r{n}", "author": "a", "content": f"page {n}"}],
+            "total_pages": total
+        }
+
+    async def fake_request(endpoint, params):
+        return page(params["page"])
+
+    mocker.patch.object(service, '_request', side_effect=fake_request)
+
+    reviews = await service.get_reviews(155, max_pages=5)
+
+    assert [r.review_id for r in reviews] == ["r1", "r2", "r3"]
+    assert service._request.call_count == 3
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_reviews_stream_yields_first_page_early(service, mocker):
+    """
+    Senaryo: Tüketici ilk yorumdan sonra akışı bırakır.
+    Beklenen: İlk sayfa diğer sayfalar beklenmeden gelmeli.
+    """
+    async def fake_request(endpoint, params):
+        if params["page"] > 1:
+            await asyncio.sleep(10)  # Yavaş sayfa
+        return {
+            "results": [{"id": f"r{params['page']}", "author": "a", "content": "x"}],
+            "total_pages": 2
+        }
+
+    mocker.patch.object(service, '_request', side_effect=fake_request)
+
+    stream = service.get_reviews_stream(155)
+    first = await asyncio.wait_for(stream.__anext__(), timeout=1)
+    await stream.aclose()
+
+    assert first.review_id == "r1"
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_movie_bundle_fetches_details_and_reviews(service, mocker):
+    """
+    Senaryo: Film + yorumlar birlikte istenir.
+    Beklenen: İki sonuç da tek çağrıda dönmeli.
+    """
+    movie = MagicMock(spec=Movie)
+    mocker.patch.object(service, "get_movie", AsyncMock(return_value=movie))
+    mocker.patch.object(service, "get_reviews", AsyncMock(return_value=["review"]))
+
+    result = await service.get_movie_bundle(155, review_pages=2)
+
+    assert result == (movie, ["review"])
+    service.get_reviews.assert_awaited_once_with(155, max_pages=2)